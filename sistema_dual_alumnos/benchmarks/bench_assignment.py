@@ -0,0 +1,54 @@
+import os
+import sys
+import random
+import time
+from collections import Counter
+
+# Allow running as `python benchmarks/bench_assignment.py` from sistema_dual_alumnos/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.assignment import plan_balanced_assignment, plan_round_robin
+
+def build_dataset(n_students, n_mentors, n_subjects=300, n_careers=5, seed=1):
+    """Synthetic period: each subject taught by 2 mentors, each career by 10."""
+    rnd = random.Random(seed)
+    mentors = [f"m{i}" for i in range(n_mentors)]
+    subjects = [f"s{i}" for i in range(n_subjects)]
+    by_subject = {s: set(rnd.sample(mentors, 2)) for s in subjects}
+    by_career = {c: set(rnd.sample(mentors, min(10, n_mentors))) for c in range(n_careers)}
+    projects = [
+        {"id": i, "alumno_id": i, "carrera_id": i % n_careers, "asignatura_ids": set(rnd.sample(subjects, 6))}
+        for i in range(n_students)
+    ]
+    return mentors, projects, by_subject, by_career
+
+def affinity_ratio(assignments, projects, by_subject):
+    by_id = {p["id"]: p for p in projects}
+    hits = 0
+    for a in assignments:
+        teaching = set().union(*(by_subject[s] for s in by_id[a["id"]]["asignatura_ids"]))
+        hits += a["mentor_ie_id"] in teaching
+    return hits / len(assignments) if assignments else 0.0
+
+def run(n_students, n_mentors):
+    mentors, projects, by_subject, by_career = build_dataset(n_students, n_mentors)
+
+    start = time.perf_counter()
+    rr = plan_round_robin(mentors, projects)
+    rr_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    balanced, unassigned = plan_balanced_assignment(mentors, projects, mentors_by_subject=by_subject, mentors_by_career=by_career)
+    balanced_time = time.perf_counter() - start
+
+    for name, result, elapsed in (("round_robin", rr, rr_time), ("balanced", balanced, balanced_time)):
+        counts = Counter(a["mentor_ie_id"] for a in result)
+        print(f"{name:12s} students={n_students:6d} mentors={n_mentors:4d} time={elapsed * 1000:8.1f} ms "
+              f"load=[{min(counts.values())}, {max(counts.values())}] "
+              f"subject_affinity={affinity_ratio(result, projects, by_subject):.0%}")
+    if unassigned:
+        print(f"  unassigned: {len(unassigned)}")
+
+if __name__ == "__main__":
+    for n_students, n_mentors in ((500, 20), (5000, 60), (20000, 150)):
+        run(n_students, n_mentors)
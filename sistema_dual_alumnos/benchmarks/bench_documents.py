@@ -0,0 +1,104 @@
+import os
+import io
+import sys
+import time
+import shutil
+import tempfile
+from docx import Document
+
+# Allow running as `python benchmarks/bench_documents.py` from sistema_dual_alumnos/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep the benchmark's documents out of the app's cache (workers inherit the env)
+os.environ.setdefault("DOCUMENT_CACHE_DIR", tempfile.mkdtemp(prefix="bench_document_cache_"))
+
+from src.utils.document_generator import (
+    DOCUMENT_TEMPLATES, DOCUMENT_WORKERS, build_document_context, render_student_documents, write_documents_zip
+)
+
+def create_templates(path, filler_paragraphs=60):
+    """Templates shaped like create_templates.py plus body text and a table, as the real formats have."""
+    for template, _ in DOCUMENT_TEMPLATES:
+        doc = Document()
+        doc.add_heading(template, 0)
+        for label in ("nombre_alumno", "matricula", "nombre_proyecto", "nombre_empresa", "mentor_ue", "mentor_ie", "email_mentor_ie"):
+            doc.add_paragraph(f"{label}: {{{{{label}}}}}")
+        for i in range(filler_paragraphs):
+            doc.add_paragraph(f"Cláusula {i}: texto fijo del formato oficial que no lleva datos del alumno.")
+        table = doc.add_table(rows=6, cols=3)
+        for r, row in enumerate(table.rows):
+            for c, cell in enumerate(row.cells):
+                cell.text = "{{tabla_materias}}" if (r, c) == (1, 1) else f"Celda {r}-{c}"
+        doc.save(os.path.join(path, template))
+
+def legacy_fill_template(template_path, data):
+    """The previous fill_template: reopen the template and scan every paragraph once per key."""
+    doc = Document(template_path)
+    for paragraph in doc.paragraphs:
+        for key, value in data.items():
+            if f"{{{{{key}}}}}" in paragraph.text:
+                paragraph.text = paragraph.text.replace(f"{{{{{key}}}}}", str(value))
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for paragraph in cell.paragraphs:
+                    for key, value in data.items():
+                        if f"{{{{{key}}}}}" in paragraph.text:
+                            paragraph.text = paragraph.text.replace(f"{{{{{key}}}}}", str(value))
+    out = io.BytesIO()
+    doc.save(out)
+    return out.getvalue()
+
+def build_contexts(n):
+    return [
+        build_document_context(
+            {"nombre": f"Alumno {i}", "ap_paterno": "Pérez", "ap_materno": "López", "matricula": f"2021{i:06d}"},
+            {"nombre_proyecto": f"Proyecto {i}", "ue_name": "Empresa S.A. de C.V.", "mentor_ue_name": "Ing. Mentor"},
+            {"nombre_completo": "Mtra. Académica", "email_institucional": "mentor@tese.edu.mx"},
+        )
+        for i in range(n)
+    ]
+
+def report(name, documents, elapsed):
+    print(f"{name:28s} documents={documents:5d} time={elapsed:7.2f} s rate={documents / elapsed:8.1f} docs/s")
+
+def run(path, n_students):
+    contexts = build_contexts(n_students)
+    docs = n_students * len(DOCUMENT_TEMPLATES)
+
+    sample = contexts[: max(1, n_students // 10)]  # the legacy path is slow; time a tenth
+    start = time.perf_counter()
+    for context in sample:
+        for template, _ in DOCUMENT_TEMPLATES:
+            legacy_fill_template(os.path.join(path, template), context)
+    report("legacy fill_template", len(sample) * len(DOCUMENT_TEMPLATES), time.perf_counter() - start)
+
+    cache_dir = os.environ["DOCUMENT_CACHE_DIR"]
+    shutil.rmtree(cache_dir)
+    os.makedirs(cache_dir)
+
+    start = time.perf_counter()
+    count = write_documents_zip(contexts, io.BytesIO(), workers=DOCUMENT_WORKERS, templates_path=path)
+    report(f"batch ZIP, {DOCUMENT_WORKERS} processes", count, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    count = write_documents_zip(contexts, io.BytesIO(), workers=DOCUMENT_WORKERS, templates_path=path)
+    report("batch ZIP rerun (cached)", count, time.perf_counter() - start)
+
+    shutil.rmtree(cache_dir)
+    os.makedirs(cache_dir)
+
+    start = time.perf_counter()
+    for context in contexts:
+        render_student_documents(context, path)
+    report("compiled, 1 process", docs, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    for context in contexts:
+        render_student_documents(context, path)
+    report("cached, 1 process", docs, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as path:
+        create_templates(path)
+        for n in (100, 1000):
+            run(path, n)
@@ -0,0 +1,149 @@
+import os
+import ssl
+import sys
+import time
+import smtplib
+import base64
+import tempfile
+import threading
+import subprocess
+import socketserver
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+# Allow running as `python benchmarks/bench_email.py` from sistema_dual_alumnos/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.utils.email_sender import Mailer, TEMPLATE_DIR, CONFIRMATION_SUBJECT
+
+USER, PASSWORD = "dual@example.edu", "secret"
+LATENCY = float(os.environ.get("BENCH_SMTP_LATENCY", 0.005))  # seconds added to every server reply (network round trip)
+
+class SinkHandler(socketserver.StreamRequestHandler):
+    """Minimal SMTP server that accepts and discards everything (EHLO, STARTTLS, AUTH PLAIN, DATA)."""
+
+    def reply(self, line):
+        time.sleep(LATENCY)
+        self.wfile.write(line.encode() + b"\r\n")
+        self.wfile.flush()
+
+    def handle(self):
+        self.reply("220 sink ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode().strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                extensions = ["250-sink", "250-AUTH PLAIN", "250 SIZE 10485760"]
+                if self.server.tls and not isinstance(self.connection, ssl.SSLSocket):
+                    extensions.insert(1, "250-STARTTLS")
+                for extension in extensions:
+                    self.reply(extension)
+            elif command == "STARTTLS":
+                self.reply("220 go ahead")
+                self.connection = self.server.tls.wrap_socket(self.connection, server_side=True)
+                self.rfile = self.connection.makefile("rb")
+                self.wfile = self.connection.makefile("wb")
+            elif command.startswith("AUTH PLAIN"):
+                credentials = base64.b64decode(line.split()[-1]).split(b"\0")
+                self.reply("235 ok" if credentials[1:] == [USER.encode(), PASSWORD.encode()] else "535 bad credentials")
+            elif command == "DATA":
+                self.reply("354 end with .")
+                while self.rfile.readline() not in (b".\r\n", b".\n", b""):
+                    pass
+                with self.server.lock:
+                    self.server.received += 1
+                self.reply("250 queued")
+            elif command == "QUIT":
+                self.reply("221 bye")
+                return
+            else:  # MAIL, RCPT, NOOP, RSET
+                self.reply("250 ok")
+
+class SinkServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, tls):
+        super().__init__(("127.0.0.1", 0), SinkHandler)
+        self.tls = tls
+        self.lock = threading.Lock()
+        self.received = 0
+
+def tls_context(work):
+    """Self-signed certificate for the sink's STARTTLS, or None without openssl."""
+    cert, key = os.path.join(work, "cert.pem"), os.path.join(work, "key.pem")
+    try:
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1", "-subj", "/CN=localhost",
+                        "-keyout", key, "-out", cert], check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert, key)
+    return context
+
+def legacy_send(port, starttls, to_email, student_data):
+    """The previous send_confirmation_email: new Jinja environment, template parse and SMTP session per message."""
+    from jinja2 import Environment, FileSystemLoader
+    env = Environment(loader=FileSystemLoader(TEMPLATE_DIR))
+    html_content = env.get_template("registro_alumno.html").render(student_data)
+    msg = MIMEMultipart()
+    msg['From'] = USER
+    msg['To'] = to_email
+    msg['Subject'] = CONFIRMATION_SUBJECT
+    msg.attach(MIMEText(html_content, 'html'))
+    server = smtplib.SMTP("127.0.0.1", port)
+    if starttls:
+        server.starttls()
+    server.login(USER, PASSWORD)
+    server.sendmail(USER, to_email, msg.as_string())
+    server.quit()
+
+def build_messages(n):
+    rows = "".join(f"<tr><td>CLV{i}</td><td>Asignatura {i}</td><td>Docente {i}</td><td>{i % 4 + 1}</td></tr>" for i in range(6))
+    return [
+        {
+            "to": f"alumno{i}@example.edu",
+            "subject": CONFIRMATION_SUBJECT,
+            "template": "registro_alumno.html",
+            "context": {
+                "nombre_alumno": f"Alumno {i}", "matricula": f"2026{i:05d}", "carrera": "Ingeniería en Sistemas",
+                "correo_institucional": f"alumno{i}@example.edu", "telefono": "5555555555",
+                "empresa_sede": f"Empresa {i % 50}", "mentor_ue_nombre": f"Mentor {i % 80}", "filas_carga_academica": rows,
+            },
+        }
+        for i in range(n)
+    ]
+
+def report(name, messages, elapsed):
+    print(f"{name:30s} messages={messages:5d} time={elapsed:7.2f} s rate={messages / elapsed:8.1f} msg/s")
+
+def run(server, n):
+    port = server.server_address[1]
+    starttls = server.tls is not None
+    messages = build_messages(n)
+
+    sample = messages[: max(1, n // 5)]  # the per-call path is slow; time a fifth
+    start = time.perf_counter()
+    for message in sample:
+        legacy_send(port, starttls, message["to"], message["context"])
+    report("per-call (previous)", len(sample), time.perf_counter() - start)
+
+    for pool_size in (1, 4):
+        mailer = Mailer("127.0.0.1", port, USER, PASSWORD, pool_size=pool_size, starttls=starttls)
+        start = time.perf_counter()
+        results = mailer.send_many(messages)
+        elapsed = time.perf_counter() - start
+        mailer.close()
+        assert all(results), "the sink rejected messages"
+        report(f"Mailer.send_many, pool={pool_size}", len(messages), elapsed)
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as work:
+        server = SinkServer(tls_context(work))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"SMTP sink on port {server.server_address[1]}, STARTTLS={'yes' if server.tls else 'no'}, reply latency={LATENCY * 1000:.0f} ms")
+        for n in (100, 500):
+            run(server, n)
+        server.shutdown()
@@ -0,0 +1,62 @@
+import os
+import sys
+import time
+
+# Allow running as `python benchmarks/bench_instrumentation.py` from sistema_dual_alumnos/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src import instrumentation
+from src.instrumentation import InstrumentedClient, reset_query_stats
+
+class Response:
+    def __init__(self, data):
+        self.data = data
+
+class Builder:
+    """A postgrest builder whose execute() returns a prebuilt result (no network)."""
+
+    def __init__(self, data):
+        self.response = Response(data)
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, *args):
+        return self
+
+    def execute(self):
+        return self.response
+
+class Client:
+    def __init__(self, data):
+        self.data = data
+
+    def table(self, name):
+        return Builder(self.data)
+
+def build_rows(n):
+    """Rows shaped like a reporte_periodo export page (25 columns)."""
+    return [{f"col_{c}": f"valor {i}-{c}" if c % 3 else i * c for c in range(25)} for i in range(n)]
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+def run(rows, calls):
+    data = build_rows(rows)
+    raw = Client(data)
+    baseline = per_call_us(lambda: raw.table("reporte_periodo").select("*").eq("periodo_id", 1).execute(), calls)
+    print(f"rows={rows:5d}  plain client: {baseline:9.1f} us/call")
+
+    client = InstrumentedClient(raw)
+    for every, label in ((0, "size off"), (100, "size sampled 1/100 (default)"), (1, "size on every call (previous)")):
+        instrumentation.QUERY_SIZE_SAMPLE_EVERY = every
+        reset_query_stats()
+        proxied = per_call_us(lambda: client.table("reporte_periodo").select("*").eq("periodo_id", 1).execute(), calls)
+        print(f"            proxy, {label:30s} {proxied:9.1f} us/call  overhead {proxied - baseline:9.1f} us")
+
+if __name__ == "__main__":
+    for rows, calls in ((10, 20000), (1000, 300), (5000, 100)):
+        run(rows, calls)
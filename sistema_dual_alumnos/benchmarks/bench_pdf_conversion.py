@@ -0,0 +1,65 @@
+import os
+import sys
+import time
+import tempfile
+import subprocess
+
+# Allow running as `python benchmarks/bench_pdf_conversion.py` from sistema_dual_alumnos/
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_documents import create_templates, build_contexts
+from src.utils.document_generator import render_student_documents
+from src.utils.pdf_converter import SOFFICE_PATH, PdfConverterPool
+
+def generate_documents(templates_path, out_dir, n_students):
+    paths = []
+    for context in build_contexts(n_students):
+        for filename, content in render_student_documents(context, templates_path):
+            path = os.path.join(out_dir, filename)
+            with open(path, "wb") as f:
+                f.write(content)
+            paths.append(path)
+    return paths
+
+def one_process_per_file(paths, out_dir):
+    """The usual approach: a cold soffice (and a fresh profile) for every document."""
+    for path in paths:
+        with tempfile.TemporaryDirectory() as profile:
+            subprocess.run([SOFFICE_PATH, f"-env:UserInstallation=file://{profile}", "--headless",
+                            "--convert-to", "pdf", "--outdir", out_dir, path],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+
+def run(n_students):
+    with tempfile.TemporaryDirectory() as work:
+        create_templates(work)
+        docs_dir = os.path.join(work, "docs")
+        os.makedirs(docs_dir)
+        paths = generate_documents(work, docs_dir, n_students)
+
+        sample = paths[:4]
+        start = time.perf_counter()
+        one_process_per_file(sample, os.path.join(work, "cold"))
+        cold = time.perf_counter() - start
+        print(f"soffice per file      documents={len(sample):4d} time={cold:7.2f} s rate={len(sample) / cold:6.2f} docs/s")
+
+        pool = PdfConverterPool()
+        try:
+            start = time.perf_counter()
+            results = pool.convert_many(paths)
+            elapsed = time.perf_counter() - start
+            print(f"warm pool (incl. start) documents={len(paths):4d} time={elapsed:7.2f} s rate={len(paths) / elapsed:6.2f} docs/s")
+            print(f"  stats: {pool.stats()}")
+        finally:
+            pool.shutdown()
+
+        failed = [p for p, pdf in results.items() if not pdf or not os.path.getsize(pdf)]
+        if failed:
+            print(f"FAILED: {len(failed)} documents were not converted, e.g. {failed[:3]}")
+            sys.exit(1)
+        print(f"OK: {len(results)} Anexos/Cartas converted to PDF")
+
+if __name__ == "__main__":
+    if not SOFFICE_PATH:
+        print("LibreOffice (soffice) not found; set SOFFICE_PATH to run this benchmark.")
+        sys.exit(0)
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
@@ -8,12 +8,15 @@ current_dir = os.path.dirname(os.path.abspath(__file__))
 parent_dir = os.path.dirname(current_dir)
 sys.path.insert(0, parent_dir)
 from src.views.auth import render_login
-from src.views.dashboard import render_dashboard
+from src.views.coordinator_dashboard import render_coordinator_dashboard
 from src.views.student_dashboard import render_student_dashboard
 from src.views.registro import render_registro
 from src.views.mentor_dashboard import render_mentor_dashboard
 from src.views.mentor_ie_dashboard import render_mentor_ie_dashboard
+from src.views.debug_panel import render_debug_panel
 from src.utils.ui import inject_custom_css, render_header
+from src.instrumentation import view_scope
+from src.utils.email_outbox import start_outbox_worker
 
 
 
@@ -31,6 +34,9 @@ def main():
         }
     )
 
+    # Background delivery of queued emails (also picks up retries after a restart)
+    start_outbox_worker()
+
     # 1. Inject Global CSS
     inject_custom_css()
     
@@ -43,20 +49,22 @@ def main():
     # 3. Routing
     if "user" not in st.session_state:
         # Login view handles its own specific styles if needed, or inherits global
-        render_login()
+        with view_scope("render_login"):
+            render_login()
     else:
         role = st.session_state.get("role")
         
-        if role == "coordinator":
-            render_dashboard()
-        elif role == "student":
-            render_student_dashboard()
-        elif role == "student_register":
-            render_registro()
-        elif role == "mentor_ue":
-            render_mentor_dashboard()
-        elif role == "mentor_ie":
-            render_mentor_ie_dashboard()
+        views = {
+            "coordinator": render_coordinator_dashboard,
+            "student": render_student_dashboard,
+            "student_register": render_registro,
+            "mentor_ue": render_mentor_dashboard,
+            "mentor_ie": render_mentor_ie_dashboard,
+        }
+        view = views.get(role)
+        if view:
+            with view_scope(view.__name__):
+                view()
         else:
             st.error("Rol desconocido. Contacte al administrador.")
 
@@ -68,5 +76,9 @@ def main():
                     del st.session_state[key]
                 st.rerun()
 
+        # Admin-only query diagnostics
+        if role == "coordinator":
+            render_debug_panel()
+
 if __name__ == "__main__":
     main()
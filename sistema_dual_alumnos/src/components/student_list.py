@@ -0,0 +1,45 @@
+import math
+import streamlit as st
+
+PAGE_SIZE = 20
+
+def render_student_list_filters(key_prefix, periodos, pending_label="Solo pendientes"):
+    """
+    Renders the search / period / pending filters of a mentor's student list.
+    Changing any filter sends the list back to page 1.
+    """
+    page_key = f"{key_prefix}_page"
+
+    def reset_page():
+        st.session_state[page_key] = 1
+
+    period_options = {"Todos los periodos": None}
+    period_options.update({p["nombre"]: p["id"] for p in periodos})
+
+    c1, c2, c3 = st.columns([3, 2, 1])
+    with c1:
+        search = st.text_input("Buscar por nombre o matrícula", key=f"{key_prefix}_search", on_change=reset_page)
+    with c2:
+        period_name = st.selectbox("Periodo", list(period_options.keys()), key=f"{key_prefix}_period", on_change=reset_page)
+    with c3:
+        pending_only = st.checkbox(pending_label, key=f"{key_prefix}_pending", on_change=reset_page)
+
+    return {
+        "search": (search or "").strip(),
+        "periodo_id": period_options.get(period_name),
+        "pending_only": pending_only,
+        "page": st.session_state.get(page_key, 1),
+    }
+
+def render_pagination(key_prefix, total, page_size=PAGE_SIZE):
+    """Renders the page selector below the list."""
+    page_key = f"{key_prefix}_page"
+    pages = max(1, math.ceil(total / page_size))
+    if st.session_state.get(page_key, 1) > pages:
+        st.session_state[page_key] = pages
+
+    c1, c2 = st.columns([1, 3])
+    with c1:
+        st.number_input("Página", min_value=1, max_value=pages, step=1, key=page_key)
+    with c2:
+        st.caption(f"Página {st.session_state[page_key]} de {pages} · {total} estudiantes")
@@ -2,6 +2,7 @@ import os
 import streamlit as st
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from src.instrumentation import instrument_client
 
 # Load environment variables
 load_dotenv()
@@ -9,7 +10,8 @@ load_dotenv()
 @st.cache_resource
 def get_supabase_client() -> Client:
     """
-    Returns a cached Supabase client instance.
+    Returns a cached Supabase client instance, wrapped in the query
+    instrumentation proxy unless QUERY_INSTRUMENTATION=0.
     """
     # Try obtaining from st.secrets first (Cloud), then os.environ (Local)
     url = None
@@ -35,4 +37,7 @@ def get_supabase_client() -> Client:
         st.error("Supabase credentials not found. Please set SUPABASE_URL and SUPABASE_KEY in .env or Streamlit Secrets.")
         st.stop()
 
-    return create_client(url, key)
+    client = create_client(url, key)
+    if os.environ.get("QUERY_INSTRUMENTATION", "1") == "0":
+        return client
+    return instrument_client(client)
@@ -0,0 +1,271 @@
+import os
+import json
+import bisect
+import time
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+
+# Per-query instrumentation of the Supabase client. Every .execute() is timed and
+# aggregated by (view, table, operation); the last RECENT_QUERIES_LIMIT calls are
+# kept with their filters for the debug panel. If QUERY_METRICS_PATH is set, the
+# aggregates are also written there periodically in Prometheus text format.
+QUERY_METRICS_PATH = os.environ.get("QUERY_METRICS_PATH")
+QUERY_METRICS_INTERVAL = float(os.environ.get("QUERY_METRICS_INTERVAL", 15))
+# Response size is measured by re-serializing the rows, which costs as much as
+# the payload is large, so only the first and then every Nth call of each
+# (view, table, operation) is measured; totals are estimated from the sampled
+# average. 0 disables size measurement.
+QUERY_SIZE_SAMPLE_EVERY = int(os.environ.get("QUERY_SIZE_SAMPLE_EVERY", 100))
+RECENT_QUERIES_LIMIT = 500
+
+_OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+
+# Latency histogram buckets (seconds), used for p95/p99 and Prometheus histograms
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_current_view = contextvars.ContextVar("current_view", default="unknown")
+
+_lock = threading.Lock()
+_aggregates = {}  # (view, table, operation) -> counters
+_view_runs = {}   # view -> number of reruns
+_recent = deque(maxlen=RECENT_QUERIES_LIMIT)
+_writer_started = False
+
+
+@contextmanager
+def view_scope(view_name):
+    """Tags every query executed inside the block with the calling view."""
+    token = _current_view.set(view_name)
+    with _lock:
+        _view_runs[view_name] = _view_runs.get(view_name, 0) + 1
+    try:
+        yield
+    finally:
+        _current_view.reset(token)
+
+
+def _short(args, limit=80):
+    text = ", ".join(repr(a) for a in args)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+def _record(table, operation, filters, elapsed, data, error):
+    view = _current_view.get()
+    key = (view, table, operation or "unknown")
+    rows = len(data) if isinstance(data, list) else (1 if data else 0)
+    with _lock:
+        agg = _aggregates.get(key)
+        if agg is None:
+            agg = _aggregates[key] = {"calls": 0, "errors": 0, "seconds": 0.0, "max_seconds": 0.0, "rows": 0,
+                                      "sampled_calls": 0, "sampled_bytes": 0,
+                                      "buckets": [0] * (len(LATENCY_BUCKETS) + 1)}
+        measure = bool(QUERY_SIZE_SAMPLE_EVERY) and agg["calls"] % QUERY_SIZE_SAMPLE_EVERY == 0
+        agg["calls"] += 1
+        agg["buckets"][bisect.bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+        agg["seconds"] += elapsed
+        agg["max_seconds"] = max(agg["max_seconds"], elapsed)
+        agg["rows"] += rows
+        if error:
+            agg["errors"] += 1
+
+    # Serialized outside the lock; None in the recent list means "not measured"
+    size = (len(json.dumps(data, default=str)) if data else 0) if measure else None
+    with _lock:
+        if measure:
+            agg["sampled_calls"] += 1
+            agg["sampled_bytes"] += size
+        _recent.append({
+            "ts": time.time(), "view": view, "table": table, "operation": key[2],
+            "filters": filters, "ms": round(elapsed * 1000, 2), "rows": rows, "bytes": size, "error": error
+        })
+
+
+def _estimated_bytes(agg):
+    """Total response bytes extrapolated from the sampled calls."""
+    if not agg["sampled_calls"]:
+        return 0
+    return round(agg["sampled_bytes"] / agg["sampled_calls"] * agg["calls"])
+
+
+class _QueryProxy:
+    """Wraps a postgrest request builder, remembering operation and filters."""
+
+    __slots__ = ("_builder", "_table", "_operation", "_filters")
+
+    def __init__(self, builder, table, operation=None, filters=()):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+        self._filters = filters
+
+    def _wrap(self, builder, name, args):
+        if name in _OPERATIONS:
+            return _QueryProxy(builder, self._table, name, self._filters)
+        return _QueryProxy(builder, self._table, self._operation, self._filters + (f"{name}({_short(args)})",))
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if callable(attr):
+            def call(*args, **kwargs):
+                result = attr(*args, **kwargs)
+                if hasattr(result, "execute"):
+                    return self._wrap(result, name, args)
+                return result
+            return call
+        if hasattr(attr, "execute"):
+            # Builder-valued properties such as .not_
+            return self._wrap(attr, name, ())
+        return attr
+
+    def execute(self):
+        response = None
+        error = None
+        start = time.perf_counter()
+        try:
+            response = self._builder.execute()
+            return response
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            _record(self._table, self._operation, list(self._filters), elapsed, getattr(response, "data", None), error)
+
+
+class InstrumentedClient:
+    """Proxy around supabase.Client that instruments table() and rpc() calls."""
+
+    def __init__(self, client):
+        self._client = client
+
+    def table(self, table_name):
+        return _QueryProxy(self._client.table(table_name), table_name)
+
+    from_ = table
+
+    def rpc(self, fn, params=None, *args, **kwargs):
+        return _QueryProxy(self._client.rpc(fn, params or {}, *args, **kwargs), f"rpc:{fn}", "rpc")
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+def instrument_client(client):
+    """Wraps a Supabase client and starts the metrics file writer if configured."""
+    _start_metrics_writer()
+    return InstrumentedClient(client)
+
+
+def _quantile(buckets, q):
+    """Upper bound (seconds) of the bucket holding the q-quantile; inf if beyond the last one."""
+    total = sum(buckets)
+    if not total:
+        return None
+    target = q * total
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), buckets):
+        seen += count
+        if seen >= target:
+            return bound
+    return float("inf")
+
+
+def get_query_stats():
+    """Returns aggregated counters as a list of dicts (one per view/table/operation)."""
+    with _lock:
+        items = [(key, dict(agg, buckets=list(agg["buckets"]))) for key, agg in _aggregates.items()]
+        runs = dict(_view_runs)
+    stats = []
+    for (view, table, operation), agg in sorted(items):
+        stats.append({
+            "view": view, "table": table, "operation": operation,
+            "calls": agg["calls"], "errors": agg["errors"],
+            "calls_per_rerun": round(agg["calls"] / runs[view], 2) if runs.get(view) else None,
+            "avg_ms": round(agg["seconds"] / agg["calls"] * 1000, 2),
+            "max_ms": round(agg["max_seconds"] * 1000, 2),
+            "p95_ms_le": _quantile(agg["buckets"], 0.95) * 1000,
+            "p99_ms_le": _quantile(agg["buckets"], 0.99) * 1000,
+            "rows": agg["rows"], "bytes": _estimated_bytes(agg),
+        })
+    return stats
+
+
+def get_recent_queries():
+    """Returns the most recent executed queries, newest first."""
+    with _lock:
+        return list(reversed(_recent))
+
+
+def reset_query_stats():
+    with _lock:
+        _aggregates.clear()
+        _view_runs.clear()
+        _recent.clear()
+
+
+def render_prometheus():
+    """Renders the aggregates in Prometheus text exposition format."""
+    with _lock:
+        items = sorted((key, dict(agg, buckets=list(agg["buckets"]))) for key, agg in _aggregates.items())
+        runs = sorted(_view_runs.items())
+
+    metrics = (
+        ("dual_db_queries_total", "counter", "PostgREST calls executed", lambda a: a["calls"]),
+        ("dual_db_query_errors_total", "counter", "PostgREST calls that raised", lambda a: a["errors"]),
+        ("dual_db_query_seconds_total", "counter", "Total time spent in PostgREST calls", lambda a: round(a["seconds"], 6)),
+        ("dual_db_query_seconds_max", "gauge", "Slowest PostgREST call", lambda a: round(a["max_seconds"], 6)),
+        ("dual_db_query_rows_total", "counter", "Rows returned", lambda a: a["rows"]),
+        ("dual_db_query_bytes_total", "counter", "Estimated JSON bytes returned (sampled)", _estimated_bytes),
+    )
+    lines = []
+    for name, kind, help_text, getter in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for (view, table, operation), agg in items:
+            lines.append(f'{name}{{view="{view}",table="{table}",operation="{operation}"}} {getter(agg)}')
+    lines.append("# HELP dual_db_query_duration_seconds PostgREST call latency")
+    lines.append("# TYPE dual_db_query_duration_seconds histogram")
+    for (view, table, operation), agg in items:
+        labels = f'view="{view}",table="{table}",operation="{operation}"'
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), agg["buckets"]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else bound
+            lines.append(f'dual_db_query_duration_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+        lines.append(f'dual_db_query_duration_seconds_sum{{{labels}}} {round(agg["seconds"], 6)}')
+        lines.append(f'dual_db_query_duration_seconds_count{{{labels}}} {agg["calls"]}')
+    lines.append("# HELP dual_view_runs_total Script reruns per view")
+    lines.append("# TYPE dual_view_runs_total counter")
+    for view, count in runs:
+        lines.append(f'dual_view_runs_total{{view="{view}"}} {count}')
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path):
+    """Atomically replaces `path` with the current Prometheus text."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+
+def _start_metrics_writer():
+    global _writer_started
+    if not QUERY_METRICS_PATH:
+        return
+    with _lock:
+        if _writer_started:
+            return
+        _writer_started = True
+
+    def loop():
+        while True:
+            time.sleep(QUERY_METRICS_INTERVAL)
+            try:
+                write_metrics_file(QUERY_METRICS_PATH)
+            except OSError as e:
+                print(f"Error writing query metrics: {e}")
+
+    threading.Thread(target=loop, name="query-metrics-writer", daemon=True).start()
@@ -0,0 +1,221 @@
+import os
+import re
+import threading
+import time
+from src.db_connection import get_supabase_client
+from src.utils.singleflight import SingleFlight
+
+# Catalogs change rarely (a few times per period) but are read on almost every
+# rerun of every session, so they are served from a process-wide TTL cache.
+CATALOG_CACHE_TTL = int(os.environ.get("CATALOG_CACHE_TTL", 300))
+_PAGE_SIZE = 1000  # PostgREST's db-max-rows: longer results are read page by page
+
+CATALOG_TABLES = ("carreras", "asignaturas", "unidades_economicas", "mentores_ue", "periodos", "rel_maestros_asignaturas")
+
+# Derived entries built from several tables: writing to the key table also
+# invalidates the dependents.
+_DEPENDENTS = {
+    "asignaturas": ("rel_maestros_asignaturas",),
+    "maestros": ("rel_maestros_asignaturas",),
+}
+
+_lock = threading.Lock()
+_entries = {}  # (table, params) -> (expires_at, data)
+_generations = {table: 0 for table in CATALOG_TABLES}
+_stats = {table: {"hits": 0, "misses": 0, "invalidations": 0} for table in CATALOG_TABLES}
+# Concurrent misses for the same key share one request
+_flights = SingleFlight()
+
+
+def _cached(table, params, loader):
+    """
+    Returns the cached value for (table, params) or loads it with `loader`.
+    Concurrent misses for the same key are coalesced into a single load.
+    A load that races with an invalidation of the same table is returned to
+    its callers but not stored, so stale rows never outlive a write.
+    """
+    key = (table, params)
+    with _lock:
+        entry = _entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            _stats[table]["hits"] += 1
+            return entry[1]
+        _stats[table]["misses"] += 1
+
+    def load_and_store():
+        with _lock:
+            generation = _generations[table]
+        data = loader()
+        with _lock:
+            if _generations[table] == generation:
+                _entries[key] = (time.monotonic() + CATALOG_CACHE_TTL, data)
+        return data
+
+    return _flights.do(key, load_and_store)
+
+
+def _fetch_all(build_query, order_by):
+    """Runs the query returned by build_query() page by page, ordered by a unique key."""
+    rows = []
+    start = 0
+    while True:
+        query = build_query()
+        for column in order_by:
+            query = query.order(column)
+        page = query.range(start, start + _PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < _PAGE_SIZE:
+            return rows
+        start += _PAGE_SIZE
+
+
+def invalidate_catalog(*tables):
+    """
+    Drops every cached entry of the given catalog tables (all if none given).
+    Must be called by any code that writes to a catalog table.
+    """
+    tables = set(tables or CATALOG_TABLES)
+    for table in list(tables):
+        tables.update(_DEPENDENTS.get(table, ()))
+    with _lock:
+        for table in tables:
+            if table not in _generations:
+                continue
+            _generations[table] += 1
+            _stats[table]["invalidations"] += 1
+        for key in [k for k in _entries if k[0] in tables]:
+            del _entries[key]
+
+
+def get_cache_stats():
+    """Returns hit/miss/invalidation counters per catalog plus totals."""
+    with _lock:
+        per_table = {table: dict(counters) for table, counters in _stats.items()}
+        cached_entries = len(_entries)
+    hits = sum(c["hits"] for c in per_table.values())
+    misses = sum(c["misses"] for c in per_table.values())
+    flights = _flights.stats()
+    return {
+        "hits": hits,
+        "misses": misses,
+        "loads": flights["executed"],
+        "coalesced": flights["coalesced"],
+        "hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        "entries": cached_entries,
+        "tables": per_table,
+    }
+
+
+# --- Catalog readers ---
+# Returned lists are shared between sessions: treat them as read-only.
+
+def get_carreras():
+    """Returns all careers (id, nombre) sorted by name."""
+    def load():
+        res = get_supabase_client().table("carreras").select("id, nombre").execute()
+        return sorted(res.data or [], key=lambda c: c["nombre"])
+    return _cached("carreras", (), load)
+
+
+def get_asignaturas(carrera_id=None, semestre=None):
+    """
+    Returns the subjects of a career, optionally filtered by semester.
+    The whole career is cached once and the semester filter runs in memory.
+    """
+    def load():
+        query = get_supabase_client().table("asignaturas").select("id, nombre, clave_asignatura, semestre")
+        if carrera_id:
+            query = query.eq("carrera_id", carrera_id)
+        res = query.execute()
+        return res.data or []
+
+    subjects = _cached("asignaturas", (carrera_id,), load)
+    if semestre is None or semestre == "Todos":
+        return subjects
+    return [s for s in subjects if str(s.get("semestre")) == str(semestre)]
+
+
+def get_unidades_economicas():
+    """Returns all economic units (id, nombre_comercial)."""
+    def load():
+        res = get_supabase_client().table("unidades_economicas").select("id, nombre_comercial").execute()
+        return res.data or []
+    return _cached("unidades_economicas", (), load)
+
+
+def get_ue_name(ue_id):
+    """Returns the commercial name of an economic unit, or None."""
+    for ue in get_unidades_economicas():
+        if ue["id"] == ue_id:
+            return ue["nombre_comercial"]
+    return None
+
+
+def get_mentores_ue(ue_id):
+    """Returns the industrial mentors (id, nombre_completo) of an economic unit."""
+    def load():
+        res = get_supabase_client().table("mentores_ue").select("id, nombre_completo").eq("ue_id", ue_id).execute()
+        return res.data or []
+    return _cached("mentores_ue", (ue_id,), load)
+
+
+def get_mentor_ue_name(ue_id, mentor_id):
+    """Returns the name of an industrial mentor of the given unit, or None."""
+    for mentor in get_mentores_ue(ue_id):
+        if mentor["id"] == mentor_id:
+            return mentor["nombre_completo"]
+    return None
+
+
+def get_active_period():
+    """Returns the active period row (id, nombre) or None."""
+    def load():
+        res = get_supabase_client().table("periodos").select("id, nombre").eq("activo", True).execute()
+        return res.data[0] if res.data else None
+    return _cached("periodos", ("activo",), load)
+
+
+def get_periodos():
+    """Returns all periods (id, nombre, activo), newest first."""
+    def load():
+        res = get_supabase_client().table("periodos").select("id, nombre, activo").order("id", desc=True).execute()
+        return res.data or []
+    return _cached("periodos", (), load)
+
+
+def get_teacher_index(carrera_id):
+    """
+    Returns {asignatura_id: ((clave_maestro, display_name, maestro_id), ...)}
+    for every subject of a career, built once per career (teacher relations
+    do not depend on the period). Display names already have parenthesised
+    notes removed.
+    """
+    def load():
+        subject_ids = [s["id"] for s in get_asignaturas(carrera_id)]
+        if not subject_ids:
+            return {}
+        rels = _fetch_all(
+            lambda: get_supabase_client().table("rel_maestros_asignaturas").select(
+                "asignatura_id, maestro_id, maestros(id, clave_maestro, nombre_completo)"
+            ).in_("asignatura_id", subject_ids),
+            ("asignatura_id", "maestro_id"),
+        )
+
+        index = {}
+        for rel in rels:
+            teacher = rel.get("maestros")
+            if not teacher:
+                continue
+            clean_name = re.sub(r'\s*\([^)]*\)', '', teacher["nombre_completo"] or "").strip()
+            entry = (teacher["clave_maestro"], f"{teacher['clave_maestro']} - {clean_name}", teacher["id"])
+            index.setdefault(rel["asignatura_id"], []).append(entry)
+        return {subject_id: tuple(entries) for subject_id, entries in index.items()}
+
+    return _cached("rel_maestros_asignaturas", (carrera_id,), load)
+
+
+def get_subject_teachers(carrera_id, asignatura_id):
+    """Returns the (clave_maestro, display_name, maestro_id) tuples of a subject."""
+    if not asignatura_id:
+        return ()
+    return get_teacher_index(carrera_id).get(asignatura_id, ())
@@ -0,0 +1,129 @@
+import os
+import math
+import time
+import threading
+
+# Process-wide admission control for DB-heavy actions (login, registration).
+# Each client gets a token bucket per action; on top of that a global semaphore
+# caps how many of these actions hit the database at the same time. Requests
+# over the cap wait up to ADMISSION_QUEUE_TIMEOUT seconds for a slot, then are
+# told to retry instead of piling onto Supabase.
+ADMISSION_RATE = float(os.environ.get("ADMISSION_RATE", 0.5))       # tokens per second per client
+ADMISSION_BURST = float(os.environ.get("ADMISSION_BURST", 3))       # bucket size
+ADMISSION_MAX_CONCURRENT = int(os.environ.get("ADMISSION_MAX_CONCURRENT", 8))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", 3))
+_BUCKET_IDLE_SECONDS = 600
+
+_lock = threading.Lock()
+_buckets = {}  # (action, client_id) -> [tokens, last_refill]
+_slots = threading.BoundedSemaphore(ADMISSION_MAX_CONCURRENT)
+_in_flight = 0
+_stats = {}    # action -> counters
+_last_sweep = time.monotonic()
+
+
+class AdmissionTicket:
+    """Result of an admission request. Call release() once the action ends."""
+
+    __slots__ = ("action", "admitted", "reason", "retry_after", "_released")
+
+    def __init__(self, action, admitted, reason=None, retry_after=0):
+        self.action = action
+        self.admitted = admitted
+        self.reason = reason
+        self.retry_after = retry_after
+        self._released = not admitted
+
+    @property
+    def message(self):
+        seconds = max(1, math.ceil(self.retry_after))
+        if self.reason == "rate_limited":
+            return f"Has realizado demasiados intentos. Intenta de nuevo en {seconds} segundos."
+        return f"El sistema está atendiendo a muchos alumnos en este momento. Intenta de nuevo en {seconds} segundos."
+
+    def release(self):
+        global _in_flight
+        if self._released:
+            return
+        self._released = True
+        with _lock:
+            _in_flight -= 1
+        _slots.release()
+
+
+def _counters(action):
+    return _stats.setdefault(action, {"admitted": 0, "queued": 0, "rejected_rate_limit": 0, "rejected_busy": 0})
+
+
+def _current_client_id():
+    """Identifies the browser session running the script (falls back to a shared id)."""
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+        ctx = get_script_run_ctx()
+        if ctx is not None:
+            return ctx.session_id
+    except Exception:
+        pass
+    return "anonymous"
+
+
+def _take_token(action, client_id, now):
+    """Returns 0 if a token was taken, otherwise seconds until one is available."""
+    global _last_sweep
+    if now - _last_sweep > _BUCKET_IDLE_SECONDS:
+        for key in [k for k, b in _buckets.items() if now - b[1] > _BUCKET_IDLE_SECONDS]:
+            del _buckets[key]
+        _last_sweep = now
+
+    bucket = _buckets.get((action, client_id))
+    if bucket is None:
+        bucket = _buckets[(action, client_id)] = [ADMISSION_BURST, now]
+    tokens = min(ADMISSION_BURST, bucket[0] + (now - bucket[1]) * ADMISSION_RATE)
+    bucket[1] = now
+    if tokens >= 1:
+        bucket[0] = tokens - 1
+        return 0
+    bucket[0] = tokens
+    return (1 - tokens) / ADMISSION_RATE if ADMISSION_RATE > 0 else float("inf")
+
+
+def acquire_admission(action, client_id=None):
+    """
+    Requests permission to run a DB-heavy action.
+
+    Returns an AdmissionTicket; if `admitted` is False show `ticket.message`
+    and skip the action. Admitted tickets must be released (use try/finally).
+    """
+    global _in_flight
+    client_id = client_id or _current_client_id()
+
+    with _lock:
+        counters = _counters(action)
+        wait_for_token = _take_token(action, client_id, time.monotonic())
+        if wait_for_token:
+            counters["rejected_rate_limit"] += 1
+            return AdmissionTicket(action, False, "rate_limited", wait_for_token)
+
+    if not _slots.acquire(blocking=False):
+        with _lock:
+            counters["queued"] += 1
+        if not _slots.acquire(timeout=ADMISSION_QUEUE_TIMEOUT):
+            with _lock:
+                counters["rejected_busy"] += 1
+            return AdmissionTicket(action, False, "busy", ADMISSION_QUEUE_TIMEOUT)
+
+    with _lock:
+        counters["admitted"] += 1
+        _in_flight += 1
+    return AdmissionTicket(action, True)
+
+
+def get_admission_stats():
+    """Returns per-action counters plus the current number of in-flight actions."""
+    with _lock:
+        return {
+            "in_flight": _in_flight,
+            "max_concurrent": ADMISSION_MAX_CONCURRENT,
+            "tracked_clients": len(_buckets),
+            "actions": {action: dict(c) for action, c in _stats.items()},
+        }
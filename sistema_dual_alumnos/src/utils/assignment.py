@@ -1,10 +1,147 @@
+import os
+import heapq
+from collections import Counter
 from src.db_connection import get_supabase_client
 from src.utils.db_actions import get_active_period_id
 
-def assign_mentors_round_robin():
+# PostgREST returns at most 1000 rows per request (db-max-rows), so every
+# period-wide read below is fetched page by page.
+ASSIGNMENT_PAGE_SIZE = int(os.environ.get("ASSIGNMENT_PAGE_SIZE", 1000))
+
+def _fetch_all(build_query, order_by=("id",), page_size=ASSIGNMENT_PAGE_SIZE):
+    """Runs the query returned by build_query() one page at a time and returns every row."""
+    rows = []
+    start = 0
+    while True:
+        query = build_query()
+        for column in order_by:
+            query = query.order(column)
+        page = query.range(start, start + page_size - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < page_size:
+            return rows
+        start += page_size
+
+def plan_round_robin(mentors, projects):
+    """
+    Computes a Round Robin distribution in memory.
+    Returns a list of {"id", "alumno_id", "mentor_ie_id"} assignments.
+    """
+    total_mentors = len(mentors)
+    return [
+        {"id": project["id"], "alumno_id": project.get("alumno_id"), "mentor_ie_id": mentors[idx % total_mentors]}
+        for idx, project in enumerate(projects)
+    ]
+
+# Penalties are expressed in "students": a mentor who teaches the student's
+# subjects is preferred over a less loaded one unless the load gap exceeds them.
+CAREER_AFFINITY_PENALTY = 1
+NO_AFFINITY_PENALTY = 3
+
+def plan_balanced_assignment(mentors, projects, current_load=None, capacities=None, default_capacity=None,
+                             mentors_by_subject=None, mentors_by_career=None):
+    """
+    Computes a load- and affinity-aware distribution in memory.
+
+    projects: list of {"id", "alumno_id", "carrera_id", "asignatura_ids"}.
+    current_load: {mentor_id: students already supervised this period}.
+    capacities / default_capacity: max students per mentor (None = unlimited).
+    mentors_by_subject / mentors_by_career: {asignatura_id|carrera_id: set(mentor_id)}.
+
+    Each student goes to the mentor with the lowest load + affinity penalty
+    (subject match 0, career match 1, none 3) that still has capacity. The most
+    constrained students are placed first; the overall least-loaded mentor is
+    kept in a heap, so the cost is O(S * (k + log M)) for k affine mentors.
+    Returns (assignments, unassigned_projects).
+    """
+    current_load = current_load or {}
+    capacities = capacities or {}
+    mentors_by_subject = mentors_by_subject or {}
+    mentors_by_career = mentors_by_career or {}
+
+    loads = {m: current_load.get(m, 0) for m in mentors}
+    caps = {m: capacities.get(m, default_capacity) for m in mentors}
+    caps = {m: float("inf") if c is None else c for m, c in caps.items()}
+
+    heap = [(loads[m], m) for m in mentors if loads[m] < caps[m]]
+    heapq.heapify(heap)
+
+    def least_loaded():
+        while heap:
+            load, m = heap[0]
+            if load != loads[m] or load >= caps[m]:
+                heapq.heappop(heap) # stale entry
+                continue
+            return m
+        return None
+
+    # Affinity penalties per project
+    candidates = []
+    for project in projects:
+        penalties = {}
+        for m in mentors_by_career.get(project.get("carrera_id"), ()):
+            if m in loads:
+                penalties[m] = CAREER_AFFINITY_PENALTY
+        for subject_id in project.get("asignatura_ids", ()):
+            for m in mentors_by_subject.get(subject_id, ()):
+                if m in loads:
+                    penalties[m] = 0
+        candidates.append((project, penalties))
+
+    # Most constrained first; students without any affine mentor go last
+    candidates.sort(key=lambda item: (not item[1], len(item[1])))
+
+    assignments = []
+    unassigned = []
+    for project, penalties in candidates:
+        best, best_cost = None, None
+        for m, penalty in penalties.items():
+            if loads[m] >= caps[m]:
+                continue
+            cost = loads[m] + penalty
+            if best_cost is None or cost < best_cost:
+                best, best_cost = m, cost
+
+        fallback = least_loaded()
+        if fallback is not None:
+            cost = loads[fallback] + penalties.get(fallback, NO_AFFINITY_PENALTY)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = fallback, cost
+
+        if best is None:
+            unassigned.append(project)
+            continue
+
+        loads[best] += 1
+        if loads[best] < caps[best]:
+            heapq.heappush(heap, (loads[best], best))
+        assignments.append({"id": project["id"], "alumno_id": project.get("alumno_id"), "mentor_ie_id": best})
+
+    return assignments, unassigned
+
+def summarize_assignments(assignments):
+    """Returns the number of students proposed per mentor."""
+    return dict(Counter(a["mentor_ie_id"] for a in assignments))
+
+def apply_assignments(assignments):
+    """
+    Writes all assignments with a single call to the `asignar_mentores_ie`
+    Postgres function. Returns the number of projects updated.
+    """
+    if not assignments:
+        return 0
+    supabase = get_supabase_client()
+    payload = [{"id": a["id"], "mentor_ie_id": a["mentor_ie_id"]} for a in assignments]
+    res = supabase.rpc("asignar_mentores_ie", {"p_asignaciones": payload}).execute()
+    return res.data or 0
+
+def assign_mentors_round_robin(dry_run=False):
     """
     Assigns Academic Mentors (es_mentor_ie=True) to students in the active period
     who do not yet have a mentor assigned. Uses a Round Robin distribution.
+
+    With dry_run=True nothing is written and the proposal is returned instead:
+    {"assignments": [...], "counts": {mentor_id: n}}.
     """
     supabase = get_supabase_client()
     period_id = get_active_period_id()
@@ -13,32 +150,123 @@ def assign_mentors_round_robin():
         return False, "No active period found."
 
     # 1. Fetch available Mentors
-    res_mentors = supabase.table("maestros").select("id").eq("es_mentor_ie", True).execute()
-    mentors = [m["id"] for m in res_mentors.data]
+    mentors = [m["id"] for m in _fetch_all(lambda: supabase.table("maestros").select("id").eq("es_mentor_ie", True))]
     
     if not mentors:
         return False, "No Academic Mentors available for assignment."
 
     # 2. Fetch Projects without Mentor IE in active period
     # We query projects_dual where mentor_ie_id is null and period_id matches
-    res_projects = supabase.table("proyectos_dual").select("id, alumno_id").eq("periodo_id", period_id).is_("mentor_ie_id", "null").execute()
-    projects = res_projects.data
+    projects = _fetch_all(
+        lambda: supabase.table("proyectos_dual").select("id, alumno_id").eq("periodo_id", period_id).is_("mentor_ie_id", "null")
+    )
     
     if not projects:
+        if dry_run:
+            return True, {"assignments": [], "counts": {}}
         return True, "No pending assignments found."
     
-    assigned_count = 0
-    mentor_idx = 0
-    total_mentors = len(mentors)
-    
-    # 3. Round Robin Distribution
-    for project in projects:
-        mentor_id = mentors[mentor_idx]
-        
-        # Update project with assigned mentor
-        supabase.table("proyectos_dual").update({"mentor_ie_id": mentor_id}).eq("id", project["id"]).execute()
-        
-        assigned_count += 1
-        mentor_idx = (mentor_idx + 1) % total_mentors
+    # 3. Round Robin Distribution (in memory)
+    assignments = plan_round_robin(mentors, projects)
+
+    if dry_run:
+        return True, {"assignments": assignments, "counts": summarize_assignments(assignments)}
+
+    # 4. Single bulk write
+    try:
+        assigned_count = apply_assignments(assignments)
+    except Exception as e:
+        return False, f"Error applying assignments: {e}"
 
     return True, f"Successfully assigned mentors to {assigned_count} students."
+
+def _load_balanced_inputs(supabase, period_id):
+    """Fetches mentors, current loads, pending projects and affinities (5 paged reads)."""
+    mentors = [m["id"] for m in _fetch_all(lambda: supabase.table("maestros").select("id").eq("es_mentor_ie", True))]
+
+    assigned = _fetch_all(
+        lambda: supabase.table("proyectos_dual").select("id, mentor_ie_id").eq("periodo_id", period_id).not_.is_("mentor_ie_id", "null")
+    )
+    current_load = Counter(p["mentor_ie_id"] for p in assigned)
+
+    pending = _fetch_all(
+        lambda: supabase.table("proyectos_dual").select("id, alumno_id, alumnos(carrera_id)").eq("periodo_id", period_id).is_("mentor_ie_id", "null")
+    )
+
+    inscripciones = _fetch_all(
+        lambda: supabase.table("inscripciones_asignaturas").select("id, alumno_id, asignatura_id").eq("periodo_id", period_id)
+    )
+    subjects_by_student = {}
+    for row in inscripciones:
+        subjects_by_student.setdefault(row["alumno_id"], set()).add(row["asignatura_id"])
+
+    projects = []
+    for p in pending:
+        projects.append({
+            "id": p["id"],
+            "alumno_id": p["alumno_id"],
+            "carrera_id": (p.get("alumnos") or {}).get("carrera_id"),
+            "asignatura_ids": subjects_by_student.get(p["alumno_id"], set())
+        })
+
+    mentors_by_subject = {}
+    mentors_by_career = {}
+    if mentors:
+        rels = _fetch_all(
+            lambda: supabase.table("rel_maestros_asignaturas").select("maestro_id, asignatura_id, asignaturas(carrera_id)").in_("maestro_id", mentors),
+            order_by=("maestro_id", "asignatura_id"),
+        )
+        for rel in rels:
+            mentors_by_subject.setdefault(rel["asignatura_id"], set()).add(rel["maestro_id"])
+            carrera_id = (rel.get("asignaturas") or {}).get("carrera_id")
+            if carrera_id:
+                mentors_by_career.setdefault(carrera_id, set()).add(rel["maestro_id"])
+
+    return mentors, current_load, projects, mentors_by_subject, mentors_by_career
+
+def assign_mentors_balanced(dry_run=False, default_capacity=None, capacities=None):
+    """
+    Assigns Academic Mentors to students of the active period without a mentor,
+    balancing current load and preferring mentors who teach the student's
+    subjects or career. Capacity defaults to MENTOR_IE_CAPACITY (unlimited if unset).
+
+    With dry_run=True nothing is written and the proposal is returned instead:
+    {"assignments": [...], "counts": {mentor_id: n}, "loads": {...}, "unassigned": [...]}.
+    """
+    supabase = get_supabase_client()
+    period_id = get_active_period_id()
+
+    if not period_id:
+        return False, "No active period found."
+
+    if default_capacity is None and os.environ.get("MENTOR_IE_CAPACITY"):
+        default_capacity = int(os.environ["MENTOR_IE_CAPACITY"])
+
+    mentors, current_load, projects, by_subject, by_career = _load_balanced_inputs(supabase, period_id)
+
+    if not mentors:
+        return False, "No Academic Mentors available for assignment."
+
+    assignments, unassigned = plan_balanced_assignment(
+        mentors, projects, current_load, capacities, default_capacity, by_subject, by_career
+    )
+
+    if dry_run:
+        counts = summarize_assignments(assignments)
+        loads = {m: current_load.get(m, 0) + counts.get(m, 0) for m in mentors}
+        return True, {"assignments": assignments, "counts": counts, "loads": loads, "unassigned": unassigned}
+
+    if not assignments:
+        if unassigned:
+            return False, f"All mentors are at capacity; {len(unassigned)} students remain unassigned."
+        return True, "No pending assignments found."
+
+    try:
+        assigned_count = apply_assignments(assignments)
+    except Exception as e:
+        return False, f"Error applying assignments: {e}"
+
+    msg = f"Successfully assigned mentors to {assigned_count} students."
+    if unassigned:
+        msg += f" {len(unassigned)} students remain unassigned (mentors at capacity)."
+    return True, msg
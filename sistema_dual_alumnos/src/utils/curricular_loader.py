@@ -0,0 +1,233 @@
+import os
+import pandas as pd
+from src.db_connection import get_supabase_client
+from src.repository import invalidate_catalog
+from src.utils.helpers import normalize_text
+
+# Loads a career's curricular map (subjects -> competencias -> actividades, plus
+# the teachers of each subject) from one flat spreadsheet. Every level is
+# diffed in memory against what the career already has, and only new or
+# changed rows are upserted, in batches and in FK order. Re-running the same
+# file changes nothing. Rows missing from the file are never deleted, since
+# saved evaluations reference them.
+CURRICULAR_BATCH_SIZE = int(os.environ.get("CURRICULAR_BATCH_SIZE", 500))
+_IN_FILTER_SIZE = 200  # ids per in_() filter, keeps request URLs short
+_PAGE_SIZE = 1000  # PostgREST's db-max-rows: longer results are read page by page
+
+# One row per activity; subject/competencia columns repeat on every row.
+# clave_maestro may list several teachers separated by commas.
+CURRICULAR_COLUMNS = (
+    "clave_asignatura", "asignatura", "semestre", "numero_competencia", "competencia",
+    "actividad", "evidencia", "horas", "clave_maestro",
+)
+REQUIRED_CURRICULAR_COLUMNS = ("clave_asignatura", "asignatura", "semestre", "numero_competencia", "competencia")
+_COLUMN_ALIASES = {
+    "clave": "clave_asignatura", "nombre_asignatura": "asignatura", "no_competencia": "numero_competencia",
+    "descripcion_competencia": "competencia", "descripcion_actividad": "actividad",
+    "horas_dedicacion": "horas", "maestro": "clave_maestro", "maestros": "clave_maestro",
+}
+
+# table -> (natural key columns, also the on_conflict target unless
+# _CONFLICT_TARGETS says otherwise; compared value columns)
+_TABLES = {
+    "asignaturas": (("carrera_id", "clave_asignatura"), ("nombre", "semestre")),
+    "asignatura_competencias": (("asignatura_id", "numero_competencia"), ("descripcion_competencia",)),
+    "actividades_aprendizaje": (("competencia_id", "descripcion_actividad"), ("evidencia", "horas_dedicacion")),
+    "rel_maestros_asignaturas": (("maestro_id", "asignatura_id"), ()),
+}
+# Unique indexes that differ from the natural key: descriptions can exceed a
+# btree entry, so activities are indexed on md5(descripcion_actividad), kept in
+# the generated column descripcion_hash.
+_CONFLICT_TARGETS = {"actividades_aprendizaje": "competencia_id,descripcion_hash"}
+
+
+def _number(value):
+    """'4', '4.0' and 4 all become 4; blanks become None."""
+    if value in ("", None):
+        return None
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def _comparable(value):
+    return "" if value is None else str(value)
+
+
+def read_curricular_map(file, filename):
+    """Reads the spreadsheet (CSV or XLSX) as text with normalized headers."""
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        df = pd.read_excel(file, dtype=str, keep_default_na=False)
+    else:
+        df = pd.read_csv(file, dtype=str, keep_default_na=False, encoding="utf-8-sig")
+    columns = [normalize_text(c).replace(" ", "_") for c in df.columns]
+    df.columns = [_COLUMN_ALIASES.get(c, c) for c in columns]
+    return df
+
+
+def _fetch_pages(build_query, order_by):
+    """Runs the query returned by build_query() page by page, ordered by a unique key."""
+    rows = []
+    start = 0
+    while True:
+        query = build_query()
+        for col in order_by:
+            query = query.order(col)
+        page = query.range(start, start + _PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < _PAGE_SIZE:
+            return rows
+        start += _PAGE_SIZE
+
+
+def _fetch_in(table, columns, column, ids, order_by=("id",)):
+    """Selects rows whose `column` is in `ids`, in URL-sized batches, each read page by page."""
+    supabase = get_supabase_client()
+    ids = list(ids)
+    rows = []
+    for start in range(0, len(ids), _IN_FILTER_SIZE):
+        batch = ids[start:start + _IN_FILTER_SIZE]
+        rows.extend(_fetch_pages(lambda: supabase.table(table).select(columns).in_(column, batch), order_by))
+    return rows
+
+
+def _sync(table, desired, existing, counts):
+    """
+    Upserts the desired rows that are new or differ from `existing`.
+
+    Args:
+        desired: natural key tuple -> row dict (key and value columns).
+        existing: natural key tuple -> row as stored (must include "id").
+        counts: per-table inserted/updated/unchanged counters, updated in place.
+
+    Returns:
+        natural key tuple -> id for every desired row.
+    """
+    key_cols, value_cols = _TABLES[table]
+    pending = []
+    for key, row in desired.items():
+        current = existing.get(key)
+        if current is None:
+            counts["inserted"] += 1
+        elif any(_comparable(row[c]) != _comparable(current.get(c)) for c in value_cols):
+            counts["updated"] += 1
+        else:
+            counts["unchanged"] += 1
+            continue
+        pending.append(row)
+
+    ids = {key: row.get("id") for key, row in existing.items()}
+    on_conflict = _CONFLICT_TARGETS.get(table, ",".join(key_cols))
+    supabase = get_supabase_client()
+    for start in range(0, len(pending), CURRICULAR_BATCH_SIZE):
+        res = supabase.table(table).upsert(pending[start:start + CURRICULAR_BATCH_SIZE], on_conflict=on_conflict).execute()
+        for row in res.data or []:
+            ids[tuple(_comparable(row[c]) for c in key_cols)] = row.get("id")
+    return {key: ids.get(key) for key in desired}
+
+
+def load_curricular_map(file, filename, carrera_id):
+    """
+    Loads a career's curricular map.
+
+    Returns:
+        (success, result): result is {"tables": {table: {"inserted", "updated",
+        "unchanged"}}, "warnings": [...]} or an error message.
+    """
+    try:
+        df = read_curricular_map(file, filename)
+    except Exception as e:
+        return False, f"No se pudo leer el archivo: {e}"
+
+    missing = [c for c in REQUIRED_CURRICULAR_COLUMNS if c not in df.columns]
+    if missing:
+        return False, f"Faltan columnas en el archivo: {', '.join(missing)}"
+    if df.empty:
+        return False, "El archivo no contiene filas."
+
+    for col in CURRICULAR_COLUMNS:
+        df[col] = df[col].astype(str).str.split().str.join(" ") if col in df.columns else ""
+    df["clave_asignatura"] = df["clave_asignatura"].str.upper()
+    incomplete = df[(df[list(REQUIRED_CURRICULAR_COLUMNS)] == "").any(axis=1)]
+    if not incomplete.empty:
+        rows = ", ".join(str(i + 2) for i in incomplete.index[:10])
+        return False, f"Hay filas sin asignatura o competencia (filas {rows})."
+
+    try:
+        # Object columns keep ints as ints and blanks as None (no float/NaN coercion)
+        for col in ("semestre", "numero_competencia", "horas"):
+            df[col] = pd.Series([_number(v) for v in df[col]], index=df.index, dtype=object)
+    except ValueError as e:
+        return False, f"Semestre, número de competencia y horas deben ser numéricos: {e}"
+
+    counts = {table: {"inserted": 0, "updated": 0, "unchanged": 0} for table in _TABLES}
+    warnings = []
+    career = _comparable(carrera_id)
+    supabase = get_supabase_client()
+
+    try:
+        # 1. Asignaturas (first row of each clave wins)
+        subjects = df.drop_duplicates("clave_asignatura")
+        desired = {
+            (career, clave): {"carrera_id": carrera_id, "clave_asignatura": clave, "nombre": nombre, "semestre": semestre}
+            for clave, nombre, semestre in zip(subjects["clave_asignatura"], subjects["asignatura"], subjects["semestre"])
+        }
+        rows = _fetch_pages(
+            lambda: supabase.table("asignaturas").select("id, carrera_id, clave_asignatura, nombre, semestre").eq("carrera_id", carrera_id),
+            ("id",),
+        )
+        existing = {(career, _comparable(r["clave_asignatura"])): r for r in rows}
+        subject_ids = _sync("asignaturas", desired, existing, counts["asignaturas"])
+        subject_by_clave = {clave: subject_ids[(career, clave)] for _, clave in desired}
+
+        # 2. Competencias
+        comps = df.drop_duplicates(["clave_asignatura", "numero_competencia"])
+        desired = {}
+        for clave, numero, descripcion in zip(comps["clave_asignatura"], comps["numero_competencia"], comps["competencia"]):
+            subject_id = subject_by_clave[clave]
+            desired[(_comparable(subject_id), _comparable(numero))] = {
+                "asignatura_id": subject_id, "numero_competencia": numero, "descripcion_competencia": descripcion
+            }
+        rows = _fetch_in("asignatura_competencias", "id, asignatura_id, numero_competencia, descripcion_competencia", "asignatura_id", subject_by_clave.values())
+        existing = {(_comparable(r["asignatura_id"]), _comparable(r["numero_competencia"])): r for r in rows}
+        comp_ids = _sync("asignatura_competencias", desired, existing, counts["asignatura_competencias"])
+
+        # 3. Actividades (rows with an empty actividad only declare the competencia)
+        acts = df[df["actividad"] != ""].drop_duplicates(["clave_asignatura", "numero_competencia", "actividad"])
+        desired = {}
+        for clave, numero, actividad, evidencia, horas in zip(acts["clave_asignatura"], acts["numero_competencia"], acts["actividad"], acts["evidencia"], acts["horas"]):
+            comp_id = comp_ids[(_comparable(subject_by_clave[clave]), _comparable(numero))]
+            desired[(_comparable(comp_id), actividad)] = {
+                "competencia_id": comp_id, "descripcion_actividad": actividad,
+                "evidencia": evidencia or None, "horas_dedicacion": horas,
+            }
+        rows = _fetch_in("actividades_aprendizaje", "id, competencia_id, descripcion_actividad, evidencia, horas_dedicacion", "competencia_id", set(comp_ids.values()))
+        existing = {(_comparable(r["competencia_id"]), r["descripcion_actividad"]): r for r in rows}
+        _sync("actividades_aprendizaje", desired, existing, counts["actividades_aprendizaje"])
+
+        # 4. Maestro <-> asignatura
+        pairs = set()
+        for clave, teachers in zip(df["clave_asignatura"], df["clave_maestro"]):
+            for clave_maestro in teachers.split(","):
+                if clave_maestro.strip():
+                    pairs.add((clave_maestro.strip().upper(), clave))
+        if pairs:
+            teacher_keys = {t for t, _ in pairs}
+            rows = _fetch_in("maestros", "id, clave_maestro", "clave_maestro", teacher_keys)
+            teacher_ids = {r["clave_maestro"].upper(): r["id"] for r in rows if r.get("clave_maestro")}
+            unknown = sorted(teacher_keys - teacher_ids.keys())
+            if unknown:
+                warnings.append(f"Maestros no encontrados (relación omitida): {', '.join(unknown)}")
+            desired = {
+                (_comparable(teacher_ids[t]), _comparable(subject_by_clave[c])): {"maestro_id": teacher_ids[t], "asignatura_id": subject_by_clave[c]}
+                for t, c in pairs if t in teacher_ids
+            }
+            rows = _fetch_in("rel_maestros_asignaturas", "maestro_id, asignatura_id", "asignatura_id", subject_by_clave.values(),
+                             order_by=("maestro_id", "asignatura_id"))
+            existing = {(_comparable(r["maestro_id"]), _comparable(r["asignatura_id"])): r for r in rows}
+            _sync("rel_maestros_asignaturas", desired, existing, counts["rel_maestros_asignaturas"])
+    except Exception as e:
+        return False, f"Error al cargar el mapa curricular: {e}"
+    finally:
+        invalidate_catalog("asignaturas", "rel_maestros_asignaturas")
+
+    return True, {"tables": counts, "warnings": warnings}
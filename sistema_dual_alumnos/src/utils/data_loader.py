@@ -0,0 +1,44 @@
+import os
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Shared by all sessions of the process; each view only submits a handful of
+# independent PostgREST calls, so a small pool is enough.
+LOADER_MAX_WORKERS = int(os.environ.get("LOADER_MAX_WORKERS", 16))
+VIEW_LOAD_TIMEOUT = float(os.environ.get("VIEW_LOAD_TIMEOUT", 10))
+
+_executor = ThreadPoolExecutor(max_workers=LOADER_MAX_WORKERS, thread_name_prefix="view-loader")
+
+
+def load_concurrently(queries, timeout=None):
+    """
+    Runs independent queries of a view at the same time.
+
+    Args:
+        queries (dict): name -> zero-argument callable returning the data.
+            Callables must not touch st.* (they run outside the script thread);
+            capture the Supabase client before building them.
+        timeout (float): seconds allowed for the whole view (VIEW_LOAD_TIMEOUT).
+
+    Returns:
+        (results, errors): dicts keyed by query name. A query that raised or did
+        not finish in time appears only in `errors`, so the page can render the
+        rest.
+    """
+    timeout = VIEW_LOAD_TIMEOUT if timeout is None else timeout
+    # Each query runs in a copy of the caller's context so it keeps the view tag
+    futures = {name: _executor.submit(contextvars.copy_context().run, fn) for name, fn in queries.items()}
+    wait(futures.values(), timeout=timeout)
+
+    results, errors = {}, {}
+    for name, future in futures.items():
+        if not future.done():
+            future.cancel()
+            errors[name] = TimeoutError(f"'{name}' no respondió en {timeout:.0f} s")
+            continue
+        exc = future.exception()
+        if exc is not None:
+            errors[name] = exc
+        else:
+            results[name] = future.result()
+    return results, errors
@@ -1,34 +1,41 @@
 import streamlit as st
 from datetime import date
 from src.db_connection import get_supabase_client
+from src.repository import get_active_period
 
 def get_active_period_id():
-    """Fetches the ID of the currently active period."""
-    supabase = get_supabase_client()
-    response = supabase.table("periodos").select("id").eq("activo", True).execute()
-    if response.data:
-        return response.data[0]["id"]
+    """Fetches the ID of the currently active period (cached catalog)."""
+    period = get_active_period()
+    if period:
+        return period["id"]
     return None
 
+def login_student(matricula, curp, carrera_id):
+    """
+    Validates a student login with a single call to `login_alumno`.
+    Returns {"status", "nombre_lista_blanca", "alumno"}; see the migration for
+    the possible statuses.
+    """
+    supabase = get_supabase_client()
+    res = supabase.rpc("login_alumno", {
+        "p_matricula": matricula,
+        "p_curp": curp,
+        "p_carrera_id": carrera_id
+    }).execute()
+    return res.data or {}
+
 def create_student_transaction(student_data, project_data, subjects_data):
     """
-    Executes the registration transaction:
+    Executes the registration transaction in a single round trip through the
+    `registrar_alumno_dual` Postgres function (supabase/migrations):
     1. Create Student
     2. Create Dual Project (assigned to active period)
     3. Register Subjects
+    The function runs in one database transaction, so a failure leaves no partial data.
     """
     supabase = get_supabase_client()
-    period_id = get_active_period_id()
-    
-    if not period_id:
-        return False, "No hay periodo activo configurado."
 
     try:
-        # 1. Register Student
-        # Check if exists first to avoid duplicate key error if reusing matricula for retries
-        # For MVP we assume new student or update? 
-        # "upsert" is better for handling retries or existing pre-registered students
-        
         # Prepare student record
         student_record = {
             "matricula": student_data["matricula"],
@@ -47,22 +54,12 @@ def create_student_transaction(student_data, project_data, subjects_data):
             "semestre": student_data.get("semestre"),
             "estatus": "Registrado"
         }
-        
-        # Using Upsert to handle potential pre-filled data updates
-        res_student = supabase.table("alumnos").upsert(student_record, on_conflict="matricula").execute()
-        
-        if not res_student.data:
-             return False, "Error al guardar datos del alumno."
-        
-        student_id = res_student.data[0]["id"]
 
-        # 2. Register Project
         f_inicio = project_data["fecha_inicio"]
         f_fin = project_data["fecha_fin"]
-        
+
+        # alumno_id / periodo_id are resolved server-side
         project_record = {
-            "alumno_id": student_id,
-            "periodo_id": period_id,
             "ue_id": project_data["ue_id"],
             "mentor_ue_id": project_data["mentor_ue_id"],
             "nombre_proyecto": project_data["nombre_proyecto"],
@@ -71,23 +68,10 @@ def create_student_transaction(student_data, project_data, subjects_data):
             "fecha_inicio_convenio": f_inicio.isoformat() if hasattr(f_inicio, 'isoformat') else f_inicio,
             "fecha_fin_convenio": f_fin.isoformat() if hasattr(f_fin, 'isoformat') else f_fin
         }
-        
-        # Upsert to handle updates/corrections
-        supabase.table("proyectos_dual").upsert(project_record, on_conflict="alumno_id, periodo_id").execute()
-
-        # 3. Register Subjects
-        # Prevent duplicates on double-click by clearing previous enrollments for this period
-        supabase.table("inscripciones_asignaturas") \
-            .delete() \
-            .eq("alumno_id", student_id) \
-            .eq("periodo_id", period_id) \
-            .execute()
-            
+
         subjects_records = []
         for subject in subjects_data:
             subjects_records.append({
-                "alumno_id": student_id,
-                "periodo_id": period_id,
                 "asignatura_id": subject["asignatura_id"],
                 "maestro_id": subject["maestro_id"], # Evaluator
                 "grupo": subject.get("grupo"),
@@ -96,12 +80,109 @@ def create_student_transaction(student_data, project_data, subjects_data):
                 "parcial_2": subject.get("p2", True),
                 "parcial_3": subject.get("p3", True)
             })
-            
-        if subjects_records:
-            supabase.table("inscripciones_asignaturas").insert(subjects_records).execute()
-        
-        student_record["id"] = student_id
+
+        res = supabase.rpc("registrar_alumno_dual", {
+            "p_alumno": student_record,
+            "p_proyecto": project_record,
+            "p_asignaturas": subjects_records
+        }).execute()
+
+        if not res.data:
+             return False, "Error al guardar datos del alumno."
+
+        student_record["id"] = res.data["alumno_id"]
         return True, student_record
 
     except Exception as e:
-        return False, str(e)
+        # Postgres exceptions (e.g. no active period) arrive as APIError with the raised message
+        return False, getattr(e, "message", None) or str(e)
+
+def save_mentor_ie_grades(project_id, mentor_ie_id, grades):
+    """
+    Saves all subject grades of a Mentor IE evaluation and the recomputed
+    average in one atomic call to `guardar_calificaciones_ie`.
+
+    Args:
+        grades (dict): inscripcion id -> grade (0 - 10).
+
+    Returns:
+        (True, average) on success, (False, failed inscripcion ids) if any row
+        was rejected (nothing is written then), or (False, message) on error.
+    """
+    supabase = get_supabase_client()
+    payload = [{"id": sub_id, "calificacion_ie_materia": grade} for sub_id, grade in grades.items()]
+
+    try:
+        res = supabase.rpc("guardar_calificaciones_ie", {
+            "p_proyecto_id": project_id,
+            "p_mentor_ie_id": mentor_ie_id,
+            "p_calificaciones": payload
+        }).execute()
+    except Exception as e:
+        return False, getattr(e, "message", None) or str(e)
+
+    result = res.data or {}
+    if not result.get("ok"):
+        return False, result.get("failed_ids", [])
+    return True, result.get("promedio")
+
+def save_mentor_ue_evaluation(project_id, mentor_ue_id, mes_evaluado, numero_reporte, activity_grades):
+    """
+    Stores an Anexo 5.4 monthly report (one row per graded activity) with a
+    single call to `guardar_evaluacion_ue`. Per-project, per-month and
+    per-competency aggregates are maintained by database triggers.
+
+    Args:
+        activity_grades (list): [{"actividad_id", "competencia_id", "calificacion"}, ...]
+
+    Returns:
+        (True, {"evaluacion_id", "promedio_reporte", "promedio_proyecto"}) or (False, message).
+    """
+    supabase = get_supabase_client()
+    try:
+        res = supabase.rpc("guardar_evaluacion_ue", {
+            "p_proyecto_id": project_id,
+            "p_mentor_ue_id": mentor_ue_id,
+            "p_mes_evaluado": mes_evaluado,
+            "p_numero_reporte": numero_reporte,
+            "p_calificaciones": activity_grades
+        }).execute()
+    except Exception as e:
+        return False, getattr(e, "message", None) or str(e)
+
+    if not res.data:
+        return False, "No se recibió confirmación de la base de datos."
+    return True, res.data
+
+def fetch_mentor_students_page(mentor_field, mentor_id, search="", periodo_id=None, pending_only=False, page=1, page_size=20):
+    """
+    Fetches one page of a mentor's students from the `proyectos_dual_listado` view.
+
+    Args:
+        mentor_field (str): "mentor_ue_id" or "mentor_ie_id".
+        search (str): case-insensitive match on matricula / full name.
+        pending_only (bool): only students without the mentor's grade
+            (calificacion_ue for Mentor UE, calificacion_ie for Mentor IE).
+
+    Returns:
+        (rows, total) where total is the number of matching students.
+    """
+    grade_field = {"mentor_ue_id": "calificacion_ue", "mentor_ie_id": "calificacion_ie"}[mentor_field]
+    supabase = get_supabase_client()
+
+    query = supabase.table("proyectos_dual_listado").select(
+        "id, nombre_proyecto, alumno_id, periodo_id, periodo_nombre, calificacion_ue, calificacion_ie, "
+        "matricula, nombre, ap_paterno, ap_materno, carrera_id",
+        count="exact"
+    ).eq(mentor_field, mentor_id)
+
+    if search:
+        query = query.ilike("busqueda", f"%{search.lower()}%")
+    if periodo_id:
+        query = query.eq("periodo_id", periodo_id)
+    if pending_only:
+        query = query.is_(grade_field, "null")
+
+    start = (max(page, 1) - 1) * page_size
+    res = query.order("ap_paterno").order("nombre").order("id").range(start, start + page_size - 1).execute()
+    return res.data or [], res.count or 0
@@ -0,0 +1,139 @@
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+# Content-addressed store for generated documents. A document's key is the
+# hash of its template version and the exact values rendered into it, so the
+# same inputs always map to the same file and different inputs never share
+# one. Files are written to a temp name and renamed into place, so readers
+# never see partial files and concurrent writers of the same key are harmless.
+# The directory is bounded to DOCUMENT_CACHE_MAX_BYTES; least recently used
+# files (by mtime, refreshed on every hit) are evicted first.
+DOCUMENT_CACHE_DIR = os.environ.get("DOCUMENT_CACHE_DIR") or os.path.join(tempfile.gettempdir(), "dual_documents")
+DOCUMENT_CACHE_MAX_BYTES = int(os.environ.get("DOCUMENT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+def document_key(template_version, context):
+    """Stable hash of a template version plus the values rendered into it."""
+    payload = json.dumps(context, sort_keys=True, default=str, ensure_ascii=False)
+    return hashlib.sha256(f"{template_version}\0{payload}".encode("utf-8")).hexdigest()
+
+
+class DocumentCache:
+    """Size-bounded LRU cache of files in one directory."""
+
+    def __init__(self, directory=DOCUMENT_CACHE_DIR, max_bytes=DOCUMENT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        # Other processes (batch workers) write here too, so this is an
+        # estimate that triggers a real directory scan when it passes the limit.
+        self._approx_bytes = self._scan()[1]
+
+    def path(self, key, suffix):
+        return os.path.join(self.directory, f"{key}{suffix}")
+
+    def get(self, key, suffix):
+        """Returns the cached file path (marking it as recently used) or None."""
+        path = self.path(key, suffix)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            with self._lock:
+                self._stats["misses"] += 1
+            return None
+        with self._lock:
+            self._stats["hits"] += 1
+        return path
+
+    def read(self, key, suffix):
+        """Returns the cached content or None (also if it is evicted while being read)."""
+        path = self.get(key, suffix)
+        if path is None:
+            return None
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, suffix, content):
+        """Stores `content` under the key and returns its path."""
+        path = self.path(key, suffix)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp_")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        with self._lock:
+            self._stats["writes"] += 1
+            self._approx_bytes += len(content)
+            over_limit = self._approx_bytes > self.max_bytes
+        if over_limit:
+            self.evict()
+        return path
+
+    def _scan(self):
+        entries = []
+        total = 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.startswith(".tmp_"):
+                    continue
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+                total += stat.st_size
+        return entries, total
+
+    def evict(self):
+        """Deletes least recently used files until the cache is under 90% of its limit."""
+        entries, total = self._scan()
+        target = self.max_bytes * 0.9
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.unlink(path)  # open readers keep their handle on POSIX
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._approx_bytes = total
+            self._stats["evictions"] += evicted
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["approx_bytes"] = self._approx_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_document_cache():
+    """Returns the process-wide document cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DocumentCache()
+        return _cache
@@ -1,45 +1,149 @@
 from docx import Document
+from docx.oxml.ns import qn
+from lxml import etree
+from xml.sax.saxutils import escape
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import threading
+import zipfile
+import re
+import io
 import os
+import hashlib
 import tempfile
+from src.utils.document_cache import document_key, get_document_cache
+
+TEMPLATES_PATH = "src/assets/templates"
+DOCUMENT_TEMPLATES = (
+    ("anexo_5_1_template.docx", "Anexo_5.1_{matricula}.docx"),
+    ("carta_asignacion_template.docx", "Carta_Asignacion_{matricula}.docx"),
+)
+DOCUMENT_WORKERS = int(os.environ.get("DOCUMENT_WORKERS", os.cpu_count() or 2))
+
+_PLACEHOLDER = re.compile(r"\{\{(\w+)\}\}")
+_DOCUMENT_PART = "word/document.xml"
+
+
+class CompiledTemplate:
+    """
+    A .docx template parsed once. The body XML is split around its
+    {{placeholders}} so rendering is a string join, and every other part of
+    the package is kept as a ready-made zip to which the rendered body is added.
+    """
+
+    def __init__(self, template_path):
+        with open(template_path, "rb") as f:
+            self.version = hashlib.sha256(f.read()).hexdigest()  # part of every cache key
+        doc = Document(template_path)
+
+        # Placeholders split across runs are merged into one run, as the
+        # previous paragraph.text replacement did, so they show up as one token.
+        for paragraph in _iter_paragraphs(doc):
+            if _PLACEHOLDER.search(paragraph.text):
+                paragraph.text = paragraph.text
+                for t in paragraph._p.iter(qn("w:t")):
+                    t.set("{http://www.w3.org/XML/1998/namespace}space", "preserve")
+
+        xml = etree.tostring(doc.element, xml_declaration=True, encoding="UTF-8", standalone=True).decode("utf-8")
+        parts = _PLACEHOLDER.split(xml)
+        self.literals = parts[0::2]   # len(keys) + 1 literal chunks
+        self.keys = parts[1::2]       # placeholder name between each pair of literals
+
+        base = io.BytesIO()
+        with zipfile.ZipFile(template_path) as source, zipfile.ZipFile(base, "w", zipfile.ZIP_DEFLATED) as target:
+            for item in source.infolist():
+                if item.filename != _DOCUMENT_PART:
+                    target.writestr(item, source.read(item.filename))
+        self.base_package = base.getvalue()
+
+    def render(self, data):
+        """Returns the filled document as .docx bytes. Unknown keys are left as {{key}}."""
+        values = {key: _xml_text(value) for key, value in data.items()}
+        chunks = [self.literals[0]]
+        for key, literal in zip(self.keys, self.literals[1:]):
+            chunks.append(values.get(key, f"{{{{{key}}}}}"))
+            chunks.append(literal)
+
+        buffer = io.BytesIO(self.base_package)
+        buffer.seek(0, io.SEEK_END)
+        with zipfile.ZipFile(buffer, "a", zipfile.ZIP_DEFLATED) as package:
+            package.writestr(_DOCUMENT_PART, "".join(chunks).encode("utf-8"))
+        return buffer.getvalue()
+
+
+def _iter_paragraphs(doc):
+    yield from doc.paragraphs
+    seen = set()
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                if id(cell._tc) in seen:  # merged cells repeat the same element
+                    continue
+                seen.add(id(cell._tc))
+                yield from cell.paragraphs
+
+
+def _xml_text(value):
+    """Escapes a value for a <w:t> node; line breaks and tabs become Word breaks/tabs."""
+    text = escape(str(value))
+    return (text.replace("\n", '</w:t><w:br/><w:t xml:space="preserve">')
+                .replace("\t", '</w:t><w:tab/><w:t xml:space="preserve">'))
+
+
+_templates = {}  # path -> (mtime_ns, CompiledTemplate)
+_templates_lock = threading.Lock()
+
+
+def get_compiled_template(template_path):
+    """Returns the compiled template, recompiling it only if the file changed."""
+    mtime = os.stat(template_path).st_mtime_ns
+    with _templates_lock:
+        cached = _templates.get(template_path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    compiled = CompiledTemplate(template_path)
+    with _templates_lock:
+        _templates[template_path] = (mtime, compiled)
+    return compiled
+
+
+def render_cached(template_path, data):
+    """
+    Returns (key, content) for a filled template, reusing the cached document
+    when the template and the values are unchanged.
+    """
+    compiled = get_compiled_template(template_path)
+    key = document_key(compiled.version, data)
+    cache = get_document_cache()
+    content = cache.read(key, ".docx")
+    if content is None:
+        content = compiled.render(data)
+        cache.put(key, ".docx", content)
+    return key, content
+
 
 def fill_template(template_path, data, output_filename):
     """
     Fills a .docx template with data dictionary values.
-    Returns path to generated file.
+    Returns path to generated file (in the document cache, named by its
+    content key; output_filename only gives the extension and is the name
+    to offer when downloading it).
     """
     try:
-        doc = Document(template_path)
-        
-        # Replace in paragraphs
-        for paragraph in doc.paragraphs:
-            for key, value in data.items():
-                if f"{{{{{key}}}}}" in paragraph.text:
-                    paragraph.text = paragraph.text.replace(f"{{{{{key}}}}}", str(value))
-        
-        # Replace in tables (basic)
-        for table in doc.tables:
-            for row in table.rows:
-                for cell in row.cells:
-                    for paragraph in cell.paragraphs:
-                        for key, value in data.items():
-                             if f"{{{{{key}}}}}" in paragraph.text:
-                                paragraph.text = paragraph.text.replace(f"{{{{{key}}}}}", str(value))
-
-        tmp_dir = tempfile.gettempdir()
-        output_path = os.path.join(tmp_dir, output_filename)
-        doc.save(output_path)
-        return output_path
-        
+        compiled = get_compiled_template(template_path)
+        key = document_key(compiled.version, data)
+        suffix = os.path.splitext(output_filename)[1] or ".docx"
+        cache = get_document_cache()
+        return cache.get(key, suffix) or cache.put(key, suffix, compiled.render(data))
+
     except Exception as e:
         print(f"Error generating document: {e}")
         return None
 
-def generate_student_documents(student_data, project_data, mentor_data):
-    """Generates Anexo 5.1 and Letter for a student."""
-    base_path = "src/assets/templates"
-    
-    # Prepare Context
-    context = {
+
+def build_document_context(student_data, project_data, mentor_data):
+    """Placeholder values shared by the Anexo 5.1 and the Carta de Asignación."""
+    return {
         "nombre_alumno": f"{student_data.get('nombre')} {student_data.get('ap_paterno')} {student_data.get('ap_materno')}",
         "matricula": student_data.get("matricula"),
         "nombre_proyecto": project_data.get("nombre_proyecto"),
@@ -49,19 +153,149 @@ def generate_student_documents(student_data, project_data, mentor_data):
         "email_mentor_ie": mentor_data.get("email_institucional", "N/A"),
         "tabla_materias": "(Detalle de materias aquí...)" # logic for table rows omitted for brevity
     }
-    
-    # Generate Anexo
-    anexo_path = fill_template(
-        os.path.join(base_path, "anexo_5_1_template.docx"),
-        context,
-        f"Anexo_5.1_{student_data.get('matricula')}.docx"
-    )
-    
-    # Generate Carta
-    carta_path = fill_template(
-        os.path.join(base_path, "carta_asignacion_template.docx"),
-        context,
-        f"Carta_Asignacion_{student_data.get('matricula')}.docx"
-    )
-    
-    return [anexo_path, carta_path] if anexo_path and carta_path else []
+
+
+def project_document_context(student_data, project):
+    """Document context of a proyectos_dual row with its UE, mentor UE and mentor IE embedded."""
+    project_data = {
+        "nombre_proyecto": project.get("nombre_proyecto"),
+        "ue_name": (project.get("unidades_economicas") or {}).get("nombre_comercial", "N/A"),
+        "mentor_ue_name": (project.get("mentores_ue") or {}).get("nombre_completo", "N/A"),
+    }
+    return build_document_context(student_data, project_data, project.get("maestros") or {})
+
+
+def generate_student_documents(student_data, project_data, mentor_data):
+    """Generates Anexo 5.1 and Letter for a student."""
+    context = build_document_context(student_data, project_data, mentor_data)
+    paths = [
+        fill_template(os.path.join(TEMPLATES_PATH, template), context, name.format(matricula=student_data.get("matricula")))
+        for template, name in DOCUMENT_TEMPLATES
+    ]
+    return paths if all(paths) else []
+
+
+# --- Batch generation ---
+
+def _render_documents(context, templates_path):
+    matricula = context.get("matricula")
+    return [
+        (name.format(matricula=matricula), *render_cached(os.path.join(templates_path, template), context))
+        for template, name in DOCUMENT_TEMPLATES
+    ]
+
+
+def render_student_documents(context, templates_path=TEMPLATES_PATH):
+    """Renders every DOCUMENT_TEMPLATES entry for one context: [(filename, bytes)]."""
+    return [(filename, content) for filename, _, content in _render_documents(context, templates_path)]
+
+
+def _render_batch(contexts, templates_path):
+    # Runs in a worker process; each worker compiles the templates once.
+    return [(context.get("matricula"), _render_documents(context, templates_path)) for context in contexts]
+
+
+def write_documents_zip(contexts, out, workers=DOCUMENT_WORKERS, batch_size=25, templates_path=TEMPLATES_PATH, include_pdf=False):
+    """
+    Renders the documents of every context across a process pool and streams
+    them into a ZIP written to `out` as batches complete (one folder per
+    matricula). With include_pdf, a PDF of each document is added as well;
+    PDFs already in the document cache are reused and only the rest are
+    converted by the LibreOffice pool. Returns the number of files written.
+    """
+    batches = [contexts[i:i + batch_size] for i in range(0, len(contexts), batch_size)]
+    # .docx files are already compressed, so they are stored as-is
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_STORED) as archive, tempfile.TemporaryDirectory() as work_dir:
+        pdf_dir = work_dir if include_pdf else None
+        if workers <= 1 or len(batches) <= 1:
+            results = (_render_batch(batch, templates_path) for batch in batches)
+            count, pending = _write_results(archive, results, pdf_dir)
+        else:
+            # spawn: workers never inherit Streamlit's threads or open sockets
+            with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+                count, pending = _write_results(archive, pool.map(_render_batch, batches, [templates_path] * len(batches)), pdf_dir)
+
+        if pending:
+            from src.utils.pdf_converter import convert_many
+            cache = get_document_cache()
+            for docx_path, pdf_path in convert_many(list(pending)).items():
+                if pdf_path:
+                    with open(pdf_path, "rb") as f:
+                        cache.put(pending[docx_path], ".pdf", f.read())
+                    archive.write(pdf_path, os.path.relpath(pdf_path, work_dir))
+                    count += 1
+    return count
+
+
+def _write_results(archive, results, pdf_dir=None):
+    """
+    Adds rendered documents to the archive. With pdf_dir, cached PDFs are added
+    too and the documents still to convert are saved there; returns
+    (count, {docx_path: cache key}) for the latter.
+    """
+    count = 0
+    pending = {}
+    cache = get_document_cache()
+    for batch in results:
+        for matricula, documents in batch:
+            for filename, key, content in documents:
+                arcname = f"{matricula}/{filename}"
+                archive.writestr(arcname, content)
+                count += 1
+                if not pdf_dir:
+                    continue
+                pdf = cache.read(key, ".pdf")
+                if pdf is not None:
+                    archive.writestr(os.path.splitext(arcname)[0] + ".pdf", pdf)
+                    count += 1
+                    continue
+                path = os.path.join(pdf_dir, arcname)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "wb") as f:
+                    f.write(content)
+                pending[path] = key
+    return count, pending
+
+
+def load_document_contexts(periodo_id, carrera_id=None):
+    """Builds the document context of every DUAL project of a period (optionally one career)."""
+    from src.db_connection import get_supabase_client
+    supabase = get_supabase_client()
+    alumnos = "alumnos!inner(matricula, nombre, ap_paterno, ap_materno, carrera_id)"
+    select = f"nombre_proyecto, {alumnos}, unidades_economicas(nombre_comercial), mentores_ue(nombre_completo), maestros(nombre_completo, email_institucional)"
+
+    contexts = []
+    page_size = 1000
+    start = 0
+    while True:
+        query = supabase.table("proyectos_dual").select(select).eq("periodo_id", periodo_id)
+        if carrera_id:
+            query = query.eq("alumnos.carrera_id", carrera_id)
+        rows = query.order("id").range(start, start + page_size - 1).execute().data or []
+        contexts.extend(project_document_context(row.get("alumnos") or {}, row) for row in rows)
+        if len(rows) < page_size:
+            return contexts
+        start += page_size
+
+
+def generate_documents_zip(periodo_id, carrera_id=None, include_pdf=False):
+    """
+    Generates Anexo 5.1 and Carta de Asignación for a whole period (or career)
+    into a spooled ZIP file, optionally with their PDFs.
+
+    Returns:
+        (success, result): result is (file, document_count) with the file
+        rewound (the caller closes it), or an error message.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=32 * 1024 * 1024, mode="w+b")
+    try:
+        contexts = load_document_contexts(periodo_id, carrera_id)
+        if not contexts:
+            out.close()
+            return False, "No hay proyectos DUAL registrados para los filtros seleccionados."
+        count = write_documents_zip(contexts, out, include_pdf=include_pdf)
+    except Exception as e:
+        out.close()
+        return False, f"Error al generar los documentos: {e}"
+    out.seek(0)
+    return True, (out, count)
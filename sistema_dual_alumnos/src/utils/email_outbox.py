@@ -0,0 +1,156 @@
+import os
+import math
+import threading
+from src.db_connection import get_supabase_client
+from src.utils.email_sender import get_mailer, CONFIRMATION_SUBJECT, SMTP_TIMEOUT
+
+# Email is never sent from a view. Views enqueue a row in public.email_outbox
+# and return; a daemon thread claims due rows (reclamar_email_outbox), sends
+# them through the pooled mailer and records the outcome
+# (resolver_email_outbox), which schedules retries with exponential backoff
+# and moves messages to 'fallido' (dead letter) after OUTBOX_MAX_ATTEMPTS or
+# on a permanent SMTP error. Rows survive restarts, so nothing is lost while
+# SMTP is down.
+#
+# A claim is a lease: rows a dead worker left in 'enviando' are claimable again
+# once it expires. The lease covers the worst case of the batch (see
+# _lease_seconds), and each claim carries a token, so a worker that still
+# outlives it cannot overwrite the outcome recorded by the next claim.
+OUTBOX_POLL_SECONDS = float(os.environ.get("OUTBOX_POLL_SECONDS", 10))
+OUTBOX_BATCH_SIZE = int(os.environ.get("OUTBOX_BATCH_SIZE", 20))
+OUTBOX_MAX_ATTEMPTS = int(os.environ.get("OUTBOX_MAX_ATTEMPTS", 6))
+OUTBOX_BACKOFF_BASE = int(os.environ.get("OUTBOX_BACKOFF_BASE", 30))        # seconds before the 1st retry
+OUTBOX_BACKOFF_MAX = int(os.environ.get("OUTBOX_BACKOFF_MAX", 3600))        # cap between retries
+OUTBOX_LEASE_SECONDS = os.environ.get("OUTBOX_LEASE_SECONDS")               # overrides the computed claim expiry
+
+# Blocking SMTP steps, each bounded by SMTP_TIMEOUT, that one message can take:
+# a send that fails (MAIL, RCPT, DATA, body), a reconnect (connect, EHLO,
+# STARTTLS, EHLO, LOGIN) and the second send.
+_SMTP_STEPS_PER_MESSAGE = 13
+_SMTP_STEPS_PER_CONNECTION = 5
+
+EMAIL_STATUS_LABELS = {
+    "pendiente": "En cola de envío",
+    "enviando": "Enviando",
+    "enviado": "Enviado",
+    "fallido": "No se pudo enviar",
+}
+
+_wake = threading.Event()
+_lock = threading.Lock()
+_worker_started = False
+_stats = {"delivered": 0, "retried": 0, "dead_lettered": 0, "lease_lost": 0, "errors": 0}
+
+
+def enqueue_email(to_email, subject, template, context, referencia=None):
+    """
+    Stores an email in the outbox for background delivery.
+
+    Returns:
+        (success, result): result is the outbox row id or an error message.
+    """
+    try:
+        res = get_supabase_client().table("email_outbox").insert({
+            "destinatario": to_email,
+            "asunto": subject,
+            "plantilla": template,
+            "contexto": context,
+            "referencia": referencia,
+        }).execute()
+    except Exception as e:
+        print(f"Error enqueuing email: {e}")
+        return False, str(e)
+    start_outbox_worker()
+    _wake.set()
+    return True, res.data[0]["id"] if res.data else None
+
+
+def enqueue_confirmation_email(to_email, student_data):
+    """Queues the registration confirmation; its status is looked up by matricula."""
+    return enqueue_email(to_email, CONFIRMATION_SUBJECT, "registro_alumno.html", student_data,
+                         referencia=f"registro:{student_data.get('matricula')}")
+
+
+def get_email_status(referencia):
+    """Latest outbox row for a reference ({estado, intentos, ultimo_error, ...}) or None."""
+    try:
+        res = get_supabase_client().table("email_outbox").select(
+            "id, estado, intentos, ultimo_error, proximo_intento, enviado_at"
+        ).eq("referencia", referencia).order("created_at", desc=True).limit(1).execute()
+        return res.data[0] if res.data else None
+    except Exception as e:
+        print(f"Error fetching email status: {e}")
+        return None
+
+
+def _lease_seconds(limit, pool_size):
+    """Claim expiry for a batch: the slowest the mailer can take to deliver it."""
+    if OUTBOX_LEASE_SECONDS:
+        return int(OUTBOX_LEASE_SECONDS)
+    per_connection = math.ceil(limit / max(pool_size, 1))
+    return math.ceil((_SMTP_STEPS_PER_CONNECTION + per_connection * _SMTP_STEPS_PER_MESSAGE) * SMTP_TIMEOUT)
+
+
+def deliver_pending(limit=OUTBOX_BATCH_SIZE):
+    """Claims and sends one batch of due messages. Returns how many were claimed."""
+    supabase = get_supabase_client()
+    mailer = get_mailer()
+    rows = supabase.rpc("reclamar_email_outbox", {
+        "p_limite": limit,
+        "p_bloqueo_segundos": _lease_seconds(limit, mailer.pool_size),
+    }).execute().data or []
+    if not rows:
+        return 0
+
+    results = mailer.deliver(
+        {"to": row["destinatario"], "subject": row["asunto"], "template": row["plantilla"], "context": row["contexto"] or {}}
+        for row in rows
+    )
+    # Only rows still holding this claim's token come back
+    resolved = supabase.rpc("resolver_email_outbox", {
+        "p_resultados": [
+            {"id": row["id"], "reclamo": row["reclamo"], "enviado": r["sent"], "error": r["error"], "permanente": r["permanent"]}
+            for row, r in zip(rows, results)
+        ],
+        "p_max_intentos": OUTBOX_MAX_ATTEMPTS,
+        "p_espera_base": OUTBOX_BACKOFF_BASE,
+        "p_espera_max": OUTBOX_BACKOFF_MAX,
+    }).execute().data or []
+
+    counters = {"enviado": "delivered", "pendiente": "retried", "fallido": "dead_lettered"}
+    with _lock:
+        for row in resolved:
+            _stats[counters[row["estado"]]] += 1
+        _stats["lease_lost"] += len(rows) - len(resolved)
+    return len(rows)
+
+
+def start_outbox_worker():
+    """Starts the delivery thread once per process."""
+    global _worker_started
+    with _lock:
+        if _worker_started:
+            return
+        _worker_started = True
+
+    def loop():
+        while True:
+            _wake.wait(OUTBOX_POLL_SECONDS)
+            _wake.clear()
+            try:
+                while deliver_pending() == OUTBOX_BATCH_SIZE:
+                    pass  # full batch: more may be due
+            except Exception as e:
+                with _lock:
+                    _stats["errors"] += 1
+                print(f"Error delivering outbox emails: {e}")
+
+    threading.Thread(target=loop, name="email-outbox-worker", daemon=True).start()
+
+
+def get_outbox_stats():
+    """Delivery counters of this process's worker."""
+    with _lock:
+        stats = dict(_stats)
+        stats["running"] = _worker_started
+    return stats
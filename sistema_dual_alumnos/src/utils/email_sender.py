@@ -1,65 +1,271 @@
 import os
+import time
+import queue
 import smtplib
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-import streamlit as st
-from datetime import date
+
+# Outgoing mail. Templates under src/templates/email are compiled once per
+# process, and messages go through a small pool of authenticated SMTP
+# connections that are reused between sends: an idle connection is checked
+# with NOOP before use and any connection that fails is reopened once before
+# the message counts as failed.
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "../templates/email")
+SMTP_POOL_SIZE = int(os.environ.get("SMTP_POOL_SIZE", 2))
+SMTP_TIMEOUT = float(os.environ.get("SMTP_TIMEOUT", 20))
+SMTP_KEEPALIVE_SECONDS = float(os.environ.get("SMTP_KEEPALIVE_SECONDS", 30))          # idle time before a NOOP check
+SMTP_MAX_MESSAGES_PER_CONNECTION = int(os.environ.get("SMTP_MAX_MESSAGES_PER_CONNECTION", 100))
+
+CONFIRMATION_SUBJECT = "Confirmación de Registro DUAL - Exitoso"
+
+
+_SENT = {"sent": True, "error": None, "permanent": False}
+
+
+def _failure(error, permanent=False):
+    return {"sent": False, "error": str(error) or type(error).__name__, "permanent": permanent}
+
+
+def _is_permanent(error):
+    """5xx replies are permanent; 4xx (greylisting, mailbox busy) may succeed later."""
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    return getattr(error, "smtp_code", 500) >= 500
+
+
+class _Connection:
+    """An authenticated SMTP session plus its usage counters."""
+
+    def __init__(self, mailer):
+        self.smtp = smtplib.SMTP(mailer.server, mailer.port, timeout=SMTP_TIMEOUT)
+        if mailer.starttls:
+            self.smtp.starttls()
+        self.smtp.login(mailer.user, mailer.password)
+        self.sent = 0
+        self.last_used = time.monotonic()
+
+    def alive(self):
+        if self.sent >= SMTP_MAX_MESSAGES_PER_CONNECTION:
+            return False
+        if time.monotonic() - self.last_used < SMTP_KEEPALIVE_SECONDS:
+            return True
+        try:
+            return self.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            self.smtp.close()
+
+
+class Mailer:
+    """
+    Renders and sends HTML emails. Messages are dicts with "to", "subject",
+    "template" (a file name under TEMPLATE_DIR) and "context".
+    """
+
+    def __init__(self, server=None, port=None, user=None, password=None, pool_size=SMTP_POOL_SIZE,
+                 template_dir=TEMPLATE_DIR, starttls=None):
+        self.server = server or os.environ.get("SMTP_SERVER", "smtp.gmail.com")
+        self.port = int(port or os.environ.get("SMTP_PORT", 587))
+        self.user = user or os.environ.get("SMTP_USER", "test@example.com")
+        self.password = password if password is not None else os.environ.get("SMTP_PASSWORD", "password")
+        self.starttls = starttls if starttls is not None else os.environ.get("SMTP_STARTTLS", "1") == "1"
+        self.mock = self.user == "test@example.com" or not self.password
+        self.pool_size = pool_size
+        self.templates = self._compile_templates(template_dir)
+
+        # Free pool slots: an open connection, or None for one not opened yet
+        self._slots = queue.LifoQueue()
+        for _ in range(pool_size):
+            self._slots.put(None)
+        self._lock = threading.Lock()
+        self._stats = {"sent": 0, "failed": 0, "connections": 0, "reconnects": 0}
+
+    @staticmethod
+    def _compile_templates(template_dir):
+        try:
+            from jinja2 import Environment, FileSystemLoader
+            env = Environment(loader=FileSystemLoader(template_dir), auto_reload=False)
+            return {name: env.get_template(name) for name in env.list_templates(extensions=["html"])}
+        except Exception as e:
+            print(f"Error loading templates: {e}")
+            return {}
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def render(self, template, context):
+        compiled = self.templates.get(template)
+        if compiled is None:
+            print(f"Error loading template: {template} not found")
+            return f"<p>Hola {context.get('nombre_alumno')}, tu registro fue exitoso.</p>"
+        return compiled.render(context)
+
+    def _build(self, message):
+        msg = MIMEMultipart()
+        msg['From'] = self.user
+        msg['To'] = message["to"]
+        msg['Subject'] = message["subject"]
+        msg.attach(MIMEText(self.render(message["template"], message.get("context") or {}), 'html'))
+        return msg.as_string()
+
+    def _open(self):
+        connection = _Connection(self)
+        self._count("connections")
+        return connection
+
+    def _acquire(self):
+        connection = self._slots.get()
+        if connection is not None and not connection.alive():
+            connection.close()
+            connection = None
+        try:
+            return connection or self._open()
+        except Exception:
+            self._slots.put(None)
+            raise
+
+    def _deliver(self, connection, message):
+        """Sends one message; returns (connection to keep using, result)."""
+        try:
+            text = self._build(message)
+        except Exception as e:
+            print(f"Failed to render email for {message.get('to')}: {e}")
+            return connection, _failure(e, permanent=True)
+
+        for attempt in range(2):
+            try:
+                connection.smtp.sendmail(self.user, message["to"], text)
+                connection.sent += 1
+                connection.last_used = time.monotonic()
+                return connection, _SENT
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                # The server answered; a new connection would not change the reply
+                print(f"Failed to send email: {e}")
+                return connection, _failure(e, permanent=_is_permanent(e))
+            except (smtplib.SMTPException, OSError) as e:
+                connection.close()
+                connection = None
+                if attempt:
+                    print(f"Failed to send email: {e}")
+                    return None, _failure(e)
+                try:
+                    connection = self._open()
+                    self._count("reconnects")
+                except (smtplib.SMTPException, OSError) as e:
+                    print(f"Failed to send email: {e}")
+                    return None, _failure(e)
+
+    def _send_chunk(self, messages):
+        results = []
+        try:
+            connection = self._acquire()
+        except (smtplib.SMTPException, OSError) as e:
+            print(f"Failed to connect to SMTP server: {e}")
+            return [_failure(e)] * len(messages)
+        try:
+            for message in messages:
+                if connection is None:
+                    try:
+                        connection = self._open()
+                    except (smtplib.SMTPException, OSError) as e:
+                        print(f"Failed to connect to SMTP server: {e}")
+                        results.extend([_failure(e)] * (len(messages) - len(results)))
+                        break
+                connection, result = self._deliver(connection, message)
+                results.append(result)
+        finally:
+            self._slots.put(connection)
+        return results
+
+    def deliver(self, messages):
+        """
+        Sends every message, spread over the pooled connections.
+
+        Returns:
+            list[dict]: one {"sent", "error", "permanent"} per message, in order.
+            permanent is True when retrying cannot help (rejected recipient,
+            unrenderable template).
+        """
+        messages = list(messages)
+        if self.mock:
+            for message in messages:
+                self.render(message["template"], message.get("context") or {})
+                print(f"--- [MOCK HTML EMAIL] TO: {message['to']} ---")
+                print(f"Subject: {message['subject']}")
+                print("HTML Content generated successfully using template.")
+                print("------------------------------------------")
+            return [_SENT] * len(messages)
+
+        if len(messages) <= 1 or self.pool_size <= 1:
+            results = self._send_chunk(messages) if messages else []
+        else:
+            workers = min(self.pool_size, len(messages))
+            chunks = [messages[i::workers] for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                chunk_results = list(pool.map(self._send_chunk, chunks))
+            results = [None] * len(messages)
+            for i, chunk in enumerate(chunk_results):
+                results[i::workers] = chunk
+
+        sent = sum(1 for result in results if result["sent"])
+        self._count("sent", sent)
+        self._count("failed", len(results) - sent)
+        return results
+
+    def send_many(self, messages):
+        """
+        Sends every message, spread over the pooled connections.
+
+        Returns:
+            list[bool]: whether each message was accepted by the server, in order.
+        """
+        return [result["sent"] for result in self.deliver(messages)]
+
+    def send(self, to_email, subject, template, context):
+        """Sends one message; returns True if the server accepted it."""
+        return self.send_many([{"to": to_email, "subject": subject, "template": template, "context": context}])[0]
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    def close(self):
+        """Closes every pooled connection."""
+        for _ in range(self.pool_size):
+            connection = self._slots.get()
+            if connection is not None:
+                connection.close()
+        for _ in range(self.pool_size):
+            self._slots.put(None)
+
+
+_mailer = None
+_mailer_lock = threading.Lock()
+
+
+def get_mailer():
+    """Returns the process-wide mailer."""
+    global _mailer
+    with _mailer_lock:
+        if _mailer is None:
+            _mailer = Mailer()
+        return _mailer
+
 
 def send_confirmation_email(to_email, student_data):
     """
     Sends a confirmation email to the student using HTML template.
-    
+
     Args:
         to_email (str): Recipient email.
         student_data (dict): Dictionary with student info (nombre, matricula, etc.)
     """
-    smtp_server = os.environ.get("SMTP_SERVER", "smtp.gmail.com")
-    smtp_port = int(os.environ.get("SMTP_PORT", 587))
-    sender_email = os.environ.get("SMTP_USER", "test@example.com")
-    sender_password = os.environ.get("SMTP_PASSWORD", "password")
-
-    today = date.today().strftime("%d/%m/%Y")
-    
-    # Load HTML Template using Jinja2
-    try:
-        from jinja2 import Environment, FileSystemLoader
-        # Path is currently: src/utils/email_sender.py -> ../templates/email/registro_alumno.html.
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        template_dir = os.path.join(current_dir, "../templates/email")
-        env = Environment(loader=FileSystemLoader(template_dir))
-        template = env.get_template("registro_alumno.html")
-        html_content = template.render(student_data)
-        
-    except Exception as e:
-        print(f"Error loading template: {e}")
-        html_content = f"<p>Hola {student_data.get('nombre_alumno')}, tu registro fue exitoso.</p>"
-
-    subject = "Confirmación de Registro DUAL - Exitoso"
-
-    # Mock Mode Logic
-    if sender_email == "test@example.com" or not sender_password:
-        print(f"--- [MOCK HTML EMAIL] TO: {to_email} ---")
-        print(f"Subject: {subject}")
-        # print(html_content) # Too long to print fully
-        print("HTML Content generated successfully using template.")
-        print("------------------------------------------")
-        return True
-
-    try:
-        msg = MIMEMultipart()
-        msg['From'] = sender_email
-        msg['To'] = to_email
-        msg['Subject'] = subject
-
-        msg.attach(MIMEText(html_content, 'html'))
-
-        server = smtplib.SMTP(smtp_server, smtp_port)
-        server.starttls()
-        server.login(sender_email, sender_password)
-        text = msg.as_string()
-        server.sendmail(sender_email, to_email, text)
-        server.quit()
-        return True
-    except Exception as e:
-        print(f"Failed to send email: {e}")
-        return False
+    return get_mailer().send(to_email, CONFIRMATION_SUBJECT, "registro_alumno.html", student_data)
@@ -0,0 +1,131 @@
+import re
+import tempfile
+import numpy as np
+import pandas as pd
+from src.utils.period_export import iter_period_pages, EXPORT_SPOOL_MAX_BYTES
+
+# Final DUAL grade per enrolled subject (0-10 scale):
+#   70% Unidad Económica  (proyectos_dual.calificacion_ue, 0-100, Anexo 5.4)
+#   30% Institución       (inscripciones_asignaturas.calificacion_ie_materia, 0-10;
+#                          falls back to the project's IE average if the
+#                          subject itself was not graded)
+# The grade only applies to the parciales the student takes in DUAL mode
+# (parcial_1/2/3); the others stay blank in the acta for the teacher.
+UE_WEIGHT = 0.7
+IE_WEIGHT = 0.3
+PASSING_GRADE = 7.0
+PARCIALES = ("parcial_1", "parcial_2", "parcial_3")
+
+GRADE_COLUMNS = (
+    "inscripcion_id", "matricula", "nombre", "ap_paterno", "ap_materno", "carrera",
+    "asignatura_id", "clave_asignatura", "asignatura", "grupo", "maestro_id", "docente",
+    "parcial_1", "parcial_2", "parcial_3", "calificacion_ie_materia", "calificacion_ue", "calificacion_ie",
+)
+GROUP_KEYS = ("asignatura_id", "grupo", "maestro_id")
+
+ACTA_HEADERS = ("No.", "Matrícula", "Nombre", "Parcial 1", "Parcial 2", "Parcial 3", "UE (70%)", "IE (30%)", "Calificación Final", "Estado")
+
+
+def load_period_grades(periodo_id):
+    """Loads every enrollment of the period with its grades as one DataFrame."""
+    rows = []
+    for page in iter_period_pages(periodo_id, ", ".join(GRADE_COLUMNS)):
+        rows.extend(page)
+    return pd.DataFrame(rows, columns=list(GRADE_COLUMNS))
+
+
+def compute_final_grades(df):
+    """
+    Adds the weighted grade columns to an enrollments frame (vectorized).
+
+    Added columns: ue (0-10), ie (0-10), final (0-10, one decimal; NaN while
+    UE or IE is missing or no parcial is taken in DUAL mode), parcial_1..3
+    grades as p1..p3 (NaN where the parcial is not DUAL) and estado.
+    """
+    df = df.copy()
+    ue = pd.to_numeric(df["calificacion_ue"], errors="coerce").to_numpy(dtype=float) / 10
+    ie_subject = pd.to_numeric(df["calificacion_ie_materia"], errors="coerce").to_numpy(dtype=float)
+    ie_project = pd.to_numeric(df["calificacion_ie"], errors="coerce").to_numpy(dtype=float)
+    ie = np.where(np.isnan(ie_subject), ie_project, ie_subject)
+
+    flags = np.column_stack([df[p].fillna(False).astype(bool).to_numpy() for p in PARCIALES])
+    final = np.round(UE_WEIGHT * ue + IE_WEIGHT * ie, 1)
+    final = np.where(flags.any(axis=1), final, np.nan)
+
+    df["ue"] = np.round(ue, 1)
+    df["ie"] = np.round(ie, 1)
+    df["final"] = final
+    for i, name in enumerate(("p1", "p2", "p3")):
+        df[name] = np.where(flags[:, i], final, np.nan)
+    df["estado"] = np.select(
+        [~flags.any(axis=1), np.isnan(final), final >= PASSING_GRADE],
+        ["Sin parciales DUAL", "Pendiente", "Aprobado"],
+        default="No aprobado",
+    )
+    return df
+
+
+def _sheet_title(clave, grupo, used):
+    """Excel sheet names: max 31 chars, no []:*?/\\ and unique per workbook."""
+    base = re.sub(r"[\[\]:*?/\\]", "", f"{clave or 'SIN CLAVE'} G{grupo or '-'}")[:28]
+    title, n = base, 2
+    while title in used:
+        title, n = f"{base[:25]}~{n}", n + 1
+    used.add(title)
+    return title
+
+
+def write_actas(df, out):
+    """
+    Writes one acta sheet per (asignatura, grupo, maestro) into `out` as XLSX.
+    Rows are pre-built once for the whole period and written with xlsxwriter in
+    constant-memory mode. Returns the number of sheets.
+    """
+    import xlsxwriter
+    order = ["clave_asignatura", "asignatura_id", "grupo", "docente", "maestro_id", "ap_paterno", "ap_materno", "nombre"]
+    df = df.sort_values(order, na_position="last").reset_index(drop=True)
+    nombre = (df["ap_paterno"].fillna("") + " " + df["ap_materno"].fillna("") + " " + df["nombre"].fillna("")).str.split().str.join(" ")
+    grade_cols = [df[c].astype(object).where(df[c].notna(), None) for c in ("p1", "p2", "p3", "ue", "ie", "final")]
+    rows = list(zip(df["matricula"], nombre, *grade_cols, df["estado"]))
+
+    codes = df.groupby(list(GROUP_KEYS), dropna=False, sort=False).ngroup().to_numpy()
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(codes)) + 1)) if len(codes) else np.array([], dtype=int)
+    ends = np.append(starts[1:], len(codes))
+
+    workbook = xlsxwriter.Workbook(out, {"constant_memory": True})
+    bold = workbook.add_format({"bold": True})
+    used = set()
+    for start, end in zip(starts, ends):
+        first = df.iloc[start]
+        sheet = workbook.add_worksheet(_sheet_title(first["clave_asignatura"], first["grupo"], used))
+        sheet.set_column(1, 2, 18)
+        sheet.write_row(0, 0, ["ACTA DE CALIFICACIONES - MODELO DUAL"], bold)
+        sheet.write_row(1, 0, ["Asignatura:", f"{first['clave_asignatura']} - {first['asignatura']}"])
+        sheet.write_row(2, 0, ["Grupo:", first["grupo"], "Docente:", first["docente"]])
+        sheet.write_row(4, 0, ACTA_HEADERS, bold)
+        for n, row in enumerate(rows[start:end], start=1):
+            sheet.write_row(4 + n, 0, (n, *row))
+
+    if not len(starts):
+        workbook.add_worksheet("Sin registros").write(0, 0, "No hay inscripciones en el periodo.")
+    workbook.close()
+    return len(starts)
+
+
+def export_actas(periodo_id):
+    """
+    Computes the period's final grades and writes every acta into one workbook.
+
+    Returns:
+        (success, result): result is (file, group_count) with the spooled file
+        rewound (the caller closes it), or an error message.
+    """
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES, mode="w+b")
+    try:
+        grades = compute_final_grades(load_period_grades(periodo_id))
+        groups = write_actas(grades, out)
+    except Exception as e:
+        out.close()
+        return False, f"Error al generar las actas: {e}"
+    out.seek(0)
+    return True, (out, groups)
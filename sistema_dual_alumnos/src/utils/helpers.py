@@ -1,4 +1,5 @@
 import re
+import unicodedata
 from datetime import date, datetime
 
 def validate_email(email: str) -> bool:
@@ -11,6 +12,11 @@ def calculate_age(born: date) -> int:
     today = date.today()
     return today.year - born.year - ((today.month, today.day) < (born.month, born.day))
 
+def normalize_text(text) -> str:
+    """Lowercase, accent-free, single-spaced text for matching names and headers."""
+    text = unicodedata.normalize("NFKD", str(text)).encode("ascii", "ignore").decode("ascii")
+    return " ".join(text.lower().split())
+
 def format_currency(amount: float) -> str:
     """Formats a number as currency."""
     return "${:,.2f}".format(amount)
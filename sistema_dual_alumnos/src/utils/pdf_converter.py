@@ -0,0 +1,217 @@
+import os
+import time
+import queue
+import shutil
+import signal
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import Future
+
+# DOCX -> PDF conversion through a pool of headless LibreOffice workers.
+# Each worker owns a LibreOffice user profile that is initialized once when the
+# worker starts (the first run of a profile is most of soffice's start-up
+# cost), and converts documents in batches so one soffice process handles many
+# files. Work is fed through a bounded queue; a conversion that exceeds its
+# timeout is killed and the worker restarts with a fresh profile.
+# The app's interpreter cannot load LibreOffice's `uno` bridge (pip Python,
+# packages.txt only installs libreoffice), so batches go through the CLI.
+SOFFICE_PATH = os.environ.get("SOFFICE_PATH") or shutil.which("soffice") or shutil.which("libreoffice")
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", 2))
+PDF_BATCH_SIZE = int(os.environ.get("PDF_BATCH_SIZE", 20))
+PDF_QUEUE_SIZE = int(os.environ.get("PDF_QUEUE_SIZE", 50))
+PDF_TIMEOUT_BASE = float(os.environ.get("PDF_TIMEOUT_BASE", 30))        # seconds per batch
+PDF_TIMEOUT_PER_DOC = float(os.environ.get("PDF_TIMEOUT_PER_DOC", 10))  # plus seconds per document
+
+
+class _Worker(threading.Thread):
+    """One LibreOffice profile plus the thread that runs its conversions."""
+
+    def __init__(self, pool, index):
+        super().__init__(name=f"pdf-worker-{index}", daemon=True)
+        self.pool = pool
+        self.profile = os.path.join(pool.root, f"profile_{index}")
+        self.process = None
+
+    def _command(self, *args):
+        profile_url = "file://" + os.path.abspath(self.profile)
+        return [SOFFICE_PATH, f"-env:UserInstallation={profile_url}", "--headless", "--invisible",
+                "--norestore", "--nolockcheck", "--nodefault", *args]
+
+    def _run(self, args, timeout):
+        """Runs soffice; on timeout kills its whole process group and raises TimeoutExpired."""
+        self.process = subprocess.Popen(
+            self._command(*args), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+        )
+        try:
+            return self.process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            try:
+                os.killpg(self.process.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            self.process.wait()
+            raise
+        finally:
+            self.process = None
+
+    def warm_up(self):
+        shutil.rmtree(self.profile, ignore_errors=True)
+        try:
+            self._run(["--terminate_after_init"], PDF_TIMEOUT_BASE)
+        except subprocess.TimeoutExpired:
+            self.pool._count("restarts")
+
+    def run(self):
+        try:
+            self.warm_up()
+        except OSError as e:
+            print(f"Error starting LibreOffice worker: {e}")
+        while True:
+            job = self.pool._jobs.get()
+            if job is None:
+                return
+            paths, future = job
+            try:
+                future.set_result(self.convert(paths))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self.pool._jobs.task_done()
+
+    def convert(self, paths):
+        """Converts one batch. Returns {docx_path: pdf_path or None}."""
+        results = dict.fromkeys(paths)
+        start = time.perf_counter()
+        try:
+            results = self._convert_batch(paths)
+        finally:
+            self.pool._record_batch(time.perf_counter() - start, results)
+        return results
+
+    def _convert_batch(self, paths):
+        outdir = tempfile.mkdtemp(prefix="out_", dir=self.pool.root)
+        try:
+            try:
+                self._run(["--convert-to", "pdf", "--outdir", outdir, *paths], PDF_TIMEOUT_BASE + PDF_TIMEOUT_PER_DOC * len(paths))
+            except subprocess.TimeoutExpired:
+                self.pool._count("restarts")
+                self.warm_up()
+                if len(paths) > 1:
+                    # Retry one by one so only the document that hangs fails
+                    results = {}
+                    for path in paths:
+                        results.update(self._convert_batch([path]))
+                    return results
+
+            results = dict.fromkeys(paths)
+            for path in paths:
+                produced = os.path.join(outdir, os.path.splitext(os.path.basename(path))[0] + ".pdf")
+                if os.path.exists(produced):
+                    results[path] = os.path.splitext(path)[0] + ".pdf"
+                    os.replace(produced, results[path])
+            return results
+        finally:
+            shutil.rmtree(outdir, ignore_errors=True)
+
+
+class PdfConverterPool:
+    """Pool of warm LibreOffice workers; use convert_many()."""
+
+    def __init__(self, workers=PDF_WORKERS, batch_size=PDF_BATCH_SIZE, queue_size=PDF_QUEUE_SIZE):
+        if not SOFFICE_PATH:
+            raise RuntimeError("LibreOffice (soffice) no está instalado en el servidor.")
+        self.batch_size = batch_size
+        self.root = tempfile.mkdtemp(prefix="dual_pdf_")
+        self._jobs = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._stats = {"submitted": 0, "converted": 0, "failed": 0, "batches": 0, "restarts": 0, "conversion_seconds": 0.0}
+        self._workers = [_Worker(self, i) for i in range(workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def _record_batch(self, elapsed, results):
+        converted = sum(1 for pdf in results.values() if pdf)
+        with self._lock:
+            self._stats["batches"] += 1
+            self._stats["conversion_seconds"] += elapsed
+            self._stats["converted"] += converted
+            self._stats["failed"] += len(results) - converted
+
+    def _batches(self, paths):
+        """Splits paths into batches whose file names are unique (soffice names output by stem)."""
+        batch, stems = [], set()
+        for path in paths:
+            stem = os.path.splitext(os.path.basename(path))[0]
+            if len(batch) == self.batch_size or stem in stems:
+                yield batch
+                batch, stems = [], set()
+            batch.append(path)
+            stems.add(stem)
+        if batch:
+            yield batch
+
+    def convert_many(self, paths):
+        """
+        Converts .docx files to PDF next to each source file. Blocks while the
+        queue is full (backpressure) and until every batch is done.
+
+        Returns:
+            dict: {docx_path: pdf_path, or None if that file failed}.
+        """
+        paths = [os.path.abspath(p) for p in paths]
+        self._count("submitted", len(paths))
+        futures = []
+        for batch in self._batches(paths):
+            future = Future()
+            self._jobs.put((batch, future))
+            futures.append(future)
+        results = {}
+        for future in futures:
+            results.update(future.result())
+        return results
+
+    def stats(self):
+        """Counters plus queue depth and throughput (documents per busy worker-second)."""
+        with self._lock:
+            stats = dict(self._stats)
+        stats["workers"] = sum(1 for w in self._workers if w.is_alive())
+        stats["queue_depth"] = self._jobs.qsize()
+        stats["busy_workers"] = sum(1 for w in self._workers if w.process is not None)
+        seconds = stats["conversion_seconds"]
+        stats["docs_per_second"] = round(stats["converted"] / seconds, 2) if seconds else 0.0
+        return stats
+
+    def shutdown(self):
+        for _ in self._workers:
+            self._jobs.put(None)
+        for worker in self._workers:
+            worker.join()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_converter_pool():
+    """Returns the process-wide pool, starting its workers on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PdfConverterPool()
+        return _pool
+
+
+def convert_many(paths):
+    """Converts .docx files to PDF with the shared pool (see PdfConverterPool.convert_many)."""
+    return get_converter_pool().convert_many(paths)
+
+
+def get_converter_stats():
+    """Returns the pool metrics, or None if no conversion has run in this process."""
+    return _pool.stats() if _pool is not None else None
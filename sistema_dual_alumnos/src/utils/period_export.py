@@ -0,0 +1,130 @@
+import os
+import io
+import csv
+import codecs
+import tempfile
+from src.db_connection import get_supabase_client
+
+# Period roster export. Rows come from the reporte_periodo view one page at a
+# time (keyset pagination on inscripcion_id) and go straight into the output
+# writer, so memory use depends on the page size, not on the period size. The
+# file is built in a SpooledTemporaryFile that only moves to disk once it
+# grows past EXPORT_SPOOL_MAX_BYTES.
+EXPORT_PAGE_SIZE = int(os.environ.get("EXPORT_PAGE_SIZE", 1000))
+EXPORT_SPOOL_MAX_BYTES = int(os.environ.get("EXPORT_SPOOL_MAX_BYTES", 8 * 1024 * 1024))
+
+# (column, type) in output order; types drive the Parquet schema
+EXPORT_COLUMNS = (
+    ("inscripcion_id", "text"), ("periodo", "text"), ("matricula", "text"), ("nombre", "text"),
+    ("ap_paterno", "text"), ("ap_materno", "text"), ("curp", "text"), ("email_institucional", "text"),
+    ("carrera", "text"), ("semestre", "text"), ("estatus", "text"), ("clave_asignatura", "text"),
+    ("asignatura", "text"), ("grupo", "text"), ("docente", "text"),
+    ("parcial_1", "bool"), ("parcial_2", "bool"), ("parcial_3", "bool"), ("calificacion_ie_materia", "number"),
+    ("nombre_proyecto", "text"), ("unidad_economica", "text"), ("mentor_ue", "text"), ("mentor_ie", "text"),
+    ("calificacion_ue", "number"), ("calificacion_ie", "number"),
+)
+
+# format -> (label, extension, mime)
+EXPORT_FORMATS = {
+    "csv": ("CSV", "csv", "text/csv"),
+    "xlsx": ("Excel", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": ("Parquet", "parquet", "application/vnd.apache.parquet"),
+}
+
+
+def iter_period_pages(periodo_id, columns="*", page_size=EXPORT_PAGE_SIZE):
+    """
+    Yields the reporte_periodo rows of a period as lists of up to `page_size`
+    dicts. Pages are fetched lazily, only when the consumer asks for the next one.
+    """
+    supabase = get_supabase_client()
+    last_id = None
+    while True:
+        query = supabase.table("reporte_periodo").select(columns).eq("periodo_id", periodo_id)
+        if last_id is not None:
+            query = query.gt("inscripcion_id", last_id)
+        res = query.order("inscripcion_id").range(0, page_size - 1).execute()
+        rows = res.data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["inscripcion_id"]
+
+
+def _encode_csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _write_csv(pages, out):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    out.write(codecs.BOM_UTF8 + _encode_csv([names]))  # BOM lets Excel detect UTF-8
+    count = 0
+    for page in pages:
+        out.write(_encode_csv([row.get(name) for name in names] for row in page))
+        count += len(page)
+    return count
+
+
+def _write_xlsx(pages, out):
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)  # rows are streamed to a temp file, not kept as cells
+    sheet = workbook.create_sheet("Periodo")
+    names = [name for name, _ in EXPORT_COLUMNS]
+    sheet.append(names)
+    count = 0
+    for page in pages:
+        for row in page:
+            sheet.append([row.get(name) for name in names])
+        count += len(page)
+    workbook.save(out)
+    return count
+
+
+def _write_parquet(pages, out):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    types = {"text": pa.string(), "bool": pa.bool_(), "number": pa.float64()}
+    schema = pa.schema([(name, types[kind]) for name, kind in EXPORT_COLUMNS])
+    count = 0
+    with pq.ParquetWriter(out, schema) as writer:
+        for page in pages:
+            columns = []
+            for name, kind in EXPORT_COLUMNS:
+                values = [row.get(name) for row in page]
+                if kind == "text":
+                    values = [None if v is None else str(v) for v in values]
+                columns.append(pa.array(values, type=types[kind]))
+            writer.write_table(pa.Table.from_arrays(columns, schema=schema))  # one row group per page
+            count += len(page)
+    return count
+
+
+_WRITERS = {"csv": _write_csv, "xlsx": _write_xlsx, "parquet": _write_parquet}
+
+
+def export_period(periodo_id, fmt="csv"):
+    """
+    Writes the period roster in the given format (see EXPORT_FORMATS).
+
+    Returns:
+        (success, result): result is (file, row_count) with the spooled file
+        rewound to the start (the caller closes it), or an error message.
+    """
+    if fmt not in _WRITERS:
+        return False, f"Formato no soportado: {fmt}"
+
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES, mode="w+b")
+    try:
+        columns = ", ".join(name for name, _ in EXPORT_COLUMNS)
+        count = _WRITERS[fmt](iter_period_pages(periodo_id, columns), out)
+    except ImportError as e:
+        out.close()
+        return False, f"El formato {EXPORT_FORMATS[fmt][0]} no está disponible en este servidor ({e.name})."
+    except Exception as e:
+        out.close()
+        return False, f"Error al exportar el periodo: {e}"
+    out.seek(0)
+    return True, (out, count)
@@ -0,0 +1,189 @@
+import os
+import pandas as pd
+from src.db_connection import get_supabase_client
+from src.repository import get_carreras
+from src.utils.helpers import normalize_text
+
+# Bulk import of authorized students into lista_blanca (the gatekeeper of
+# render_login). The file is read in chunks, each chunk is validated with
+# vectorized pandas passes and then written with a single upsert request, so
+# only one chunk is ever in memory / in flight.
+WHITELIST_CHUNK_SIZE = int(os.environ.get("WHITELIST_CHUNK_SIZE", 500))
+
+REQUIRED_COLUMNS = ("matricula", "curp", "carrera", "nombre_completo")
+COLUMN_ALIASES = {"nombre": "nombre_completo", "alumno": "nombre_completo", "carrera_id": "carrera"}
+
+# Matriculas are kept as typed: login_alumno compares them exactly
+MATRICULA_PATTERN = r"^[A-Za-z0-9-]{4,20}$"
+CURP_PATTERN = r"^[A-Z][AEIOUX][A-Z]{2}\d{2}(?:0[1-9]|1[0-2])(?:0[1-9]|[12]\d|3[01])[HMX][A-Z]{2}[B-DF-HJ-NP-TV-Z]{3}[A-Z0-9]\d$"
+
+_PAGE_SIZE = 1000
+
+
+def _normalize_columns(df):
+    columns = [normalize_text(c).replace(" ", "_") for c in df.columns]
+    df.columns = [COLUMN_ALIASES.get(c, c) for c in columns]
+    return df
+
+
+def iter_whitelist_chunks(file, filename, chunk_size=WHITELIST_CHUNK_SIZE):
+    """
+    Yields (chunk_df, progress) pairs from a CSV or XLSX upload, where progress
+    is the fraction of the file read so far. All values are read as strings.
+    """
+    size = getattr(file, "size", None)
+    if filename.lower().endswith((".xlsx", ".xlsm")):
+        from openpyxl import load_workbook
+        sheet = load_workbook(file, read_only=True, data_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        header = [str(h or "") for h in header]
+        total = max((sheet.max_row or 1) - 1, 1)
+        read = 0
+        batch = []
+        for row in rows:
+            batch.append(["" if v is None else str(v) for v in row[:len(header)]])
+            if len(batch) == chunk_size:
+                read += len(batch)
+                yield _normalize_columns(pd.DataFrame(batch, columns=header)), min(read / total, 1.0)
+                batch = []
+        if batch:
+            yield _normalize_columns(pd.DataFrame(batch, columns=header)), 1.0
+    else:
+        reader = pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=chunk_size, encoding="utf-8-sig")
+        for chunk in reader:
+            progress = min(file.tell() / size, 1.0) if size else None
+            yield _normalize_columns(chunk), progress
+
+
+def _career_keys():
+    """Maps normalized career names and ids to the career id as text."""
+    keys = {}
+    for career in get_carreras():
+        keys[normalize_text(career["nombre"])] = str(career["id"])
+        keys[str(career["id"])] = str(career["id"])
+    return keys
+
+
+def _fetch_existing():
+    """Returns {"matricula|carrera_id": "curp|nombre_completo"} for the whole whitelist."""
+    supabase = get_supabase_client()
+    existing = {}
+    start = 0
+    while True:
+        res = supabase.table("lista_blanca").select("matricula, carrera_id, curp, nombre_completo").order("matricula").order("carrera_id").range(start, start + _PAGE_SIZE - 1).execute()
+        rows = res.data or []
+        for row in rows:
+            existing[f"{row['matricula']}|{row['carrera_id']}"] = f"{row.get('curp') or ''}|{row.get('nombre_completo') or ''}"
+        if len(rows) < _PAGE_SIZE:
+            return existing
+        start += _PAGE_SIZE
+
+
+def validate_chunk(df, career_keys, seen, first_row=2):
+    """
+    Validates one chunk in vectorized passes.
+
+    Args:
+        df: chunk with normalized columns.
+        career_keys: output of _career_keys().
+        seen: set of "matricula|carrera_id" keys already accepted from earlier
+            chunks; updated in place.
+        first_row: spreadsheet row number of the chunk's first record.
+
+    Returns:
+        (valid, errors): valid rows with matricula, curp, nombre_completo,
+        carrera_key (career id as text), key and content columns; errors
+        with fila, the original values and a Spanish error message.
+    """
+    df = df.reset_index(drop=True)
+    values = pd.DataFrame({col: df[col].fillna("").astype(str).str.strip() for col in REQUIRED_COLUMNS})
+    values["curp"] = values["curp"].str.upper()
+    values["nombre_completo"] = values["nombre_completo"].str.split().str.join(" ")
+
+    career_names = values["carrera"].str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+    values["carrera_key"] = career_names.str.lower().str.split().str.join(" ").map(career_keys)
+    values["key"] = values["matricula"] + "|" + values["carrera_key"].fillna("")
+    values["content"] = values["curp"] + "|" + values["nombre_completo"]
+
+    error = pd.Series("", index=values.index)
+
+    def flag(mask, message):
+        error[mask & (error == "")] = message
+
+    flag(~values["matricula"].str.match(MATRICULA_PATTERN), "Matrícula vacía o con formato inválido")
+    flag(~values["curp"].str.match(CURP_PATTERN), "CURP con formato inválido")
+    flag(values["carrera_key"].isna(), "Carrera no reconocida")
+    flag(values["nombre_completo"] == "", "Nombre vacío")
+    # Only rows valid so far compete for a key, so a rejected row never shadows a good one
+    flag(values["key"].isin(seen) | values["key"].where(error == "").duplicated(), "Matrícula duplicada en el archivo")
+
+    ok = error == ""
+    seen.update(values.loc[ok, "key"])
+
+    errors = values.loc[~ok, list(REQUIRED_COLUMNS)].copy()
+    errors.insert(0, "fila", errors.index + first_row)
+    errors["error"] = error[~ok]
+    return values.loc[ok], errors
+
+
+def import_whitelist(file, filename, on_progress=None, chunk_size=WHITELIST_CHUNK_SIZE):
+    """
+    Imports a CSV/XLSX of authorized students into lista_blanca.
+
+    Rows already present with the same CURP and name are skipped; new and
+    changed rows are upserted on (matricula, carrera_id), one request per chunk.
+    `on_progress(fraction, summary)` is called after every chunk.
+
+    Returns:
+        (success, result): result is a summary dict (read, inserted, updated,
+        unchanged, rejected, errors DataFrame) or an error message. On a failed
+        write the summary so far is kept in the message.
+    """
+    career_keys = _career_keys()
+    career_ids = {str(c["id"]): c["id"] for c in get_carreras()}
+    supabase = get_supabase_client()
+    summary = {"read": 0, "inserted": 0, "updated": 0, "unchanged": 0, "rejected": 0}
+    error_frames = []
+    seen = set()
+
+    try:
+        existing = _fetch_existing()
+        for chunk, progress in iter_whitelist_chunks(file, filename, chunk_size):
+            missing = [c for c in REQUIRED_COLUMNS if c not in chunk.columns]
+            if missing:
+                return False, f"Faltan columnas en el archivo: {', '.join(missing)}"
+
+            first_row = summary["read"] + 2  # 1-based plus header row
+            summary["read"] += len(chunk)
+            valid, errors = validate_chunk(chunk, career_keys, seen, first_row)
+            if not errors.empty:
+                error_frames.append(errors)
+                summary["rejected"] += len(errors)
+
+            current = valid["key"].map(existing)
+            is_new = current.isna()
+            unchanged = current == valid["content"]
+            pending = valid[~unchanged]
+
+            if not pending.empty:
+                records = [
+                    {"matricula": m, "curp": c, "nombre_completo": n, "carrera_id": career_ids[k]}
+                    for m, c, n, k in zip(pending["matricula"], pending["curp"], pending["nombre_completo"], pending["carrera_key"])
+                ]
+                supabase.table("lista_blanca").upsert(records, on_conflict="matricula,carrera_id").execute()
+                existing.update(zip(pending["key"], pending["content"]))
+
+            summary["inserted"] += int(is_new.sum())
+            summary["updated"] += int((~is_new & ~unchanged).sum())
+            summary["unchanged"] += int(unchanged.sum())
+            if on_progress:
+                on_progress(progress, summary)
+    except Exception as e:
+        done = f"{summary['inserted']} nuevos y {summary['updated']} actualizados antes del error"
+        return False, f"Error al importar la lista blanca ({done}): {e}"
+
+    summary["errors"] = pd.concat(error_frames, ignore_index=True) if error_frames else pd.DataFrame(columns=["fila", *REQUIRED_COLUMNS, "error"])
+    return True, summary
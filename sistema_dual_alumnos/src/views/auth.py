@@ -1,7 +1,9 @@
 import streamlit as st
-import time
 import hashlib
 from src.db_connection import get_supabase_client
+from src.repository import get_carreras, get_ue_name
+from src.utils.db_actions import login_student
+from src.utils.admission import acquire_admission
 from src.components.login_ui import get_login_css, get_login_header
 
 def render_login():
@@ -14,11 +16,7 @@ def render_login():
     
     try:
         supabase = get_supabase_client()
-        res_carreras = supabase.table("carreras").select("id, nombre").execute()
-        if res_carreras.data:
-            carreras_data = res_carreras.data
-            carreras_data.sort(key=lambda x: x["nombre"])
-            carreras_options = {c["nombre"]: c["id"] for c in carreras_data}
+        carreras_options = {c["nombre"]: c["id"] for c in get_carreras()}
     except Exception as e:
         fetch_error = f"Error conectando a la base de datos: {e}"
     
@@ -56,96 +54,82 @@ def render_login():
                     elif not selected_career_id:
                          st.error("Seleccione su carrera.")
                     else:
-                        try:
-                            # 1. ALWAYS Verify Lista Blanca FIRST (Gatekeeper Rule)
-                            res_wb = supabase.table("lista_blanca").select("*").eq("matricula", matricula).eq("carrera_id", selected_career_id).execute()
+                        # Admission control: rate limit per session and global cap on concurrent logins
+                        ticket = acquire_admission("login")
+                        if not ticket.admitted:
+                            st.warning(ticket.message)
+                        else:
+                            try:
+                                # Whitelist (Gatekeeper Rule), student record and re-enrollment check in one request
+                                try:
+                                    result = login_student(matricula, curp, selected_career_id)
+                                finally:
+                                    ticket.release()
+                                status = result.get("status")
+                                student = result.get("alumno")
+                                wb_name = result.get("nombre_lista_blanca") or ""
                             
-                            if not res_wb.data:
-                                st.error("Matrícula no autorizada para la carrera seleccionada.")
-                                st.info("Si eres alumno de re-ingreso o de primera vez, tu coordinador DUAL debe agregarte primero a la Lista Blanca de este periodo.")
-                            else:
-                                wb_entry = res_wb.data[0]
-                                wb_curp = wb_entry.get("curp")
-                                wb_name = wb_entry.get("nombre_completo", "")
-                                
-                                # Validate CURP against whitelist if provided
-                                if wb_curp and curp.strip().upper() != wb_curp.strip().upper():
+                                if status == "not_whitelisted":
+                                    st.error("Matrícula no autorizada para la carrera seleccionada.")
+                                    st.info("Si eres alumno de re-ingreso o de primera vez, tu coordinador DUAL debe agregarte primero a la Lista Blanca de este periodo.")
+                                elif status == "curp_mismatch":
                                     st.error("La CURP ingresada no coincide con el registro autorizado.")
-                                else:
-                                    # 2. Check if student already exists in the main `alumnos` table
-                                    res_alumno = supabase.table("alumnos").select("*").eq("matricula", matricula).execute()
-                                    
-                                    if res_alumno.data:
-                                        student = res_alumno.data[0]
-                                        # Password verification for returning students
-                                        if student.get("curp") != curp:
-                                            st.error("CURP incorrecta.")
-                                        else:
-                                            # Validate re-enrollment logic
-                                            from src.utils.db_actions import get_active_period_id
-                                            periodo_id = get_active_period_id()
-                                            
-                                            needs_reenrollment = False
-                                            if periodo_id:
-                                                res_insc = supabase.table("inscripciones_asignaturas").select("id").eq("alumno_id", student["id"]).eq("periodo_id", periodo_id).execute()
-                                                if not res_insc.data:
-                                                    needs_reenrollment = True
-                                            
-                                            if needs_reenrollment:
-                                                st.session_state["registro_step"] = 1
-                                                st.session_state["user"] = student
-                                                st.session_state["authenticated"] = False
-                                                st.session_state["showing_registro"] = True
-                                                st.session_state["role"] = "student_register"
-                                                st.session_state["selected_career"] = selected_career_name
-                                                st.session_state["selected_career_id"] = selected_career_id
-                                                
-                                                st.info(f"Hola {student.get('nombre', '')}, fuiste autorizado para reinscripción. Procederemos a tu carga académica.")
-                                                time.sleep(1.5)
-                                                st.rerun()
-                                            else:
-                                                st.session_state["authenticated"] = True
-                                                st.session_state["user"] = student
-                                                st.session_state["role"] = "student"
-                                                st.session_state["selected_career"] = selected_career_name
-                                                st.session_state["selected_career_id"] = selected_career_id
-                                                st.success(f"Bienvenido al Portal DUAL - {selected_career_name}")
-                                                time.sleep(1)
-                                                st.rerun()
+                                elif status == "wrong_curp":
+                                    st.error("CURP incorrecta.")
+                                elif status == "needs_reenrollment":
+                                    st.session_state["registro_step"] = 1
+                                    st.session_state["user"] = student
+                                    st.session_state["authenticated"] = False
+                                    st.session_state["showing_registro"] = True
+                                    st.session_state["role"] = "student_register"
+                                    st.session_state["selected_career"] = selected_career_name
+                                    st.session_state["selected_career_id"] = selected_career_id
+                                
+                                    st.toast(f"Hola {student.get('nombre', '')}, fuiste autorizado para reinscripción. Procederemos a tu carga académica.")
+                                    st.rerun()
+                                elif status == "ok":
+                                    st.session_state["authenticated"] = True
+                                    st.session_state["user"] = student
+                                    st.session_state["role"] = "student"
+                                    st.session_state["selected_career"] = selected_career_name
+                                    st.session_state["selected_career_id"] = selected_career_id
+                                    st.toast(f"Bienvenido al Portal DUAL - {selected_career_name}")
+                                    st.rerun()
+                                elif status == "new_student":
+                                    # First-time registration (But authorized in Whitelist)
+                                    parts = wb_name.split()
+                                    npm, npp, nname = "", "", ""
+                                
+                                    if len(parts) >= 3:
+                                        npm = parts[-1]
+                                        npp = parts[-2]
+                                        nname = " ".join(parts[:-2])
+                                    elif len(parts) == 2:
+                                        npp = parts[-1]
+                                        nname = parts[0]
                                     else:
-                                        # 3. First-time registration (But authorized in Whitelist)
-                                        parts = wb_name.split()
-                                        npm, npp, nname = "", "", ""
-                                        
-                                        if len(parts) >= 3:
-                                            npm = parts[-1]
-                                            npp = parts[-2]
-                                            nname = " ".join(parts[:-2])
-                                        elif len(parts) == 2:
-                                            npp = parts[-1]
-                                            nname = parts[0]
-                                        else:
-                                            nname = wb_name
-                                        
-                                        st.session_state["registro_step"] = 1
-                                        st.session_state["user"] = {
-                                            "matricula": matricula, 
-                                            "curp": curp,
-                                            "nombre": nname,
-                                            "ap_paterno": npp,
-                                            "ap_materno": npm
-                                        }
-                                        st.session_state["authenticated"] = False
-                                        st.session_state["showing_registro"] = True
-                                        st.session_state["role"] = "student_register"
-                                        st.session_state["selected_career"] = selected_career_name
-                                        st.session_state["selected_career_id"] = selected_career_id
-                                    
-                                        st.success(f"Matrícula validada. Bienvenido(a) {nname}, por favor completa tu preingreso.")
-                                        time.sleep(1.5)
-                                        st.rerun()
-                        except Exception as e:
-                            st.error(f"Error general en login: {e}")
+                                        nname = wb_name
+                                
+                                    st.session_state["registro_step"] = 1
+                                    st.session_state["user"] = {
+                                        "matricula": matricula, 
+                                        "curp": curp,
+                                        "nombre": nname,
+                                        "ap_paterno": npp,
+                                        "ap_materno": npm
+                                    }
+                                    st.session_state["authenticated"] = False
+                                    st.session_state["showing_registro"] = True
+                                    st.session_state["role"] = "student_register"
+                                    st.session_state["selected_career"] = selected_career_name
+                                    st.session_state["selected_career_id"] = selected_career_id
+                            
+                                    st.toast(f"Matrícula validada. Bienvenido(a) {nname}, por favor completa tu preingreso.")
+                                    st.rerun()
+                                else:
+                                    st.error("Respuesta inesperada del servidor de autenticación.")
+                            except Exception as e:
+                                st.error(f"Error general en login: {e}")
 
         with tab_mentor:
             st.markdown("### Portal Empresarial")
@@ -182,12 +166,11 @@ def render_login():
                                         st.session_state["role"] = "mentor_ue"
                                         
                                         # Get company name
-                                        res_ue = supabase.table("unidades_economicas").select("nombre_comercial").eq("id", mentor.get("ue_id")).execute()
-                                        if res_ue.data:
-                                             st.session_state["ue_name"] = res_ue.data[0]["nombre_comercial"]
+                                        ue_name = get_ue_name(mentor.get("ue_id"))
+                                        if ue_name:
+                                             st.session_state["ue_name"] = ue_name
                                              
-                                        st.success(f"Bienvenido(a) {mentor['nombre_completo']}")
-                                        time.sleep(1)
+                                        st.toast(f"Bienvenido(a) {mentor['nombre_completo']}")
                                         st.rerun()
                                 else:
                                     st.error("Contraseña incorrecta.")
@@ -223,8 +206,7 @@ def render_login():
                                     st.session_state["authenticated"] = True
                                     st.session_state["user"] = mentor_ie
                                     st.session_state["role"] = "mentor_ie"
-                                    st.success(f"Bienvenido(a) Profesor(a) {mentor_ie['nombre_completo']}")
-                                    time.sleep(1)
+                                    st.toast(f"Bienvenido(a) Profesor(a) {mentor_ie['nombre_completo']}")
                                     st.rerun()
                                 else:
                                     st.error("Contraseña incorrecta.")
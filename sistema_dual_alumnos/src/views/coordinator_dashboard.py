@@ -0,0 +1,265 @@
+import os
+import streamlit as st
+import pandas as pd
+from src.components.cards import get_card_html
+from src.db_connection import get_supabase_client
+from src.repository import get_periodos, get_active_period, get_carreras
+from src.utils.period_export import export_period, EXPORT_FORMATS
+from src.utils.grade_engine import export_actas, UE_WEIGHT, IE_WEIGHT
+from src.utils.document_generator import generate_documents_zip
+from src.utils.curricular_loader import load_curricular_map, CURRICULAR_COLUMNS
+from src.utils.whitelist_import import import_whitelist, REQUIRED_COLUMNS
+
+# The summary is aggregated in SQL (rpc resumen_coordinacion) and only changes
+# as students register or get graded, so a short TTL is enough.
+COORDINATOR_SUMMARY_TTL = int(os.environ.get("COORDINATOR_SUMMARY_TTL", 60))
+
+@st.cache_data(ttl=COORDINATOR_SUMMARY_TTL, show_spinner=False)
+def load_coordinator_summary(periodo_id):
+    """Returns the period overview computed by the database in one request."""
+    res = get_supabase_client().rpc("resumen_coordinacion", {"p_periodo_id": periodo_id}).execute()
+    return res.data or {}
+
+def _distribution_frame(rows, width, top):
+    """Builds a 'rango' -> alumnos frame with every bucket present (empty ones as 0)."""
+    counts = {r["desde"]: r["alumnos"] for r in rows}
+    labels = [f"{start}-{min(start + width, top)}" for start in range(0, top, width)]
+    return pd.DataFrame(
+        {"alumnos": [counts.get(start, 0) for start in range(0, top, width)]},
+        index=pd.Index(labels, name="rango"),
+    )
+
+def render_whitelist_import():
+    """Bulk load of authorized students (lista_blanca) from CSV/XLSX."""
+    st.markdown("### Importar Lista Blanca")
+    st.caption(f"Columnas requeridas: {', '.join(REQUIRED_COLUMNS)}. La carrera puede indicarse por nombre o por ID.")
+
+    uploaded = st.file_uploader("Archivo CSV o Excel", type=["csv", "xlsx"], key="whitelist_file")
+    if uploaded is None or not st.button("Importar", key="whitelist_import", type="primary"):
+        result = st.session_state.get("whitelist_import_result")
+    else:
+        progress_bar = st.progress(0.0, text="Validando y cargando registros...")
+
+        def on_progress(fraction, summary):
+            text = f"{summary['read']} filas procesadas"
+            progress_bar.progress(fraction if fraction is not None else 0.0, text=text)
+
+        success, result = import_whitelist(uploaded, uploaded.name, on_progress)
+        progress_bar.empty()
+        if not success:
+            st.error(result)
+            return
+        st.session_state["whitelist_import_result"] = result
+
+    if not result:
+        return
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Nuevos", result["inserted"])
+    c2.metric("Actualizados", result["updated"])
+    c3.metric("Sin cambios", result["unchanged"])
+    c4.metric("Rechazados", result["rejected"])
+    if result["rejected"]:
+        st.warning(f"{result['rejected']} filas no se importaron. Descarga el reporte para corregirlas.")
+        st.download_button(
+            "Descargar reporte de errores",
+            result["errors"].to_csv(index=False).encode("utf-8-sig"),
+            file_name="errores_lista_blanca.csv",
+            mime="text/csv",
+            key="whitelist_errors",
+        )
+
+def render_curricular_map_loader():
+    """Loads a career's curricular map (asignaturas, competencias, actividades, maestros)."""
+    st.markdown("### Cargar Mapa Curricular")
+    st.caption(f"Una fila por actividad con las columnas: {', '.join(CURRICULAR_COLUMNS)}. "
+               "clave_maestro admite varias claves separadas por coma.")
+
+    carreras = get_carreras()
+    career_options = {c["nombre"]: c["id"] for c in carreras}
+    career_name = st.selectbox("Carrera", list(career_options.keys()), key="curricular_career")
+    uploaded = st.file_uploader("Mapa curricular (CSV o Excel)", type=["csv", "xlsx"], key="curricular_file")
+
+    if uploaded is not None and career_name and st.button("Cargar mapa", key="curricular_load", type="primary"):
+        with st.spinner("Cargando mapa curricular..."):
+            success, result = load_curricular_map(uploaded, uploaded.name, career_options[career_name])
+        if not success:
+            st.error(result)
+            return
+        st.success("Mapa curricular cargado.")
+        st.dataframe(pd.DataFrame(result["tables"]).T, use_container_width=True)
+        for warning in result["warnings"]:
+            st.warning(warning)
+
+def render_period_export(periodo_id, period_name):
+    """Builds the period roster file on demand and offers it for download."""
+    st.markdown("### Exportar Periodo")
+    st.caption("Una fila por asignatura inscrita, con datos del alumno, proyecto, unidad económica y mentores.")
+
+    labels = {label: fmt for fmt, (label, _, _) in EXPORT_FORMATS.items()}
+    fmt = labels[st.radio("Formato", list(labels.keys()), horizontal=True, key="export_format")]
+
+    if st.button("Generar archivo", key="export_generate"):
+        with st.spinner("Generando archivo..."):
+            success, result = export_period(periodo_id, fmt)
+        if not success:
+            st.error(result)
+            return
+        out, count = result
+        with out:
+            data = out.read()
+        _, extension, mime = EXPORT_FORMATS[fmt]
+        st.success(f"{count} registros exportados.")
+        st.download_button(
+            "Descargar",
+            data,
+            file_name=f"periodo_{period_name}.{extension}".replace(" ", "_"),
+            mime=mime,
+            key="export_download",
+        )
+
+def render_actas_export(periodo_id, period_name):
+    """Computes final grades and offers every acta of the period in one workbook."""
+    st.markdown("### Actas de Calificaciones")
+    st.caption(f"Calificación final = {UE_WEIGHT:.0%} Unidad Económica + {IE_WEIGHT:.0%} Institución, "
+               "aplicada a los parciales cursados en modalidad DUAL. Una hoja por asignatura, grupo y docente.")
+    if st.button("Generar actas", key="actas_generate"):
+        with st.spinner("Calculando calificaciones..."):
+            success, result = export_actas(periodo_id)
+        if not success:
+            st.error(result)
+            return
+        out, groups = result
+        with out:
+            data = out.read()
+        st.success(f"{groups} actas generadas.")
+        st.download_button(
+            "Descargar actas (Excel)",
+            data,
+            file_name=f"actas_{period_name}.xlsx".replace(" ", "_"),
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key="actas_download",
+        )
+
+def render_documents_batch(periodo_id, period_name):
+    """Generates Anexo 5.1 and Carta de Asignación for the whole period or one career."""
+    st.markdown("### Documentos DUAL")
+    st.caption("Genera el Anexo 5.1 y la Carta de Asignación de todos los alumnos en un archivo ZIP.")
+
+    career_options = {"Todas las carreras": None}
+    career_options.update({c["nombre"]: c["id"] for c in get_carreras()})
+    career_name = st.selectbox("Carrera", list(career_options.keys()), key="docs_career")
+    include_pdf = st.checkbox("Incluir PDF", key="docs_pdf")
+
+    if st.button("Generar documentos", key="docs_generate"):
+        with st.spinner("Generando documentos..."):
+            success, result = generate_documents_zip(periodo_id, career_options[career_name], include_pdf)
+        if not success:
+            st.error(result)
+            return
+        out, count = result
+        with out:
+            data = out.read()
+        st.success(f"{count} documentos generados.")
+        st.download_button(
+            "Descargar documentos (ZIP)",
+            data,
+            file_name=f"documentos_{period_name}.zip".replace(" ", "_"),
+            mime="application/zip",
+            key="docs_download",
+        )
+
+def render_coordinator_dashboard():
+    st.title("Panel de Coordinación DUAL")
+    st.markdown("---")
+
+    periodos = get_periodos()
+    if not periodos:
+        st.warning("No hay periodos registrados.")
+        return
+
+    active = get_active_period()
+    period_names = [p["nombre"] for p in periodos]
+    default_index = period_names.index(active["nombre"]) if active and active["nombre"] in period_names else 0
+
+    c_period, c_refresh = st.columns([4, 1])
+    with c_period:
+        period_name = st.selectbox("Periodo", period_names, index=default_index, key="coord_period")
+    with c_refresh:
+        st.write("")
+        if st.button("🔄 Actualizar", key="coord_refresh"):
+            load_coordinator_summary.clear()
+    periodo_id = periodos[period_names.index(period_name)]["id"]
+
+    try:
+        summary = load_coordinator_summary(periodo_id)
+    except Exception as e:
+        st.error(f"Error al cargar el resumen del periodo: {e}")
+        return
+
+    totales = summary.get("totales") or {}
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.markdown(get_card_html("Alumnos Registrados", totales.get("proyectos", 0), "fas fa-users"), unsafe_allow_html=True)
+    with col2:
+        st.markdown(get_card_html("Sin Mentor IE", totales.get("sin_mentor_ie", 0), "fas fa-user-slash", color="#a48857"), unsafe_allow_html=True)
+    with col3:
+        st.markdown(get_card_html("Evaluados UE", totales.get("evaluados_ue", 0), "fas fa-industry"), unsafe_allow_html=True)
+    with col4:
+        st.markdown(get_card_html("Evaluados IE", totales.get("evaluados_ie", 0), "fas fa-school", color="#a48857"), unsafe_allow_html=True)
+
+    tab_reg, tab_pending, tab_load, tab_grades, tab_export, tab_docs, tab_whitelist, tab_curricular = st.tabs(
+        ["Registros", "Sin Mentor IE", "Carga de Mentores", "Calificaciones", "Exportar", "Documentos", "Lista Blanca", "Mapa Curricular"]
+    )
+
+    with tab_reg:
+        registros = summary.get("registros") or []
+        if registros:
+            df = pd.DataFrame(registros).pivot_table(
+                index="carrera", columns="semestre", values="alumnos", aggfunc="sum", fill_value=0
+            )
+            st.bar_chart(df)
+            df["Total"] = df.sum(axis=1)
+            st.dataframe(df, use_container_width=True)
+        else:
+            st.info("No hay alumnos registrados en este periodo.")
+
+    with tab_pending:
+        pendientes = summary.get("sin_mentor_ie") or []
+        if pendientes:
+            if totales.get("sin_mentor_ie", 0) > len(pendientes):
+                st.caption(f"Mostrando {len(pendientes)} de {totales['sin_mentor_ie']} alumnos.")
+            st.dataframe(pd.DataFrame(pendientes), use_container_width=True, hide_index=True)
+        else:
+            st.success("Todos los alumnos del periodo tienen Mentor IE asignado.")
+
+    with tab_load:
+        carga = summary.get("carga_mentores") or []
+        if carga:
+            df = pd.DataFrame(carga).set_index("mentor")
+            st.bar_chart(df["alumnos"])
+            st.dataframe(df, use_container_width=True)
+        else:
+            st.info("No hay mentores académicos registrados.")
+
+    with tab_grades:
+        c_ue, c_ie = st.columns(2)
+        with c_ue:
+            st.markdown("### Calificación UE (0-100)")
+            st.bar_chart(_distribution_frame(summary.get("distribucion_ue") or [], 10, 100))
+        with c_ie:
+            st.markdown("### Calificación IE (0-10)")
+            st.bar_chart(_distribution_frame(summary.get("distribucion_ie") or [], 1, 10))
+        st.markdown("---")
+        render_actas_export(periodo_id, period_name)
+
+    with tab_export:
+        render_period_export(periodo_id, period_name)
+
+    with tab_docs:
+        render_documents_batch(periodo_id, period_name)
+
+    with tab_whitelist:
+        render_whitelist_import()
+
+    with tab_curricular:
+        render_curricular_map_loader()
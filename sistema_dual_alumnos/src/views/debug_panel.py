@@ -0,0 +1,51 @@
+import streamlit as st
+import pandas as pd
+from src.instrumentation import get_query_stats, get_recent_queries, reset_query_stats, render_prometheus
+from src.repository import get_cache_stats
+from src.utils.admission import get_admission_stats
+from src.utils.pdf_converter import get_converter_stats
+from src.utils.email_outbox import get_outbox_stats
+
+def render_debug_panel():
+    """Renders the query diagnostics panel in the sidebar (coordinators only)."""
+    if st.session_state.get("role") != "coordinator":
+        return
+
+    with st.sidebar.expander("🛠️ Diagnóstico de Consultas"):
+        stats = get_query_stats()
+        if stats:
+            df = pd.DataFrame(stats)
+            st.metric("Consultas totales", int(df["calls"].sum()))
+            st.dataframe(df.sort_values("calls", ascending=False), use_container_width=True, hide_index=True)
+        else:
+            st.caption("Sin consultas registradas todavía.")
+
+        cache = get_cache_stats()
+        st.write(f"**Caché de catálogos:** {cache['hits']} aciertos / {cache['misses']} fallos ({cache['hit_ratio']:.0%}), {cache['coalesced']} lecturas agrupadas")
+
+        admission = get_admission_stats()
+        st.write(f"**Control de admisión:** {admission['in_flight']}/{admission['max_concurrent']} en curso")
+        if admission["actions"]:
+            st.dataframe(pd.DataFrame(admission["actions"]).T, use_container_width=True)
+
+        pdf = get_converter_stats()
+        if pdf:
+            st.write(f"**Conversión PDF:** {pdf['converted']} convertidos, {pdf['failed']} fallidos, "
+                     f"cola {pdf['queue_depth']}, {pdf['busy_workers']}/{pdf['workers']} ocupados, "
+                     f"{pdf['restarts']} reinicios, {pdf['docs_per_second']} docs/s por worker")
+
+        outbox = get_outbox_stats()
+        if outbox["running"]:
+            st.write(f"**Correo (outbox):** {outbox['delivered']} enviados, {outbox['retried']} reintentos programados, "
+                     f"{outbox['dead_lettered']} fallidos definitivos, {outbox['lease_lost']} reclamados por otro worker, "
+                     f"{outbox['errors']} errores del worker")
+
+        if st.checkbox("Ver últimas consultas", key="debug_recent_queries"):
+            recent = get_recent_queries()[:50]
+            if recent:
+                st.dataframe(pd.DataFrame(recent), use_container_width=True, hide_index=True)
+
+        st.download_button("Descargar métricas (Prometheus)", render_prometheus(), file_name="dual_db_metrics.prom", mime="text/plain")
+        if st.button("Reiniciar contadores", key="debug_reset_stats"):
+            reset_query_stats()
+            st.rerun()
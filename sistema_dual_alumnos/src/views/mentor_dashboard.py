@@ -1,5 +1,8 @@
 import streamlit as st
 from src.db_connection import get_supabase_client
+from src.utils.db_actions import save_mentor_ue_evaluation, fetch_mentor_students_page
+from src.repository import get_periodos
+from src.components.student_list import render_student_list_filters, render_pagination, PAGE_SIZE
 from datetime import datetime
 import pandas as pd
 import io
@@ -21,39 +24,40 @@ def render_mentor_dashboard():
     st.write("### Estudiantes a tu cargo")
     st.info("Selecciona un estudiante para realizar su Evaluación Mensual (Anexo 5.4).")
     
-    supabase = get_supabase_client()
+    filters = render_student_list_filters("mentor_ue_list", get_periodos(), "Solo sin evaluar")
     
-    # Get active periods to filter students (Optional, but good practice)
-    # Using open query. Just get students assigned to this mentor
     try:
-        # We join proyectos_dual and alumnos
-        res_proyectos = supabase.table("proyectos_dual").select(
-            "id, nombre_proyecto, alumno_id, periodo_id, alumnos(matricula, nombre, ap_paterno, ap_materno, carrera_id), periodos(nombre)"
-        ).eq("mentor_ue_id", mentor["id"]).execute()
-        
-        proyectos = res_proyectos.data if res_proyectos.data else []
+        # One page of students, filtered server-side
+        proyectos, total = fetch_mentor_students_page(
+            "mentor_ue_id", mentor["id"], filters["search"], filters["periodo_id"], filters["pending_only"], filters["page"], PAGE_SIZE
+        )
         
-        if not proyectos:
-            st.warning("No tienes estudiantes asignados actualmente.")
-            return
+        if not total:
+            if filters["search"] or filters["periodo_id"] or filters["pending_only"]:
+                st.info("Ningún estudiante coincide con los filtros.")
+            else:
+                st.warning("No tienes estudiantes asignados actualmente.")
+                return
             
         # Display list of students
         for p in proyectos:
-            a = p["alumnos"]
-            student_name = f"{a['nombre']} {a['ap_paterno']} {a['ap_materno']}"
-            period_name = p["periodos"]["nombre"] if p.get("periodos") else "Actual"
+            student_name = f"{p['nombre']} {p['ap_paterno']} {p['ap_materno'] or ''}".strip()
+            period_name = p.get("periodo_nombre") or "Actual"
             
-            with st.expander(f"🎓 {student_name} - {a['matricula']}"):
+            with st.expander(f"🎓 {student_name} - {p['matricula']}"):
                 col1, col2 = st.columns([3, 1])
                 with col1:
                     st.write(f"**Proyecto:** {p['nombre_proyecto']}")
                     st.write(f"**Periodo:** {period_name}")
                 with col2:
-                    if st.button("Evaluar (Anexo 5.4)", key=f"eval_{p['alumno_id']}"):
+                    if st.button("Evaluar (Anexo 5.4)", key=f"eval_{p['id']}"):
                         # Redirect to evaluation form
                         st.session_state["evaluating_student_id"] = p["alumno_id"]
                         st.session_state["eval_project_id"] = p["id"]
                         st.rerun()
+        
+        if total:
+            render_pagination("mentor_ue_list", total, PAGE_SIZE)
                         
     except Exception as e:
         st.error(f"Error al cargar estudiantes: {e}")
@@ -63,65 +67,89 @@ def render_mentor_dashboard():
         st.markdown("---")
         render_evaluation_form()
 
+# Whole Anexo 5.4 tree in one request: project -> student -> enrollments -> subject
+# -> competencias -> actividades, already nested by PostgREST.
+EVALUATION_TREE_SELECT = (
+    "*, unidades_economicas(*), mentores_ue(*), periodos(*), "
+    "alumnos(*, inscripciones_asignaturas(periodo_id, "
+    "asignaturas(id, clave_asignatura, nombre, "
+    "asignatura_competencias(*, actividades_aprendizaje(*)))))"
+)
+
+def load_evaluation_data(project_id):
+    """
+    Fetches and shapes everything the evaluation form needs with a single
+    nested select. Returns None if the project does not exist, otherwise
+    {"project": ..., "alumno": ..., "asignaturas": [...], "competencias": [...]}
+    where each competencia carries its "actividades" list and "asignatura_nombre".
+    """
+    supabase = get_supabase_client()
+    res = supabase.table("proyectos_dual").select(EVALUATION_TREE_SELECT).eq("id", project_id).execute()
+    if not res.data:
+        return None
+
+    project_data = res.data[0]
+    alumno = project_data.get("alumnos") or {}
+    enrollments = alumno.pop("inscripciones_asignaturas", None) or []
+
+    asignaturas = {}
+    for item in enrollments:
+        subject = item.get("asignaturas")
+        if item.get("periodo_id") == project_data["periodo_id"] and subject:
+            asignaturas.setdefault(subject["id"], subject)
+
+    competencias = []
+    for subject in asignaturas.values():
+        for comp in subject.pop("asignatura_competencias", None) or []:
+            comp["asignatura_nombre"] = subject["nombre"]
+            comp["actividades"] = comp.pop("actividades_aprendizaje", None) or []
+            competencias.append(comp)
+    competencias.sort(key=lambda c: (c["asignatura_nombre"], c.get("numero_competencia") or 0))
+
+    return {"project": project_data, "alumno": alumno, "asignaturas": list(asignaturas.values()), "competencias": competencias}
+
+def close_evaluation():
+    """Leaves the evaluation form and drops its cached data."""
+    for key in ("evaluating_student_id", "eval_project_id", "eval_data_cache"):
+        st.session_state.pop(key, None)
+
 def render_evaluation_form():
     st.subheader("Evaluación Mensual del Estudiante (Anexo 5.4)")
-    student_id = st.session_state.get("evaluating_student_id")
     project_id = st.session_state.get("eval_project_id")
     
-    supabase = get_supabase_client()
-    
-    # 1. Fetch Student and Project info
-    try:
-        res_proj = supabase.table("proyectos_dual").select(
-            "*, alumnos(*), unidades_economicas(*), mentores_ue(*), periodos(*)"
-        ).eq("id", project_id).execute()
-        
-        if not res_proj.data:
-            st.error("No se encontró la información del proyecto.")
-            if st.button("Volver"):
-                del st.session_state["evaluating_student_id"]
-                st.rerun()
-            return
-            
-        project_data = res_proj.data[0]
-        alumno = project_data["alumnos"]
-        carrera_id = alumno["carrera_id"]
-        
-        # 2. Fetch Assigned Subjects directly related to this student's current period
-        # But DUAL system might just fetch all enrolled subjects for the period
-        res_insc = supabase.table("inscripciones_asignaturas").select(
-             "asignaturas(id, clave_asignatura, nombre)"
-        ).eq("alumno_id", student_id).eq("periodo_id", project_data["periodo_id"]).execute()
-        
-        if not res_insc.data:
-            st.warning("El estudiante no tiene asignaturas registradas en este periodo. No se pueden cargar competencias.")
-            if st.button("Volver"):
-                del st.session_state["evaluating_student_id"]
-                st.rerun()
+    # Cached for the life of the evaluation session: radio clicks do not refetch
+    cache = st.session_state.get("eval_data_cache")
+    if not cache or cache.get("project_id") != project_id:
+        try:
+            cache = {"project_id": project_id, "data": load_evaluation_data(project_id)}
+        except Exception as e:
+            st.error(f"Error cargando datos de evaluación: {e}")
             return
-            
-        asignatura_ids = [item["asignaturas"]["id"] for item in res_insc.data if item.get("asignaturas")]
-        
-        # 3. Fetch Competencias and Actividades for those subjects
-        res_comp = supabase.table("asignatura_competencias").select(
-             "*, asignaturas(nombre)"
-        ).in_("asignatura_id", asignatura_ids).execute()
-        
-        competencias = res_comp.data if res_comp.data else []
+        st.session_state["eval_data_cache"] = cache
+    eval_tree = cache["data"]
+
+    if not eval_tree:
+        st.error("No se encontró la información del proyecto.")
+        if st.button("Volver"):
+            close_evaluation()
+            st.rerun()
+        return
         
-        if not competencias:
-            st.warning("Las asignaturas del estudiante no tienen competencias registradas en el mapa curricular.")
-            if st.button("Volver"):
-                del st.session_state["evaluating_student_id"]
-                st.rerun()
-            return
-            
-        competencia_ids = [c["id"] for c in competencias]
-        res_act = supabase.table("actividades_aprendizaje").select("*").in_("competencia_id", competencia_ids).execute()
-        actividades = res_act.data if res_act.data else []
+    alumno = eval_tree["alumno"]
+    competencias = eval_tree["competencias"]
+    
+    if not eval_tree["asignaturas"]:
+        st.warning("El estudiante no tiene asignaturas registradas en este periodo. No se pueden cargar competencias.")
+        if st.button("Volver"):
+            close_evaluation()
+            st.rerun()
+        return
         
-    except Exception as e:
-        st.error(f"Error cargando datos de evaluación: {e}")
+    if not competencias:
+        st.warning("Las asignaturas del estudiante no tienen competencias registradas en el mapa curricular.")
+        if st.button("Volver"):
+            close_evaluation()
+            st.rerun()
         return
 
     st.write(f"**Evaluando a:** {alumno['nombre']} {alumno['ap_paterno']} {alumno['ap_materno']}")
@@ -132,12 +160,14 @@ def render_evaluation_form():
     with st.form("eval_form"):
         # We will collect grades in a dictionary: act_id -> grade (0, 70, 80, 90, 100)
         eval_data = {}
+        # Per-activity rows persisted in evaluaciones_ue_actividades
+        eval_rows = []
         
         for comp in competencias:
             st.markdown(f"#### Competencia {comp['numero_competencia']}: {comp['descripcion_competencia']}")
-            st.caption(f"Asignatura: {comp['asignaturas']['nombre']}")
+            st.caption(f"Asignatura: {comp['asignatura_nombre']}")
             
-            comp_acts = [a for a in actividades if a["competencia_id"] == comp["id"]]
+            comp_acts = comp["actividades"]
             
             if not comp_acts:
                  st.info("Sin actividades registradas para esta competencia.")
@@ -158,6 +188,7 @@ def render_evaluation_form():
                          key=f"grade_{act['id']}"
                      )
                      eval_data[act['id']] = grade
+                     eval_rows.append({"actividad_id": act["id"], "competencia_id": comp["id"], "calificacion": grade})
             st.markdown("---")
             
         # Common fields
@@ -174,30 +205,26 @@ def render_evaluation_form():
             if not mes_evaluado:
                  st.error("Por favor ingrese el Mes Evaluado.")
             else:
-                 # Calculate Average
-                 total_grade = sum(eval_data.values())
-                 count_acts = len(eval_data)
-                 average = int(total_grade / count_acts) if count_acts > 0 else 0
+                 # Header + every activity grade in one request; aggregates are maintained server-side
+                 success, result = save_mentor_ue_evaluation(
+                     project_id, st.session_state["user"]["id"], mes_evaluado, int(numero_reporte), eval_rows
+                 )
                  
-                 try:
-                     supabase.table("proyectos_dual").update({"calificacion_ue": average}).eq("id", project_id).execute()
-                     st.success(f"Evaluación guardada exitosamente. Promedio preliminar: {average}%")
+                 if success:
+                     st.success(f"Evaluación guardada exitosamente. Promedio del reporte: {float(result['promedio_reporte']):.0f}% | Promedio acumulado: {float(result['promedio_proyecto']):.0f}%")
                      
                      st.info("La evaluación ha sido enviada a la Coordinación DUAL. El documento oficial será generado y enviado a su correo en los próximos días hábiles.")
                      
                      # Deselect the student after evaluation
                      import time
                      time.sleep(3)
-                     del st.session_state["evaluating_student_id"]
-                     del st.session_state["eval_project_id"]
+                     close_evaluation()
                      st.rerun()
-
-                 except Exception as e:
-                     st.error(f"Error al guardar calificación en base de datos: {e}")
+                 else:
+                     st.error(f"Error al guardar calificación en base de datos: {result}")
 
     if st.button("Cancelar / Volver"):
-         del st.session_state["evaluating_student_id"]
-         del st.session_state["eval_project_id"]
+         close_evaluation()
          st.rerun()
 
 
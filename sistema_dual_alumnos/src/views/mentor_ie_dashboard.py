@@ -1,5 +1,8 @@
 import streamlit as st
 from src.db_connection import get_supabase_client
+from src.utils.db_actions import save_mentor_ie_grades, fetch_mentor_students_page
+from src.repository import get_periodos
+from src.components.student_list import render_student_list_filters, render_pagination, PAGE_SIZE
 
 def render_mentor_ie_dashboard():
     user = st.session_state.get('user', {})
@@ -14,21 +17,37 @@ def render_mentor_ie_dashboard():
         
     supabase = get_supabase_client()
     
-    # 1. Fetch Students assigned to this Mentor IE
-    res_students = supabase.table("proyectos_dual").select(
-        "id, nombre_proyecto, calificacion_ie, alumnos(id, matricula, nombre, ap_paterno)"
-    ).eq("mentor_ie_id", user["id"]).execute()
+    # 1. Fetch one page of Students assigned to this Mentor IE (filtered server-side)
+    filters = render_student_list_filters("mentor_ie_list", get_periodos(), "Solo pendientes")
+    projects, total = fetch_mentor_students_page(
+        "mentor_ie_id", user["id"], filters["search"], filters["periodo_id"], filters["pending_only"], filters["page"], PAGE_SIZE
+    )
     
-    if not res_students.data:
-        st.info("Actualmente no tienes estudiantes DUAL asignados.")
+    if not total:
+        if filters["search"] or filters["periodo_id"] or filters["pending_only"]:
+            st.info("Ningún estudiante coincide con los filtros.")
+        else:
+            st.info("Actualmente no tienes estudiantes DUAL asignados.")
         return
         
-    projects = res_students.data
-    st.subheader(f"Tus Estudiantes Asignados ({len(projects)})")
+    st.subheader(f"Tus Estudiantes Asignados ({total})")
+    
+    # Fetch the subjects of every listed student in one request and group them
+    # by (alumno_id, periodo_id): the list can span periods, and each project
+    # only shows the enrollment of its own period
+    alumno_ids = list({p["alumno_id"] for p in projects})
+    periodo_ids = list({p["periodo_id"] for p in projects if p.get("periodo_id") is not None})
+    subs_by_project = {}
+    if alumno_ids and periodo_ids:
+        res_subs = supabase.table("inscripciones_asignaturas").select(
+            "id, alumno_id, periodo_id, calificacion_ie_materia, descripcion_actividades, asignaturas(nombre, clave_asignatura)"
+        ).in_("alumno_id", alumno_ids).in_("periodo_id", periodo_ids).execute()
+        for s in res_subs.data or []:
+            subs_by_project.setdefault((s["alumno_id"], s["periodo_id"]), []).append(s)
     
     # Display each student in an expander
     for proj in projects:
-        alumno = proj.get("alumnos", {})
+        alumno = {"id": proj["alumno_id"], "matricula": proj.get("matricula"), "nombre": proj.get("nombre"), "ap_paterno": proj.get("ap_paterno")}
         nombre_completo = f"{alumno.get('nombre', '')} {alumno.get('ap_paterno', '')}"
         matricula = alumno.get('matricula', 'S/N')
         global_ie_calif = proj.get("calificacion_ie")
@@ -38,12 +57,7 @@ def render_mentor_ie_dashboard():
         with st.expander(f"🎓 {nombre_completo} - {matricula} | {status_text}"):
             st.write(f"**Proyecto:** {proj.get('nombre_proyecto')}")
             
-            # Fetch subjects for this student
-            res_subs = supabase.table("inscripciones_asignaturas").select(
-                "id, calificacion_ie_materia, descripcion_actividades, asignaturas(nombre, clave_asignatura)"
-            ).eq("alumno_id", alumno.get("id")).execute()
-            
-            subs = res_subs.data if res_subs.data else []
+            subs = subs_by_project.get((alumno.get("id"), proj.get("periodo_id")), [])
             if not subs:
                 st.warning("El alumno no tiene materias registradas en su carga académica DUAL.")
                 continue
@@ -70,7 +84,7 @@ def render_mentor_ie_dashboard():
                         max_value=10.0, 
                         value=float(current_grade) if current_grade is not None else 0.0, 
                         step=0.1,
-                        key=f"gr_{s['id']}"
+                        key=f"gr_{proj['id']}_{s['id']}"
                     )
                     grades[s["id"]] = grade_input
                     st.divider()
@@ -82,21 +96,16 @@ def render_mentor_ie_dashboard():
                 submitted = st.form_submit_button("Guardar Calificaciones del Estudiante", type="primary")
                 if submitted:
                     with st.spinner("Guardando en base de datos..."):
-                        all_success = True
-                        for sub_id, grade in grades.items():
-                            res = supabase.table("inscripciones_asignaturas").update({
-                                "calificacion_ie_materia": grade
-                            }).eq("id", sub_id).execute()
-                            if not res.data:
-                                all_success = False
-                                
-                        # Also save the overall avg in proyectos_dual
-                        supabase.table("proyectos_dual").update({
-                            "calificacion_ie": avg_grade
-                        }).eq("id", proj["id"]).execute()
+                        # One atomic request for every subject grade plus the average
+                        success, result = save_mentor_ie_grades(proj["id"], user["id"], grades)
                         
-                        if all_success:
-                            st.success("Evaluaciones publicadas exitosamente.")
-                            st.rerun()
-                        else:
-                            st.error("Ocurrió un error guardando las calificaciones.")
+                    if success:
+                        st.success("Evaluaciones publicadas exitosamente.")
+                        st.rerun()
+                    elif isinstance(result, list):
+                        names = [s.get("asignaturas", {}).get("nombre", str(s["id"])) for s in subs if s["id"] in result]
+                        st.error(f"No se guardó ninguna calificación. Revise las materias: {', '.join(names) or result}")
+                    else:
+                        st.error(f"Ocurrió un error guardando las calificaciones: {result}")
+
+    render_pagination("mentor_ie_list", total, PAGE_SIZE)
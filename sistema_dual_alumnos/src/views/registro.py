@@ -3,6 +3,8 @@ from datetime import date, datetime
 from src.utils.helpers import calculate_age, sanitize_input
 from src.db_connection import get_supabase_client
 from src.utils.db_actions import create_student_transaction
+from src.utils.admission import acquire_admission
+from src.repository import get_unidades_economicas, get_ue_name, get_mentores_ue, get_mentor_ue_name, get_asignaturas, get_subject_teachers
 import re
 
 def render_registro():
@@ -126,11 +128,9 @@ def render_registro():
                 ue_name_str = ""
                 men_name_str = ""
                 if old_proj.get("ue_id"):
-                    res_n = supabase.table("unidades_economicas").select("nombre_comercial").eq("id", old_proj["ue_id"]).execute()
-                    if res_n.data: ue_name_str = res_n.data[0]["nombre_comercial"]
-                if old_proj.get("mentor_ue_id"):
-                    res_m = supabase.table("mentores_ue").select("nombre_completo").eq("id", old_proj["mentor_ue_id"]).execute()
-                    if res_m.data: men_name_str = res_m.data[0]["nombre_completo"]
+                    ue_name_str = get_ue_name(old_proj["ue_id"]) or ""
+                    if old_proj.get("mentor_ue_id"):
+                        men_name_str = get_mentor_ue_name(old_proj["ue_id"], old_proj["mentor_ue_id"]) or ""
                 
                 st.session_state["project_data"] = {
                     "ue_id": old_proj.get("ue_id"),
@@ -147,8 +147,7 @@ def render_registro():
                 st.info("💡 Hemos cargado la información de tu Proyecto DUAL anterior. Puedes actualizarla o dejarla igual.")
         
         # Load Companies
-        res_ue = supabase.table("unidades_economicas").select("id, nombre_comercial").execute()
-        ues = res_ue.data if res_ue.data else []
+        ues = get_unidades_economicas()
         ue_options = {ue["nombre_comercial"]: ue["id"] for ue in ues}
         
         col_ue_sel, col_dummy = st.columns(2)
@@ -158,8 +157,7 @@ def render_registro():
 
         mentors = []
         if ue_id:
-            res_mentors = supabase.table("mentores_ue").select("id, nombre_completo").eq("ue_id", ue_id).execute()
-            mentors = res_mentors.data
+            mentors = get_mentores_ue(ue_id)
         
         mentor_options = {m["nombre_completo"]: m["id"] for m in mentors}
 
@@ -242,15 +240,7 @@ def render_registro():
             
             selected_sem_filter = st.selectbox("Filtrar Materias por Semestre", sem_options, index=default_index)
 
-        query = supabase.table("asignaturas").select("id, nombre, clave_asignatura, semestre")
-        if selected_career_id:
-             query = query.eq("carrera_id", selected_career_id)
-        
-        if selected_sem_filter != "Todos":
-            query = query.eq("semestre", selected_sem_filter)
-
-        res_subjects = query.execute()
-        subjects = res_subjects.data if res_subjects.data else []
+        subjects = get_asignaturas(selected_career_id, selected_sem_filter)
         subject_options = {f"{s['clave_asignatura']} - {s['nombre']} (Sem {s['semestre']})": s["id"] for s in subjects}
 
         st.markdown("##### Agregar Asignatura")
@@ -264,27 +254,8 @@ def render_registro():
             actividades = st.text_area("Actividades que desarrollarás", help="Descripción breve de lo que harás en la empresa que sirva para evaluar esta materia.")
             
         with c2:
-            filtered_teachers = []
-            if subject_id:
-                res_rels = supabase.table("rel_maestros_asignaturas").select("maestro_id").eq("asignatura_id", subject_id).execute()
-                teacher_ids = [r["maestro_id"] for r in res_rels.data] if res_rels.data else []
-                
-                if teacher_ids:
-                    res_teachers = supabase.table("maestros").select("id, clave_maestro, nombre_completo").in_("id", teacher_ids).execute()
-                    filtered_teachers = res_teachers.data if res_teachers.data else []
-            
-            if filtered_teachers:
-                # User request: Clean name (remove parenthesis content like '(Mentor ...)')
-                cleaned_options = {}
-                for t in filtered_teachers:
-                    raw_name = t['nombre_completo']
-                    clean_name = re.sub(r'\s*\([^)]*\)', '', raw_name).strip()
-                    display_str = f"{t['clave_maestro']} - {clean_name}"
-                    cleaned_options[display_str] = t["id"]
-                
-                teacher_options = cleaned_options
-            else:
-                 teacher_options = {}
+            # Teachers come from the per-career index built once per period (no round-trip per subject)
+            teacher_options = {display: teacher_id for _, display, teacher_id in get_subject_teachers(selected_career_id, subject_id)}
 
             sel_teacher_name = st.selectbox(
                 "Maestro (Docente)", 
@@ -408,16 +379,24 @@ def render_registro():
                 st.warning("Procesando su registro, por favor espere...")
             else:
                 st.session_state["is_registering"] = True
-                with st.spinner("Guardando registro en sistema..."):
-                    # Attempt transaction
-                    success, msg = create_student_transaction(user, proj, subjs)
+                ticket = acquire_admission("registro")
+                if not ticket.admitted:
+                    success, msg = False, None
+                    st.warning(ticket.message)
+                else:
+                    try:
+                        with st.spinner("Guardando registro en sistema..."):
+                            # Attempt transaction
+                            success, msg = create_student_transaction(user, proj, subjs)
+                    finally:
+                        ticket.release()
                 if success:
                     st.balloons()
                     st.success("¡Registro completado exitosamente y datos actualizados!")
                     
-                    # Email sending
+                    # Email is queued; the outbox worker delivers (and retries) it in the background
                     try:
-                        from src.utils.email_sender import send_confirmation_email
+                        from src.utils.email_outbox import enqueue_confirmation_email
                         
                         filas_html = ""
                         for s in subjs:
@@ -434,9 +413,11 @@ def render_registro():
                             "filas_carga_academica": filas_html
                         }
                         
-                        sent = send_confirmation_email(user.get("email_institucional"), email_data)
-                        if sent:
-                            st.toast("Correo de confirmación enviado.", icon="📧")
+                        queued, _ = enqueue_confirmation_email(user.get("email_institucional"), email_data)
+                        if queued:
+                            st.toast("Te enviaremos un correo de confirmación.", icon="📧")
+                        else:
+                            st.warning("No se pudo programar el correo de confirmación.")
                     except Exception as e:
                          st.error(f"No se pudo enviar el correo: {e}")
 
@@ -446,12 +427,10 @@ def render_registro():
                     # Update user data with ID and new details
                     st.session_state["user"] = msg
                     st.session_state["user"]["estatus"] = "Registrado"
-                    
-                    import time
-                    time.sleep(2)
                     st.session_state["is_registering"] = False
                 else:
-                    st.error(f"Error al guardar: {msg}")
+                    if msg:
+                        st.error(f"Error al guardar: {msg}")
                     st.session_state["is_registering"] = False
         
         if st.button("< Corregir"):
@@ -4,6 +4,9 @@ import os
 import tempfile
 from datetime import datetime
 from src.db_connection import get_supabase_client
+from src.utils.data_loader import load_concurrently
+from src.utils.email_outbox import get_email_status, EMAIL_STATUS_LABELS
+from src.utils.document_generator import project_document_context, render_student_documents
 
 def render_student_dashboard():
     st.title("Mi Portal DUAL")
@@ -15,35 +18,33 @@ def render_student_dashboard():
 
     supabase = get_supabase_client()
     
-    # FETCH DATA
-    # 1. Project
-    project = {}
-    try:
-        res_proj = supabase.table("proyectos_dual").select("*, unidades_economicas(*), mentores_ue(*), maestros(*)").eq("alumno_id", user.get("id")).execute()
-        if res_proj.data:
-            project = res_proj.data[0]
-            # Flatten for easier access if needed, or just use keys
-    except Exception as e:
-        st.error(f"Error cargando proyecto: {e}")
+    # FETCH DATA (project and subjects are independent: load them concurrently)
+    def fetch_project():
+        res = supabase.table("proyectos_dual").select("*, unidades_economicas(*), mentores_ue(*), maestros(*)").eq("alumno_id", user.get("id")).execute()
+        return res.data[0] if res.data else {}
 
-    # 2. Subjects
-    subjects = []
-    try:
-        # Note: Supabase join syntax might vary depending on client version/setup.
-        # Simple approach: fetch IDs and then fetch details if nested select is tricky without ORM
-        # But let's try standard PostgREST syntax: select(*, asignaturas(*), maestros(*))
-        res_subs = supabase.table("inscripciones_asignaturas").select(
+    def fetch_subjects():
+        # Standard PostgREST syntax: select(*, asignaturas(*), maestros(*))
+        res = supabase.table("inscripciones_asignaturas").select(
             "*, asignaturas(nombre, clave_asignatura), maestros(nombre_completo)"
         ).eq("alumno_id", user.get("id")).execute()
-        
-        if res_subs.data:
-            subjects = res_subs.data
-    except Exception as e:
-        st.error(f"Error cargando materias: {e}")
+        return res.data or []
+
+    data, errors = load_concurrently({"project": fetch_project, "subjects": fetch_subjects})
+    project = data.get("project", {})
+    subjects = data.get("subjects", [])
+
+    if "project" in errors:
+        st.error(f"Error cargando proyecto: {errors['project']}")
+    if "subjects" in errors:
+        st.error(f"Error cargando materias: {errors['subjects']}")
 
     # Success Box for New Registrations
     if st.session_state.get("registro_complete"):
         st.success("¡Tu registro ha sido completado exitosamente! Ahora puedes ver tu información y estatus.")
+        email = get_email_status(f"registro:{user.get('matricula')}")
+        if email:
+            st.caption(f"📧 Correo de confirmación: {EMAIL_STATUS_LABELS.get(email['estado'], email['estado'])}")
         # Optional: Clear the flag so it doesn't show on every refresh, 
         # but for now let's keep it until they logout or for this session.
     
@@ -174,4 +175,23 @@ def render_student_dashboard():
                 "Falta registro completo de tu proyecto/mentores."
             )
             
+        if has_all_reqs:
+            st.markdown("---")
+            st.markdown("##### ⬇️ Descargar Borradores")
+            st.caption("Versión sin firmas del Anexo 5.1 y la Carta de Asignación con tus datos actuales.")
+            try:
+                # Served from the document cache: only re-rendered when your data or the template changes
+                documents = render_student_documents(project_document_context(user, project))
+            except Exception as e:
+                documents = []
+                st.error(f"No se pudieron generar los documentos: {e}")
+            for filename, content in documents:
+                st.download_button(
+                    f"📄 {filename}",
+                    data=content,
+                    file_name=filename,
+                    mime="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+                    key=f"doc_{filename}"
+                )
+            
         st.info("ℹ️ **Nota:** Para solicitar cualquiera de estos documentos en formato físico o digital con firmas, por favor acércate a la Coordinación DUAL de tu carrera.")
@@ -0,0 +1,92 @@
+-- Atomic student registration (replaces the multi-request create_student_transaction).
+-- Called through supabase.rpc("registrar_alumno_dual", {...}) from src/utils/db_actions.py.
+-- Everything runs inside the function's transaction: if any statement fails,
+-- nothing is written.
+
+create or replace function public.registrar_alumno_dual(
+    p_alumno jsonb,
+    p_proyecto jsonb,
+    p_asignaturas jsonb default '[]'::jsonb
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_periodo_id public.periodos.id%type;
+    v_alumno public.alumnos;
+begin
+    select id into v_periodo_id
+    from public.periodos
+    where activo
+    limit 1;
+
+    if v_periodo_id is null then
+        raise exception 'No hay periodo activo configurado.';
+    end if;
+
+    -- 1. Student (upsert by matricula, same columns the client used to send)
+    insert into public.alumnos (
+        matricula, curp, nombre, ap_paterno, ap_materno, nss,
+        email_personal, email_institucional, telefono, genero, estado_civil,
+        fecha_nacimiento, carrera_id, semestre, estatus
+    )
+    select
+        r.matricula, r.curp, r.nombre, r.ap_paterno, r.ap_materno, r.nss,
+        r.email_personal, r.email_institucional, r.telefono, r.genero, r.estado_civil,
+        r.fecha_nacimiento, r.carrera_id, r.semestre, 'Registrado'
+    from jsonb_populate_record(null::public.alumnos, p_alumno) r
+    on conflict (matricula) do update set
+        curp = excluded.curp,
+        nombre = excluded.nombre,
+        ap_paterno = excluded.ap_paterno,
+        ap_materno = excluded.ap_materno,
+        nss = excluded.nss,
+        email_personal = excluded.email_personal,
+        email_institucional = excluded.email_institucional,
+        telefono = excluded.telefono,
+        genero = excluded.genero,
+        estado_civil = excluded.estado_civil,
+        fecha_nacimiento = excluded.fecha_nacimiento,
+        carrera_id = excluded.carrera_id,
+        semestre = excluded.semestre,
+        estatus = excluded.estatus
+    returning * into v_alumno;
+
+    -- 2. Dual project for the active period
+    insert into public.proyectos_dual (
+        alumno_id, periodo_id, ue_id, mentor_ue_id, nombre_proyecto,
+        descripcion_proyecto, marco_teorico, fecha_inicio_convenio, fecha_fin_convenio
+    )
+    select
+        v_alumno.id, v_periodo_id, r.ue_id, r.mentor_ue_id, r.nombre_proyecto,
+        r.descripcion_proyecto, r.marco_teorico, r.fecha_inicio_convenio, r.fecha_fin_convenio
+    from jsonb_populate_record(null::public.proyectos_dual, p_proyecto) r
+    on conflict (alumno_id, periodo_id) do update set
+        ue_id = excluded.ue_id,
+        mentor_ue_id = excluded.mentor_ue_id,
+        nombre_proyecto = excluded.nombre_proyecto,
+        descripcion_proyecto = excluded.descripcion_proyecto,
+        marco_teorico = excluded.marco_teorico,
+        fecha_inicio_convenio = excluded.fecha_inicio_convenio,
+        fecha_fin_convenio = excluded.fecha_fin_convenio;
+
+    -- 3. Subjects: replace this period's enrollment (safe on double submit)
+    delete from public.inscripciones_asignaturas
+    where alumno_id = v_alumno.id
+      and periodo_id = v_periodo_id;
+
+    insert into public.inscripciones_asignaturas (
+        alumno_id, periodo_id, asignatura_id, maestro_id, grupo,
+        descripcion_actividades, parcial_1, parcial_2, parcial_3
+    )
+    select
+        v_alumno.id, v_periodo_id, r.asignatura_id, r.maestro_id, r.grupo,
+        r.descripcion_actividades,
+        coalesce(r.parcial_1, true), coalesce(r.parcial_2, true), coalesce(r.parcial_3, true)
+    from jsonb_populate_recordset(null::public.inscripciones_asignaturas, coalesce(p_asignaturas, '[]'::jsonb)) r;
+
+    return jsonb_build_object('alumno_id', v_alumno.id, 'periodo_id', v_periodo_id);
+end;
+$$;
+
+grant execute on function public.registrar_alumno_dual(jsonb, jsonb, jsonb) to anon, authenticated;
@@ -0,0 +1,23 @@
+-- Bulk Mentor IE assignment: applies a precomputed {id, mentor_ie_id} mapping
+-- in a single statement. Projects that received a mentor in the meantime are
+-- left untouched. Returns the number of projects actually updated.
+
+create or replace function public.asignar_mentores_ie(p_asignaciones jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+    v_updated integer;
+begin
+    update public.proyectos_dual p
+    set mentor_ie_id = a.mentor_ie_id
+    from jsonb_populate_recordset(null::public.proyectos_dual, p_asignaciones) a
+    where p.id = a.id
+      and p.mentor_ie_id is null;
+
+    get diagnostics v_updated = row_count;
+    return v_updated;
+end;
+$$;
+
+grant execute on function public.asignar_mentores_ie(jsonb) to anon, authenticated;
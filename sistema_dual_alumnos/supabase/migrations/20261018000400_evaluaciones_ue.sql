@@ -0,0 +1,174 @@
+-- Anexo 5.4: per-activity storage of Mentor UE evaluations.
+-- Ids follow the Supabase default (bigint identity) used by the existing tables.
+--
+-- evaluaciones_ue               one row per submitted monthly report
+-- evaluaciones_ue_actividades   one row per graded activity (bulk inserted)
+-- evaluaciones_ue_resumen       sum/count per (proyecto, mes, competencia),
+--                               maintained by statement-level triggers so
+--                               dashboards never rescan the raw grades.
+
+create table if not exists public.evaluaciones_ue (
+    id bigint generated by default as identity primary key,
+    proyecto_id bigint not null references public.proyectos_dual(id) on delete cascade,
+    mentor_ue_id bigint references public.mentores_ue(id),
+    mes_evaluado text not null,
+    numero_reporte integer not null check (numero_reporte > 0),
+    promedio numeric(5, 2),
+    created_at timestamptz not null default now(),
+    unique (proyecto_id, numero_reporte)
+);
+
+create table if not exists public.evaluaciones_ue_actividades (
+    id bigint generated by default as identity primary key,
+    evaluacion_id bigint not null references public.evaluaciones_ue(id) on delete cascade,
+    proyecto_id bigint not null,
+    mes_evaluado text not null,
+    competencia_id bigint not null references public.asignatura_competencias(id),
+    actividad_id bigint not null references public.actividades_aprendizaje(id),
+    calificacion smallint not null check (calificacion in (0, 70, 80, 90, 100)),
+    unique (evaluacion_id, actividad_id)
+);
+
+create index if not exists evaluaciones_ue_actividades_proyecto_idx
+    on public.evaluaciones_ue_actividades (proyecto_id);
+
+create table if not exists public.evaluaciones_ue_resumen (
+    proyecto_id bigint not null,
+    mes_evaluado text not null,
+    competencia_id bigint not null,
+    suma bigint not null default 0,
+    conteo integer not null default 0,
+    primary key (proyecto_id, mes_evaluado, competencia_id)
+);
+
+-- Incremental maintenance of the aggregates
+
+create or replace function public.evaluaciones_ue_resumen_sumar()
+returns trigger
+language plpgsql
+as $$
+begin
+    insert into public.evaluaciones_ue_resumen (proyecto_id, mes_evaluado, competencia_id, suma, conteo)
+    select proyecto_id, mes_evaluado, competencia_id, sum(calificacion), count(*)
+    from nuevos
+    group by proyecto_id, mes_evaluado, competencia_id
+    on conflict (proyecto_id, mes_evaluado, competencia_id) do update set
+        suma = public.evaluaciones_ue_resumen.suma + excluded.suma,
+        conteo = public.evaluaciones_ue_resumen.conteo + excluded.conteo;
+    return null;
+end;
+$$;
+
+create or replace function public.evaluaciones_ue_resumen_restar()
+returns trigger
+language plpgsql
+as $$
+begin
+    update public.evaluaciones_ue_resumen r
+    set suma = r.suma - d.suma,
+        conteo = r.conteo - d.conteo
+    from (
+        select proyecto_id, mes_evaluado, competencia_id, sum(calificacion) as suma, count(*) as conteo
+        from borrados
+        group by proyecto_id, mes_evaluado, competencia_id
+    ) d
+    where r.proyecto_id = d.proyecto_id
+      and r.mes_evaluado = d.mes_evaluado
+      and r.competencia_id = d.competencia_id;
+
+    delete from public.evaluaciones_ue_resumen where conteo <= 0;
+    return null;
+end;
+$$;
+
+drop trigger if exists evaluaciones_ue_actividades_sumar on public.evaluaciones_ue_actividades;
+create trigger evaluaciones_ue_actividades_sumar
+    after insert on public.evaluaciones_ue_actividades
+    referencing new table as nuevos
+    for each statement execute function public.evaluaciones_ue_resumen_sumar();
+
+drop trigger if exists evaluaciones_ue_actividades_restar on public.evaluaciones_ue_actividades;
+create trigger evaluaciones_ue_actividades_restar
+    after delete on public.evaluaciones_ue_actividades
+    referencing old table as borrados
+    for each statement execute function public.evaluaciones_ue_resumen_restar();
+
+-- Rollups read from the (small) aggregate table
+
+create or replace view public.evaluaciones_ue_por_proyecto as
+select proyecto_id, sum(suma) as suma, sum(conteo) as conteo,
+       round(sum(suma)::numeric / nullif(sum(conteo), 0), 2) as promedio
+from public.evaluaciones_ue_resumen
+group by proyecto_id;
+
+create or replace view public.evaluaciones_ue_por_mes as
+select proyecto_id, mes_evaluado, sum(suma) as suma, sum(conteo) as conteo,
+       round(sum(suma)::numeric / nullif(sum(conteo), 0), 2) as promedio
+from public.evaluaciones_ue_resumen
+group by proyecto_id, mes_evaluado;
+
+create or replace view public.evaluaciones_ue_por_competencia as
+select proyecto_id, competencia_id, sum(suma) as suma, sum(conteo) as conteo,
+       round(sum(suma)::numeric / nullif(sum(conteo), 0), 2) as promedio
+from public.evaluaciones_ue_resumen
+group by proyecto_id, competencia_id;
+
+-- Saves one monthly report: header + all activity grades in a single request.
+-- Re-submitting the same numero_reporte replaces the previous one.
+-- p_calificaciones: [{"actividad_id", "competencia_id", "calificacion"}, ...]
+-- proyectos_dual.calificacion_ue is refreshed with the project's cumulative average.
+
+create or replace function public.guardar_evaluacion_ue(
+    p_proyecto_id bigint,
+    p_mentor_ue_id bigint,
+    p_mes_evaluado text,
+    p_numero_reporte integer,
+    p_calificaciones jsonb
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_evaluacion_id bigint;
+    v_promedio_reporte numeric;
+    v_promedio_proyecto numeric;
+begin
+    if not exists (
+        select 1 from public.proyectos_dual
+        where id = p_proyecto_id and mentor_ue_id = p_mentor_ue_id
+    ) then
+        raise exception 'El proyecto no está asignado a este Mentor UE.';
+    end if;
+
+    delete from public.evaluaciones_ue
+    where proyecto_id = p_proyecto_id
+      and numero_reporte = p_numero_reporte;
+
+    select avg((c->>'calificacion')::numeric) into v_promedio_reporte
+    from jsonb_array_elements(p_calificaciones) c;
+
+    insert into public.evaluaciones_ue (proyecto_id, mentor_ue_id, mes_evaluado, numero_reporte, promedio)
+    values (p_proyecto_id, p_mentor_ue_id, p_mes_evaluado, p_numero_reporte, coalesce(v_promedio_reporte, 0))
+    returning id into v_evaluacion_id;
+
+    insert into public.evaluaciones_ue_actividades (evaluacion_id, proyecto_id, mes_evaluado, competencia_id, actividad_id, calificacion)
+    select v_evaluacion_id, p_proyecto_id, p_mes_evaluado, r.competencia_id, r.actividad_id, r.calificacion
+    from jsonb_to_recordset(p_calificaciones) as r(actividad_id bigint, competencia_id bigint, calificacion smallint);
+
+    select promedio into v_promedio_proyecto
+    from public.evaluaciones_ue_por_proyecto
+    where proyecto_id = p_proyecto_id;
+
+    update public.proyectos_dual
+    set calificacion_ue = round(coalesce(v_promedio_proyecto, 0))
+    where id = p_proyecto_id;
+
+    return jsonb_build_object(
+        'evaluacion_id', v_evaluacion_id,
+        'promedio_reporte', coalesce(v_promedio_reporte, 0),
+        'promedio_proyecto', coalesce(v_promedio_proyecto, 0)
+    );
+end;
+$$;
+
+grant execute on function public.guardar_evaluacion_ue to anon, authenticated;
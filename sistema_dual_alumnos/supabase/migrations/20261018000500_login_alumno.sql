@@ -0,0 +1,71 @@
+-- Student login in one request: whitelist verdict, student record and
+-- re-enrollment check (replaces 3-4 sequential calls from render_login).
+--
+-- Returns {"status": ..., "nombre_lista_blanca": ..., "alumno": {...} | null}
+-- status:
+--   not_whitelisted     matricula not authorized for the career
+--   curp_mismatch       CURP differs from the whitelist entry
+--   wrong_curp          returning student, CURP differs from alumnos
+--   new_student         authorized, no alumnos row yet (first registration)
+--   needs_reenrollment  returning student without subjects in the active period
+--   ok                  returning student already enrolled
+
+create or replace function public.login_alumno(
+    p_matricula text,
+    p_curp text,
+    p_carrera_id public.lista_blanca.carrera_id%type
+)
+returns jsonb
+language plpgsql
+stable
+as $$
+declare
+    v_wb public.lista_blanca;
+    v_alumno public.alumnos;
+    v_periodo_id public.periodos.id%type;
+begin
+    select * into v_wb
+    from public.lista_blanca
+    where matricula = p_matricula
+      and carrera_id = p_carrera_id
+    limit 1;
+
+    if not found then
+        return jsonb_build_object('status', 'not_whitelisted', 'nombre_lista_blanca', null, 'alumno', null);
+    end if;
+
+    if coalesce(v_wb.curp, '') <> '' and upper(trim(p_curp)) <> upper(trim(v_wb.curp)) then
+        return jsonb_build_object('status', 'curp_mismatch', 'nombre_lista_blanca', null, 'alumno', null);
+    end if;
+
+    select * into v_alumno
+    from public.alumnos
+    where matricula = p_matricula
+    limit 1;
+
+    if not found then
+        return jsonb_build_object('status', 'new_student', 'nombre_lista_blanca', v_wb.nombre_completo, 'alumno', null);
+    end if;
+
+    if v_alumno.curp is distinct from p_curp then
+        return jsonb_build_object('status', 'wrong_curp', 'nombre_lista_blanca', null, 'alumno', null);
+    end if;
+
+    select id into v_periodo_id
+    from public.periodos
+    where activo
+    limit 1;
+
+    if v_periodo_id is not null and not exists (
+        select 1 from public.inscripciones_asignaturas
+        where alumno_id = v_alumno.id
+          and periodo_id = v_periodo_id
+    ) then
+        return jsonb_build_object('status', 'needs_reenrollment', 'nombre_lista_blanca', v_wb.nombre_completo, 'alumno', to_jsonb(v_alumno));
+    end if;
+
+    return jsonb_build_object('status', 'ok', 'nombre_lista_blanca', v_wb.nombre_completo, 'alumno', to_jsonb(v_alumno));
+end;
+$$;
+
+grant execute on function public.login_alumno to anon, authenticated;
@@ -0,0 +1,36 @@
+-- Flat listing of DUAL projects for the mentor dashboards, so they can page
+-- with range() and filter server-side by name/matricula, period and pending
+-- grades without pulling every assigned student.
+
+create extension if not exists pg_trgm;
+
+create index if not exists alumnos_busqueda_trgm_idx
+    on public.alumnos
+    using gin (lower(matricula || ' ' || nombre || ' ' || ap_paterno || ' ' || coalesce(ap_materno, '')) gin_trgm_ops);
+
+create index if not exists proyectos_dual_mentor_ue_idx on public.proyectos_dual (mentor_ue_id, periodo_id);
+create index if not exists proyectos_dual_mentor_ie_idx on public.proyectos_dual (mentor_ie_id, periodo_id);
+
+create or replace view public.proyectos_dual_listado
+with (security_invoker = true) as
+select
+    p.id,
+    p.nombre_proyecto,
+    p.alumno_id,
+    p.periodo_id,
+    pe.nombre as periodo_nombre,
+    p.mentor_ue_id,
+    p.mentor_ie_id,
+    p.calificacion_ue,
+    p.calificacion_ie,
+    a.matricula,
+    a.nombre,
+    a.ap_paterno,
+    a.ap_materno,
+    a.carrera_id,
+    lower(a.matricula || ' ' || a.nombre || ' ' || a.ap_paterno || ' ' || coalesce(a.ap_materno, '')) as busqueda
+from public.proyectos_dual p
+join public.alumnos a on a.id = p.alumno_id
+left join public.periodos pe on pe.id = p.periodo_id;
+
+grant select on public.proyectos_dual_listado to anon, authenticated;
@@ -0,0 +1,79 @@
+-- Period-wide overview for the coordinator dashboard, aggregated in SQL and
+-- returned in a single request (only small result sets leave the database).
+
+create index if not exists proyectos_dual_periodo_idx on public.proyectos_dual (periodo_id);
+
+create or replace function public.resumen_coordinacion(p_periodo_id public.periodos.id%type)
+returns jsonb
+language sql
+stable
+as $$
+    with proyectos as (
+        select p.id, p.mentor_ie_id, p.calificacion_ue, p.calificacion_ie,
+               a.matricula, a.nombre, a.ap_paterno, a.semestre,
+               coalesce(c.nombre, 'Sin carrera') as carrera
+        from public.proyectos_dual p
+        join public.alumnos a on a.id = p.alumno_id
+        left join public.carreras c on c.id = a.carrera_id
+        where p.periodo_id = p_periodo_id
+    )
+    select jsonb_build_object(
+        'totales', (
+            select jsonb_build_object(
+                'proyectos', count(*),
+                'sin_mentor_ie', count(*) filter (where mentor_ie_id is null),
+                'evaluados_ue', count(calificacion_ue),
+                'evaluados_ie', count(calificacion_ie)
+            )
+            from proyectos
+        ),
+        'registros', (
+            select coalesce(jsonb_agg(r order by r.carrera, r.semestre), '[]'::jsonb)
+            from (
+                select carrera, semestre, count(*) as alumnos
+                from proyectos
+                group by carrera, semestre
+            ) r
+        ),
+        'sin_mentor_ie', (
+            select coalesce(jsonb_agg(r), '[]'::jsonb)
+            from (
+                select matricula, nombre || ' ' || ap_paterno as nombre, carrera, semestre
+                from proyectos
+                where mentor_ie_id is null
+                order by carrera, ap_paterno, nombre
+                limit 100
+            ) r
+        ),
+        'carga_mentores', (
+            select coalesce(jsonb_agg(r order by r.alumnos desc, r.mentor), '[]'::jsonb)
+            from (
+                select m.nombre_completo as mentor, count(p.id) as alumnos
+                from public.maestros m
+                left join proyectos p on p.mentor_ie_id = m.id
+                where m.es_mentor_ie
+                group by m.id, m.nombre_completo
+            ) r
+        ),
+        'distribucion_ue', (
+            select coalesce(jsonb_agg(r order by r.desde), '[]'::jsonb)
+            from (
+                select least(floor(calificacion_ue / 10) * 10, 90)::int as desde, count(*) as alumnos
+                from proyectos
+                where calificacion_ue is not null
+                group by 1
+            ) r
+        ),
+        'distribucion_ie', (
+            select coalesce(jsonb_agg(r order by r.desde), '[]'::jsonb)
+            from (
+                select least(floor(calificacion_ie), 9)::int as desde, count(*) as alumnos
+                from proyectos
+                where calificacion_ie is not null
+                group by 1
+            ) r
+        )
+    );
+$$;
+
+grant execute on function public.resumen_coordinacion to anon, authenticated;
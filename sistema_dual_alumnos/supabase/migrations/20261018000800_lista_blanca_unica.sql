@@ -0,0 +1,28 @@
+-- Whitelist bulk import upserts on (matricula, carrera_id), which needs a
+-- unique index on that key. Duplicated keys may differ in CURP or name and
+-- nothing tells which row is current, so they are not dropped here: the
+-- migration stops and lists them, to be merged by hand first (as 000900 does
+-- for the curricular map).
+
+do $$
+declare
+    v_duplicados text;
+begin
+    select string_agg(format('%s (carrera %s): %s filas', matricula, carrera_id, filas), E'\n' order by matricula, carrera_id)
+    into v_duplicados
+    from (
+        select matricula, carrera_id, count(*) as filas
+        from public.lista_blanca
+        group by matricula, carrera_id
+        having count(*) > 1
+    ) d;
+
+    if v_duplicados is not null then
+        raise exception 'lista_blanca tiene matrículas repetidas en la misma carrera; fusiónelas antes de aplicar esta migración.'
+            using detail = v_duplicados;
+    end if;
+end;
+$$;
+
+create unique index if not exists lista_blanca_matricula_carrera_key
+    on public.lista_blanca (matricula, carrera_id);
@@ -0,0 +1,30 @@
+-- Natural keys used by the curricular map loader (upsert on_conflict targets).
+-- Duplicated subjects/competencias/actividades are referenced by other rows
+-- and have to be merged by hand before these indexes can be built; duplicated
+-- teacher relations carry no data and are dropped here.
+
+delete from public.rel_maestros_asignaturas a
+using public.rel_maestros_asignaturas b
+where a.maestro_id = b.maestro_id
+  and a.asignatura_id = b.asignatura_id
+  and a.ctid > b.ctid;
+
+create unique index if not exists asignaturas_carrera_clave_key
+    on public.asignaturas (carrera_id, clave_asignatura);
+
+create unique index if not exists asignatura_competencias_asignatura_numero_key
+    on public.asignatura_competencias (asignatura_id, numero_competencia);
+
+-- Activity descriptions are free text of any length, too long for a btree
+-- entry (about 2.7 kB), so activities are keyed on their md5 instead. It is a
+-- stored column rather than an expression index so that it can be named as
+-- the upsert's on_conflict target.
+alter table public.actividades_aprendizaje
+    add column if not exists descripcion_hash text
+    generated always as (md5(descripcion_actividad)) stored;
+
+create unique index if not exists actividades_aprendizaje_competencia_descripcion_key
+    on public.actividades_aprendizaje (competencia_id, descripcion_hash);
+
+create unique index if not exists rel_maestros_asignaturas_maestro_asignatura_key
+    on public.rel_maestros_asignaturas (maestro_id, asignatura_id);
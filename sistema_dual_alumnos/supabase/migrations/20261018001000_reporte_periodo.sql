@@ -0,0 +1,52 @@
+-- One flat row per subject enrollment with the student, DUAL project, economic
+-- unit and mentors of the same period. Backs the streaming period export and
+-- the grade engine, which page through it by inscripcion_id.
+
+create index if not exists inscripciones_asignaturas_periodo_idx
+    on public.inscripciones_asignaturas (periodo_id, id);
+
+create or replace view public.reporte_periodo
+with (security_invoker = true) as
+select
+    i.id as inscripcion_id,
+    i.periodo_id,
+    pe.nombre as periodo,
+    a.id as alumno_id,
+    a.matricula,
+    a.nombre,
+    a.ap_paterno,
+    a.ap_materno,
+    a.curp,
+    a.email_institucional,
+    c.nombre as carrera,
+    a.semestre,
+    a.estatus,
+    i.asignatura_id,
+    s.clave_asignatura,
+    s.nombre as asignatura,
+    i.grupo,
+    i.maestro_id,
+    d.nombre_completo as docente,
+    i.parcial_1,
+    i.parcial_2,
+    i.parcial_3,
+    i.calificacion_ie_materia,
+    p.id as proyecto_id,
+    p.nombre_proyecto,
+    ue.nombre_comercial as unidad_economica,
+    mu.nombre_completo as mentor_ue,
+    mi.nombre_completo as mentor_ie,
+    p.calificacion_ue,
+    p.calificacion_ie
+from public.inscripciones_asignaturas i
+join public.alumnos a on a.id = i.alumno_id
+left join public.periodos pe on pe.id = i.periodo_id
+left join public.carreras c on c.id = a.carrera_id
+left join public.asignaturas s on s.id = i.asignatura_id
+left join public.maestros d on d.id = i.maestro_id
+left join public.proyectos_dual p on p.alumno_id = a.id and p.periodo_id = i.periodo_id
+left join public.unidades_economicas ue on ue.id = p.ue_id
+left join public.mentores_ue mu on mu.id = p.mentor_ue_id
+left join public.maestros mi on mi.id = p.mentor_ie_id;
+
+grant select on public.reporte_periodo to anon, authenticated;
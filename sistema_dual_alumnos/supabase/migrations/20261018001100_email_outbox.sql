@@ -0,0 +1,86 @@
+-- Durable outbox for outgoing email. The app only inserts rows; a background
+-- worker claims due rows, sends them and records the outcome.
+--
+-- estado: pendiente  waiting for its next attempt (proximo_intento)
+--         enviando   claimed by a worker until bloqueado_hasta; a row whose
+--                    worker died is claimable again once that time passes
+--         enviado    delivered
+--         fallido    dead letter: permanent error or attempts exhausted
+
+create table if not exists public.email_outbox (
+    id bigint generated by default as identity primary key,
+    destinatario text not null,
+    asunto text not null,
+    plantilla text not null,
+    contexto jsonb not null default '{}'::jsonb,
+    referencia text,
+    estado text not null default 'pendiente' check (estado in ('pendiente', 'enviando', 'enviado', 'fallido')),
+    intentos integer not null default 0,
+    proximo_intento timestamptz not null default now(),
+    bloqueado_hasta timestamptz,
+    ultimo_error text,
+    created_at timestamptz not null default now(),
+    enviado_at timestamptz
+);
+
+create index if not exists email_outbox_por_enviar_idx
+    on public.email_outbox (proximo_intento) where estado in ('pendiente', 'enviando');
+create index if not exists email_outbox_referencia_idx on public.email_outbox (referencia, created_at desc);
+
+-- Claims up to p_limite due messages. skip locked lets several app instances
+-- run workers without sending the same message twice.
+create or replace function public.reclamar_email_outbox(p_limite integer, p_bloqueo_segundos integer)
+returns setof public.email_outbox
+language sql
+as $$
+    update public.email_outbox o
+    set estado = 'enviando',
+        intentos = o.intentos + 1,
+        bloqueado_hasta = now() + make_interval(secs => p_bloqueo_segundos)
+    where o.id in (
+        select id
+        from public.email_outbox
+        where (estado = 'pendiente' and proximo_intento <= now())
+           or (estado = 'enviando' and bloqueado_hasta < now())
+        order by proximo_intento
+        limit p_limite
+        for update skip locked
+    )
+    returning o.*;
+$$;
+
+-- Records the outcome of claimed messages.
+-- p_resultados: [{"id": ..., "enviado": bool, "error": text, "permanente": bool}]
+-- Failed messages are retried after p_espera_base * 2^(intentos - 1) seconds
+-- (capped at p_espera_max, with jitter) until p_max_intentos is reached.
+create or replace function public.resolver_email_outbox(
+    p_resultados jsonb,
+    p_max_intentos integer,
+    p_espera_base integer,
+    p_espera_max integer
+)
+returns void
+language plpgsql
+as $$
+begin
+    update public.email_outbox o
+    set estado = case
+            when r.enviado then 'enviado'
+            when r.permanente or o.intentos >= p_max_intentos then 'fallido'
+            else 'pendiente'
+        end,
+        enviado_at = case when r.enviado then now() end,
+        ultimo_error = case when r.enviado then null else r.error end,
+        bloqueado_hasta = null,
+        proximo_intento = case
+            when r.enviado then o.proximo_intento
+            else now() + make_interval(secs => least(p_espera_max, p_espera_base * power(2, o.intentos - 1)) * (0.75 + random() / 2))
+        end
+    from jsonb_to_recordset(p_resultados) as r(id bigint, enviado boolean, error text, permanente boolean)
+    where o.id = r.id
+      and o.estado = 'enviando';
+end;
+$$;
+
+grant execute on function public.reclamar_email_outbox to anon, authenticated;
+grant execute on function public.resolver_email_outbox to anon, authenticated;
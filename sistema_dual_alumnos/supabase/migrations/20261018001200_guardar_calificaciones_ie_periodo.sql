@@ -0,0 +1,58 @@
+-- guardar_calificaciones_ie: an inscription is only accepted if it belongs
+-- to the project's student in the project's period, so a Mentor IE cannot
+-- grade the subjects a student took in another period through this project.
+
+create or replace function public.guardar_calificaciones_ie(
+    p_proyecto_id public.proyectos_dual.id%type,
+    p_mentor_ie_id public.proyectos_dual.mentor_ie_id%type,
+    p_calificaciones jsonb
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_alumno_id public.proyectos_dual.alumno_id%type;
+    v_periodo_id public.proyectos_dual.periodo_id%type;
+    v_failed jsonb;
+    v_promedio numeric;
+begin
+    select alumno_id, periodo_id into v_alumno_id, v_periodo_id
+    from public.proyectos_dual
+    where id = p_proyecto_id
+      and mentor_ie_id = p_mentor_ie_id;
+
+    if not found then
+        raise exception 'El proyecto no está asignado a este Mentor IE.';
+    end if;
+
+    select coalesce(jsonb_agg(to_jsonb(p.id)), '[]'::jsonb) into v_failed
+    from jsonb_populate_recordset(null::public.inscripciones_asignaturas, p_calificaciones) p
+    left join public.inscripciones_asignaturas i
+           on i.id = p.id
+          and i.alumno_id = v_alumno_id
+          and i.periodo_id = v_periodo_id
+    where i.id is null
+       or p.calificacion_ie_materia is null
+       or p.calificacion_ie_materia not between 0 and 10;
+
+    if jsonb_array_length(v_failed) > 0 then
+        return jsonb_build_object('ok', false, 'failed_ids', v_failed, 'promedio', null);
+    end if;
+
+    update public.inscripciones_asignaturas i
+    set calificacion_ie_materia = p.calificacion_ie_materia
+    from jsonb_populate_recordset(null::public.inscripciones_asignaturas, p_calificaciones) p
+    where i.id = p.id;
+
+    select avg(p.calificacion_ie_materia) into v_promedio
+    from jsonb_populate_recordset(null::public.inscripciones_asignaturas, p_calificaciones) p;
+
+    update public.proyectos_dual
+    set calificacion_ie = coalesce(v_promedio, 0)
+    where id = p_proyecto_id;
+
+    return jsonb_build_object('ok', true, 'failed_ids', '[]'::jsonb, 'promedio', coalesce(v_promedio, 0));
+end;
+$$;
+
+grant execute on function public.guardar_calificaciones_ie to anon, authenticated;
@@ -0,0 +1,70 @@
+-- Claim tokens for the email outbox. A claim whose lease expired can be taken
+-- by another worker while the first one is still sending; without a token the
+-- late worker's resolver call overwrote the new claim's outcome. Each claim
+-- now stamps its rows with a fresh `reclamo` and the outcome is only applied
+-- to rows still holding it.
+
+alter table public.email_outbox add column if not exists reclamo uuid;
+
+create or replace function public.reclamar_email_outbox(p_limite integer, p_bloqueo_segundos integer)
+returns setof public.email_outbox
+language sql
+as $$
+    update public.email_outbox o
+    set estado = 'enviando',
+        intentos = o.intentos + 1,
+        bloqueado_hasta = now() + make_interval(secs => p_bloqueo_segundos),
+        reclamo = gen_random_uuid()
+    where o.id in (
+        select id
+        from public.email_outbox
+        where (estado = 'pendiente' and proximo_intento <= now())
+           or (estado = 'enviando' and bloqueado_hasta < now())
+        order by proximo_intento
+        limit p_limite
+        for update skip locked
+    )
+    returning o.*;
+$$;
+
+-- p_resultados: [{"id": ..., "reclamo": uuid, "enviado": bool, "error": text, "permanente": bool}]
+-- Returns the rows it resolved with their new estado; a claimed id missing
+-- from the result lost its lease to another worker.
+drop function if exists public.resolver_email_outbox(jsonb, integer, integer, integer);
+
+create function public.resolver_email_outbox(
+    p_resultados jsonb,
+    p_max_intentos integer,
+    p_espera_base integer,
+    p_espera_max integer
+)
+returns table (id bigint, estado text)
+language plpgsql
+as $$
+#variable_conflict use_column
+begin
+    return query
+    update public.email_outbox o
+    set estado = case
+            when r.enviado then 'enviado'
+            when r.permanente or o.intentos >= p_max_intentos then 'fallido'
+            else 'pendiente'
+        end,
+        enviado_at = case when r.enviado then now() end,
+        ultimo_error = case when r.enviado then null else r.error end,
+        bloqueado_hasta = null,
+        reclamo = null,
+        proximo_intento = case
+            when r.enviado then o.proximo_intento
+            else now() + make_interval(secs => least(p_espera_max, p_espera_base * power(2, o.intentos - 1)) * (0.75 + random() / 2))
+        end
+    from jsonb_to_recordset(p_resultados) as r(id bigint, reclamo uuid, enviado boolean, error text, permanente boolean)
+    where o.id = r.id
+      and o.estado = 'enviando'
+      and o.reclamo = r.reclamo
+    returning o.id, o.estado;
+end;
+$$;
+
+grant execute on function public.reclamar_email_outbox to anon, authenticated;
+grant execute on function public.resolver_email_outbox to anon, authenticated;
@@ -0,0 +1,144 @@
+import os
+import sys
+
+import pytest
+
+# Allow `python -m pytest` from sistema_dual_alumnos/ (the app imports `src.*`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+POSTGREST_MAX_ROWS = 1000  # PostgREST's default db-max-rows cap
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """In-memory stand-in for a postgrest request builder (filters, order, range and the row cap)."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.filters = []
+        self.order_by = []
+        self.bounds = None
+        self.operation = "select"
+        self.payload = None
+        self.negate = False
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def insert(self, payload, **kwargs):
+        self.operation, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict="id", **kwargs):
+        self.operation, self.payload = "upsert", payload
+        self.conflict = on_conflict.split(",")
+        return self
+
+    def _filter(self, predicate):
+        if self.negate:
+            self.negate = False
+            self.filters.append(lambda row: not predicate(row))
+        else:
+            self.filters.append(predicate)
+        return self
+
+    @property
+    def not_(self):
+        self.negate = True
+        return self
+
+    def eq(self, column, value):
+        return self._filter(lambda row: row.get(column) == value)
+
+    def in_(self, column, values):
+        values = set(values)
+        return self._filter(lambda row: row.get(column) in values)
+
+    def gt(self, column, value):
+        return self._filter(lambda row: row.get(column) is not None and row.get(column) > value)
+
+    def is_(self, column, value):
+        expected = None if value in (None, "null") else value
+        return self._filter(lambda row: row.get(column) is expected)
+
+    def order(self, column, desc=False, **kwargs):
+        self.order_by.append((column, desc))
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end)
+        return self
+
+    def limit(self, n):
+        self.bounds = (0, n - 1)
+        return self
+
+    def execute(self):
+        self.client.calls.append(("table", self.table, self.operation))
+        if self.operation == "insert":
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            stored = self.client.tables.setdefault(self.table, [])
+            for row in rows:
+                stored.append(dict(row, id=len(stored) + 1))
+            return FakeResponse(stored[-len(rows):])
+        if self.operation == "upsert":
+            stored = self.client.tables.setdefault(self.table, [])
+            generated = self.client.generated.get(self.table, {})
+            index = {tuple(str(r.get(c)) for c in self.conflict): r for r in stored}
+            result = []
+            for row in self.payload:
+                row = dict(row, **{column: fn(row) for column, fn in generated.items()})
+                key = tuple(str(row.get(c)) for c in self.conflict)
+                current = index.get(key)
+                if current is None:
+                    current = index[key] = dict(row, id=len(stored) + 1)
+                    stored.append(current)
+                else:
+                    current.update(row)
+                result.append(dict(current))
+            return FakeResponse(result)
+
+        rows = [row for row in self.client.tables.get(self.table, []) if all(f(row) for f in self.filters)]
+        for column, desc in reversed(self.order_by):
+            rows.sort(key=lambda row: row.get(column), reverse=desc)
+        start, end = self.bounds or (0, len(rows) - 1)
+        end = min(end, start + self.client.max_rows - 1)
+        return FakeResponse([dict(row) for row in rows[start:end + 1]])
+
+
+class FakeSupabase:
+    """
+    Minimal Supabase client: tables are lists of dicts, rpc() dispatches to
+    registered handlers, and every execute() is appended to `calls`.
+    `generated` maps table -> {column: fn(row)} for generated columns.
+    """
+
+    def __init__(self, tables=None, rpcs=None, max_rows=POSTGREST_MAX_ROWS, generated=None):
+        self.tables = tables or {}
+        self.rpcs = rpcs or {}
+        self.generated = generated or {}
+        self.max_rows = max_rows
+        self.calls = []
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, fn, params=None):
+        client = self
+
+        class _Rpc:
+            def execute(self):
+                client.calls.append(("rpc", fn, params))
+                return FakeResponse(client.rpcs[fn](params or {}))
+
+        return _Rpc()
+
+
+@pytest.fixture
+def fake_supabase():
+    return FakeSupabase()
@@ -0,0 +1,69 @@
+from src.utils import assignment
+
+PERIOD = 7
+MENTORS = [101, 102, 103]
+N_PENDING = 2500
+N_ASSIGNED = 1500
+N_SUBJECTS = 400
+
+
+def build_period(fake):
+    """More than 1000 rows in every table the balanced assignment reads."""
+    fake.tables["maestros"] = [{"id": m, "es_mentor_ie": True} for m in MENTORS] + [{"id": 999, "es_mentor_ie": False}]
+    assigned = [
+        {"id": i, "alumno_id": i, "periodo_id": PERIOD, "mentor_ie_id": MENTORS[i % len(MENTORS)], "alumnos": {"carrera_id": 1}}
+        for i in range(1, N_ASSIGNED + 1)
+    ]
+    pending = [
+        {"id": i, "alumno_id": i, "periodo_id": PERIOD, "mentor_ie_id": None, "alumnos": {"carrera_id": 1 + i % 2}}
+        for i in range(N_ASSIGNED + 1, N_ASSIGNED + N_PENDING + 1)
+    ]
+    other_period = [{"id": 10_000 + i, "alumno_id": i, "periodo_id": PERIOD - 1, "mentor_ie_id": None} for i in range(50)]
+    fake.tables["proyectos_dual"] = assigned + pending + other_period
+    fake.tables["inscripciones_asignaturas"] = [
+        {"id": n, "alumno_id": p["alumno_id"], "periodo_id": PERIOD, "asignatura_id": (p["alumno_id"] * 3 + k) % N_SUBJECTS}
+        for n, (p, k) in enumerate(((p, k) for p in pending for k in range(3)), start=1)
+    ]
+    fake.tables["rel_maestros_asignaturas"] = [
+        {"maestro_id": m, "asignatura_id": a, "asignaturas": {"carrera_id": 1 + a % 2}}
+        for m in MENTORS for a in range(N_SUBJECTS)
+    ]
+
+
+def test_balanced_inputs_read_every_page(fake_supabase):
+    build_period(fake_supabase)
+
+    mentors, current_load, projects, by_subject, by_career = assignment._load_balanced_inputs(fake_supabase, PERIOD)
+
+    assert sorted(mentors) == MENTORS
+    assert sum(current_load.values()) == N_ASSIGNED
+    assert current_load == {m: N_ASSIGNED // len(MENTORS) for m in MENTORS}
+    assert len(projects) == N_PENDING
+    assert all(len(p["asignatura_ids"]) == 3 for p in projects)
+    assert len(by_subject) == N_SUBJECTS and all(v == set(MENTORS) for v in by_subject.values())
+    assert by_career == {1: set(MENTORS), 2: set(MENTORS)}
+
+
+def test_balanced_assignment_covers_all_pending_students(fake_supabase, monkeypatch):
+    build_period(fake_supabase)
+    monkeypatch.setattr(assignment, "get_supabase_client", lambda: fake_supabase)
+    monkeypatch.setattr(assignment, "get_active_period_id", lambda: PERIOD)
+
+    success, proposal = assignment.assign_mentors_balanced(dry_run=True)
+
+    assert success
+    assert len(proposal["assignments"]) == N_PENDING and not proposal["unassigned"]
+    loads = proposal["loads"]
+    assert sum(loads.values()) == N_ASSIGNED + N_PENDING
+    assert max(loads.values()) - min(loads.values()) <= 1
+
+
+def test_round_robin_covers_all_pending_students(fake_supabase, monkeypatch):
+    build_period(fake_supabase)
+    monkeypatch.setattr(assignment, "get_supabase_client", lambda: fake_supabase)
+    monkeypatch.setattr(assignment, "get_active_period_id", lambda: PERIOD)
+
+    success, proposal = assignment.assign_mentors_round_robin(dry_run=True)
+
+    assert success
+    assert len(proposal["assignments"]) == N_PENDING
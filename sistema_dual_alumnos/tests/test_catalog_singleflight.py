@@ -0,0 +1,42 @@
+import time
+import threading
+
+from src import repository
+
+READERS = 200
+
+
+def test_concurrent_identical_reads_reach_backend_once(fake_supabase, monkeypatch):
+    fake_supabase.tables["carreras"] = [{"id": 2, "nombre": "Mecatrónica"}, {"id": 1, "nombre": "Sistemas"}]
+    backend_calls = []
+
+    class SlowBackend:
+        """Holds the first request open long enough for every reader to arrive."""
+
+        def table(self, name):
+            backend_calls.append(name)
+            time.sleep(0.2)
+            return fake_supabase.table(name)
+
+    monkeypatch.setattr(repository, "get_supabase_client", lambda: SlowBackend())
+    repository.invalidate_catalog()
+    before = repository.get_cache_stats()
+
+    barrier = threading.Barrier(READERS)
+    results = [None] * READERS
+
+    def read(i):
+        barrier.wait()  # release all readers at once so the misses overlap
+        results[i] = repository.get_carreras()
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(READERS)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    after = repository.get_cache_stats()
+    assert backend_calls == ["carreras"]
+    assert after["loads"] - before["loads"] == 1
+    assert after["coalesced"] - before["coalesced"] == READERS - 1
+    assert all(r == [{"id": 2, "nombre": "Mecatrónica"}, {"id": 1, "nombre": "Sistemas"}] for r in results)
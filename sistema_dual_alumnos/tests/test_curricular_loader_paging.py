@@ -0,0 +1,61 @@
+import io
+import hashlib
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from src.utils import curricular_loader
+
+CAREER = 3
+N_SUBJECTS = 210      # two in_() batches of asignatura ids
+COMPS_PER_SUBJECT = 6  # 1,200 competencias in the first batch
+ACTS_PER_COMP = 6      # 1,200 actividades per batch of 200 competencias
+TEACHERS = ["M01", "M02", "M03", "M04", "M05", "M06"]  # 1,200 relations in the first batch
+
+
+def curricular_csv():
+    rows = [
+        {
+            "clave_asignatura": f"ASG{s:03d}", "asignatura": f"Asignatura {s}", "semestre": 1 + s % 9,
+            "numero_competencia": c, "competencia": f"Competencia {s}.{c}",
+            "actividad": f"Actividad {s}.{c}.{a}", "evidencia": "Reporte", "horas": 4,
+            "clave_maestro": ",".join(TEACHERS),
+        }
+        for s in range(N_SUBJECTS) for c in range(1, COMPS_PER_SUBJECT + 1) for a in range(ACTS_PER_COMP)
+    ]
+    return io.BytesIO(pd.DataFrame(rows).to_csv(index=False).encode("utf-8"))
+
+
+@pytest.fixture
+def loader(fake_supabase, monkeypatch):
+    # what the 000900 migration's generated column computes
+    fake_supabase.generated["actividades_aprendizaje"] = {
+        "descripcion_hash": lambda row: hashlib.md5(row["descripcion_actividad"].encode("utf-8")).hexdigest()
+    }
+    fake_supabase.tables["maestros"] = [{"id": i, "clave_maestro": clave} for i, clave in enumerate(TEACHERS, start=1)]
+    monkeypatch.setattr(curricular_loader, "get_supabase_client", lambda: fake_supabase)
+    monkeypatch.setattr(curricular_loader, "invalidate_catalog", lambda *tables: None)
+    return fake_supabase
+
+
+def test_rerun_of_a_large_map_changes_nothing(loader):
+    success, first = curricular_loader.load_curricular_map(curricular_csv(), "mapa.csv", CAREER)
+    assert success, first
+    n_comps = N_SUBJECTS * COMPS_PER_SUBJECT
+    expected = {
+        "asignaturas": N_SUBJECTS,
+        "asignatura_competencias": n_comps,
+        "actividades_aprendizaje": n_comps * ACTS_PER_COMP,
+        "rel_maestros_asignaturas": N_SUBJECTS * len(TEACHERS),
+    }
+    assert {t: c["inserted"] for t, c in first["tables"].items()} == expected
+
+    calls_before = len(loader.calls)
+    success, second = curricular_loader.load_curricular_map(curricular_csv(), "mapa.csv", CAREER)
+    assert success, second
+    # Every existing child was read back despite the 1000-row cap per request
+    assert {t: c["unchanged"] for t, c in second["tables"].items()} == expected
+    assert all(c["inserted"] == 0 and c["updated"] == 0 for c in second["tables"].values())
+    assert not [call for call in loader.calls[calls_before:] if call[2] == "upsert"]
+    assert {t: len(loader.tables[t]) for t in expected} == expected
@@ -0,0 +1,233 @@
+import os
+import json
+import uuid
+
+import pytest
+
+from src.utils import email_outbox
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+
+class FakeOutbox:
+    """
+    email_outbox plus reclamar/resolver with the semantics of migrations
+    001100 and 001300, on a clock the test moves (seconds). Backoff has no
+    jitter so retry times are exact.
+    """
+
+    def __init__(self, supabase):
+        self.now = 1000.0
+        self.rows = supabase.tables.setdefault("email_outbox", [])
+        supabase.rpcs["reclamar_email_outbox"] = self.reclamar
+        supabase.rpcs["resolver_email_outbox"] = self.resolver
+
+    def row(self, row_id):
+        return next(r for r in self.rows if r["id"] == row_id)
+
+    def reclamar(self, params):
+        for row in self.rows:
+            row.setdefault("estado", "pendiente")
+            row.setdefault("intentos", 0)
+            row.setdefault("proximo_intento", self.now)
+        due = [
+            r for r in self.rows
+            if (r["estado"] == "pendiente" and r["proximo_intento"] <= self.now)
+            or (r["estado"] == "enviando" and r["bloqueado_hasta"] < self.now)
+        ]
+        claimed = sorted(due, key=lambda r: r["proximo_intento"])[:params["p_limite"]]
+        for row in claimed:
+            row.update(estado="enviando", intentos=row["intentos"] + 1,
+                       bloqueado_hasta=self.now + params["p_bloqueo_segundos"], reclamo=str(uuid.uuid4()))
+        return [dict(r) for r in claimed]
+
+    def resolver(self, params):
+        resolved = []
+        for result in params["p_resultados"]:
+            row = self.row(result["id"])
+            if row["estado"] != "enviando" or row["reclamo"] != result["reclamo"]:
+                continue
+            if result["enviado"]:
+                row["estado"] = "enviado"
+            elif result["permanente"] or row["intentos"] >= params["p_max_intentos"]:
+                row["estado"] = "fallido"
+            else:
+                row["estado"] = "pendiente"
+                row["proximo_intento"] = self.now + min(params["p_espera_max"], params["p_espera_base"] * 2 ** (row["intentos"] - 1))
+            row.update(ultimo_error=None if result["enviado"] else result["error"], bloqueado_hasta=None, reclamo=None)
+            resolved.append({"id": row["id"], "estado": row["estado"]})
+        return resolved
+
+
+class FakeMailer:
+    """Mailer.deliver with scripted outcomes per recipient ("ok", "transient", "permanent")."""
+
+    pool_size = 2
+
+    def __init__(self):
+        self.script = {}
+        self.sent = []
+        self.during_send = None
+
+    def deliver(self, messages):
+        messages = list(messages)
+        if self.during_send:
+            hook, self.during_send = self.during_send, None
+            hook()
+        results = []
+        for message in messages:
+            script = self.script.get(message["to"])
+            outcome = script.pop(0) if script else "ok"
+            if outcome == "ok":
+                self.sent.append(message["to"])
+                results.append({"sent": True, "error": None, "permanent": False})
+            else:
+                results.append({"sent": False, "error": f"{outcome} failure", "permanent": outcome == "permanent"})
+        return results
+
+
+@pytest.fixture
+def outbox(fake_supabase, monkeypatch):
+    fake = FakeOutbox(fake_supabase)
+    mailer = FakeMailer()
+    monkeypatch.setattr(email_outbox, "get_supabase_client", lambda: fake_supabase)
+    monkeypatch.setattr(email_outbox, "get_mailer", lambda: mailer)
+    monkeypatch.setattr(email_outbox, "start_outbox_worker", lambda: None)  # the test drives delivery
+    monkeypatch.setattr(email_outbox, "_stats", {key: 0 for key in email_outbox._stats})
+    fake.mailer = mailer
+    return fake
+
+
+def enqueue(to):
+    success, row_id = email_outbox.enqueue_email(to, "Asunto", "registro_alumno.html", {"nombre": "Prueba"})
+    assert success
+    return row_id
+
+
+def test_transient_failure_is_retried_with_backoff(outbox):
+    row_id = enqueue("a@example.edu")
+    outbox.mailer.script["a@example.edu"] = ["transient", "transient"]
+
+    assert email_outbox.deliver_pending() == 1
+    row = outbox.row(row_id)
+    assert (row["estado"], row["intentos"], row["ultimo_error"]) == ("pendiente", 1, "transient failure")
+    assert row["proximo_intento"] == outbox.now + email_outbox.OUTBOX_BACKOFF_BASE
+
+    assert email_outbox.deliver_pending() == 0  # not due yet
+    outbox.now = row["proximo_intento"]
+    assert email_outbox.deliver_pending() == 1
+    assert row["proximo_intento"] == outbox.now + 2 * email_outbox.OUTBOX_BACKOFF_BASE  # doubled
+
+    outbox.now = row["proximo_intento"]
+    email_outbox.deliver_pending()
+    assert (row["estado"], row["intentos"], row["ultimo_error"]) == ("enviado", 3, None)
+    assert outbox.mailer.sent == ["a@example.edu"]
+    stats = email_outbox.get_outbox_stats()
+    assert (stats["retried"], stats["delivered"], stats["dead_lettered"]) == (2, 1, 0)
+
+
+def test_permanent_failure_goes_to_dead_letter(outbox):
+    row_id = enqueue("rechazado@example.edu")
+    outbox.mailer.script["rechazado@example.edu"] = ["permanent"]
+
+    email_outbox.deliver_pending()
+    outbox.now += email_outbox.OUTBOX_BACKOFF_MAX
+    assert email_outbox.deliver_pending() == 0  # never claimed again
+
+    assert (outbox.row(row_id)["estado"], outbox.row(row_id)["intentos"]) == ("fallido", 1)
+    assert email_outbox.get_outbox_stats()["dead_lettered"] == 1
+
+
+def test_exhausted_attempts_go_to_dead_letter(outbox, monkeypatch):
+    monkeypatch.setattr(email_outbox, "OUTBOX_MAX_ATTEMPTS", 3)
+    row_id = enqueue("caido@example.edu")
+    outbox.mailer.script["caido@example.edu"] = ["transient"] * 10
+
+    for _ in range(5):
+        email_outbox.deliver_pending()
+        outbox.now += email_outbox.OUTBOX_BACKOFF_MAX
+
+    assert (outbox.row(row_id)["estado"], outbox.row(row_id)["intentos"]) == ("fallido", 3)
+    stats = email_outbox.get_outbox_stats()
+    assert (stats["retried"], stats["dead_lettered"], stats["delivered"]) == (2, 1, 0)
+
+
+def test_claim_of_a_dead_worker_is_recovered_after_the_lease(outbox):
+    row_id = enqueue("b@example.edu")
+    # A worker claims the row and dies before resolving it
+    outbox.reclamar({"p_limite": 10, "p_bloqueo_segundos": 60})
+
+    assert email_outbox.deliver_pending() == 0  # still leased
+    outbox.now += 61
+    assert email_outbox.deliver_pending() == 1
+
+    assert (outbox.row(row_id)["estado"], outbox.row(row_id)["intentos"]) == ("enviado", 2)
+
+
+def test_late_worker_does_not_overwrite_the_new_claim(outbox):
+    row_id = enqueue("c@example.edu")
+    outbox.mailer.script["c@example.edu"] = ["ok", "transient"]  # the second claim sends first
+
+    def lease_expires_and_another_worker_delivers():
+        outbox.now += email_outbox._lease_seconds(email_outbox.OUTBOX_BATCH_SIZE, FakeMailer.pool_size) + 1
+        assert email_outbox.deliver_pending() == 1
+
+    outbox.mailer.during_send = lease_expires_and_another_worker_delivers
+    assert email_outbox.deliver_pending() == 1
+
+    # The late worker's transient failure was not applied over 'enviado'
+    row = outbox.row(row_id)
+    assert (row["estado"], row["intentos"], row["ultimo_error"]) == ("enviado", 2, None)
+    stats = email_outbox.get_outbox_stats()
+    assert (stats["delivered"], stats["retried"], stats["lease_lost"]) == (1, 0, 1)
+
+
+def test_lease_outlasts_the_slowest_batch():
+    per_connection = -(-email_outbox.OUTBOX_BATCH_SIZE // 2)
+    # every message times out, reconnects and times out again, after a slow first connect
+    worst = (5 + per_connection * 13) * email_outbox.SMTP_TIMEOUT
+    assert email_outbox._lease_seconds(email_outbox.OUTBOX_BATCH_SIZE, 2) >= worst
+
+
+@pytest.fixture
+def pg():
+    """Autocommit connection to a local database with the app schema (supabase start / DATABASE_URL)."""
+    if not DATABASE_URL:
+        pytest.skip("DATABASE_URL not set (local Postgres with the app schema and migrations)")
+    psycopg = pytest.importorskip("psycopg")
+    try:
+        conn = psycopg.connect(DATABASE_URL, autocommit=True)
+    except psycopg.OperationalError as e:
+        pytest.skip(f"local Postgres not available: {e}")
+    with conn:
+        yield conn
+
+
+def test_resolver_only_applies_to_the_current_claim(pg):
+    cur = pg.cursor()
+    # Due long ago, so it is first in line for a one-row claim
+    cur.execute(
+        "insert into public.email_outbox (destinatario, asunto, plantilla, proximo_intento) "
+        "values ('lease@example.edu', 'Prueba', 'registro_alumno.html', now() - interval '10 years') returning id"
+    )
+    row_id = cur.fetchone()[0]
+    try:
+        cur.execute("select id, reclamo from public.reclamar_email_outbox(1, 0)")
+        first_id, first_claim = cur.fetchone()
+        assert first_id == row_id
+        # Lease of 0 s: the next statement can claim it again
+        cur.execute("select id, reclamo from public.reclamar_email_outbox(1, 60)")
+        second_id, second_claim = cur.fetchone()
+        assert second_id == row_id and second_claim != first_claim
+
+        def resolve(claim, enviado):
+            result = [{"id": row_id, "reclamo": str(claim), "enviado": enviado, "error": None if enviado else "timeout", "permanente": False}]
+            cur.execute("select id, estado from public.resolver_email_outbox(%s::jsonb, 6, 30, 3600)", (json.dumps(result),))
+            return cur.fetchall()
+
+        assert resolve(first_claim, False) == []  # stale worker: ignored
+        assert resolve(second_claim, True) == [(row_id, "enviado")]
+        cur.execute("select estado, intentos, reclamo from public.email_outbox where id = %s", (row_id,))
+        assert cur.fetchone() == ("enviado", 2, None)
+    finally:
+        cur.execute("delete from public.email_outbox where id = %s", (row_id,))
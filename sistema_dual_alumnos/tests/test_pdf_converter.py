@@ -0,0 +1,221 @@
+import io
+import os
+import sys
+import time
+import shutil
+import zipfile
+import tempfile
+import subprocess
+
+import pytest
+
+pytest.importorskip("docx")
+from docx import Document
+
+from src.utils import pdf_converter, document_cache
+from src.utils.document_generator import DOCUMENT_TEMPLATES, build_document_context, write_documents_zip
+from src.utils.pdf_converter import PdfConverterPool
+
+REAL_SOFFICE = shutil.which("soffice") or shutil.which("libreoffice")
+
+# Stand-in for soffice with the costs that matter here: the first start of a
+# user profile (FAKE_SOFFICE_INIT seconds, what LibreOffice spends creating
+# it), a fixed cost per process (FAKE_SOFFICE_START) and documents named
+# "hang*" that never finish (a child process is left in the group, as
+# soffice.bin would be).
+FAKE_SOFFICE = """#!{python}
+import os, sys, time, subprocess
+args = sys.argv[1:]
+profile = next(a.split("file://", 1)[1] for a in args if a.startswith("-env:UserInstallation="))
+marker = os.path.join(profile, "initialized")
+if not os.path.exists(marker):
+    time.sleep(float(os.environ.get("FAKE_SOFFICE_INIT", 0)))
+    os.makedirs(profile, exist_ok=True)
+    open(marker, "w").close()
+time.sleep(float(os.environ.get("FAKE_SOFFICE_START", 0)))
+if "--terminate_after_init" in args:
+    sys.exit(0)
+outdir = args[args.index("--outdir") + 1]
+for path in args[args.index("--outdir") + 2:]:
+    if os.path.basename(path).startswith("hang"):
+        child = subprocess.Popen(["sleep", "60"])
+        with open(os.environ["FAKE_SOFFICE_CHILDREN"], "a") as f:
+            f.write(f"{{child.pid}}\\n")
+        time.sleep(60)
+    with open(os.path.join(outdir, os.path.splitext(os.path.basename(path))[0] + ".pdf"), "wb") as f:
+        f.write(b"%PDF-1.4 fake\\n%%EOF\\n")
+"""
+
+
+@pytest.fixture
+def fake_soffice(tmp_path, monkeypatch):
+    script = tmp_path / "soffice"
+    script.write_text(FAKE_SOFFICE.format(python=sys.executable))
+    script.chmod(0o755)
+    monkeypatch.setattr(pdf_converter, "SOFFICE_PATH", str(script))
+    monkeypatch.setenv("FAKE_SOFFICE_CHILDREN", str(tmp_path / "children"))
+    return script
+
+
+@pytest.fixture
+def templates(tmp_path):
+    path = tmp_path / "templates"
+    path.mkdir()
+    for template, _ in DOCUMENT_TEMPLATES:
+        doc = Document()
+        doc.add_heading(template, 0)
+        for key in ("nombre_alumno", "matricula", "nombre_proyecto", "nombre_empresa", "mentor_ie"):
+            doc.add_paragraph(f"{key}: {{{{{key}}}}}")
+        doc.save(path / template)
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def isolated_cache(tmp_path, monkeypatch):
+    # Cached PDFs would skip the conversion under test
+    monkeypatch.setattr(document_cache, "_cache", document_cache.DocumentCache(str(tmp_path / "cache")))
+
+
+def contexts(n):
+    return [
+        build_document_context(
+            {"nombre": "Alumno", "ap_paterno": f"Prueba{i}", "ap_materno": "Dual", "matricula": f"2026{i:04d}"},
+            {"nombre_proyecto": f"Proyecto {i}", "ue_name": "Empresa"},
+            {"nombre_completo": "Mentor IE"},
+        )
+        for i in range(n)
+    ]
+
+
+def docx_files(directory, names):
+    paths = []
+    for name in names:
+        path = os.path.join(directory, name)
+        Document().save(path)
+        paths.append(path)
+    return paths
+
+
+def cold_conversion(paths, outdir):
+    """One soffice per file with a fresh profile each time (the previous approach)."""
+    for path in paths:
+        with tempfile.TemporaryDirectory() as profile:
+            subprocess.run([pdf_converter.SOFFICE_PATH, f"-env:UserInstallation=file://{profile}", "--headless",
+                            "--convert-to", "pdf", "--outdir", outdir, path],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+
+
+def assert_pdf_zip(archive_bytes, n_students):
+    archive = zipfile.ZipFile(io.BytesIO(archive_bytes))
+    pdfs = [name for name in archive.namelist() if name.endswith(".pdf")]
+    assert len(pdfs) == n_students * len(DOCUMENT_TEMPLATES)
+    for name in pdfs:
+        assert archive.read(name).startswith(b"%PDF")
+
+
+def test_hung_batch_is_killed_and_retried_one_by_one(fake_soffice, tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_converter, "PDF_TIMEOUT_BASE", 1.0)
+    monkeypatch.setattr(pdf_converter, "PDF_TIMEOUT_PER_DOC", 0.2)
+    paths = docx_files(str(tmp_path), ["a.docx", "hang.docx", "c.docx"])
+
+    pool = PdfConverterPool(workers=1, batch_size=10)
+    try:
+        start = time.perf_counter()
+        results = pool.convert_many(paths)
+        elapsed = time.perf_counter() - start
+        stats = pool.stats()
+    finally:
+        pool.shutdown()
+
+    assert elapsed < 15  # nothing waited for the 60 s hang
+    assert results[paths[1]] is None
+    for path in (paths[0], paths[2]):
+        with open(results[path], "rb") as f:
+            assert f.read().startswith(b"%PDF")
+    # the batch timed out, then hang.docx timed out again on its own
+    assert stats["restarts"] == 2
+    assert stats["converted"] == 2 and stats["failed"] == 1
+
+    # killpg took the whole process group, including the child left behind
+    children = [int(pid) for pid in (tmp_path / "children").read_text().split()]
+    assert len(children) == 2
+    for pid in children:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                assert f.read().split()[2] == "Z"  # killed, waiting to be reaped
+        except FileNotFoundError:
+            pass
+
+
+def test_warm_profiles_remove_per_file_startup_cost(fake_soffice, tmp_path, monkeypatch):
+    monkeypatch.setenv("FAKE_SOFFICE_INIT", "0.4")
+    monkeypatch.setenv("FAKE_SOFFICE_START", "0.05")
+    paths = docx_files(str(tmp_path), [f"doc{i}.docx" for i in range(6)])
+    cold_dir = tmp_path / "cold"
+    cold_dir.mkdir()
+
+    start = time.perf_counter()
+    cold_conversion(paths, str(cold_dir))
+    cold = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pool = PdfConverterPool(workers=2, batch_size=3)  # profile creation is counted too
+    try:
+        results = pool.convert_many(paths)
+        warm = time.perf_counter() - start
+        stats = pool.stats()
+    finally:
+        pool.shutdown()
+
+    assert all(results.values())
+    assert stats["batches"] == 2
+    # cold pays the profile creation per document; the pool pays it once per worker
+    assert cold > 6 * 0.4
+    assert warm < cold / 3
+
+
+def test_write_documents_zip_includes_pdfs(fake_soffice, templates, monkeypatch):
+    monkeypatch.setattr(pdf_converter, "_pool", PdfConverterPool(workers=2, batch_size=2))
+    try:
+        out = io.BytesIO()
+        count = write_documents_zip(contexts(3), out, workers=1, templates_path=templates, include_pdf=True)
+        stats = pdf_converter.get_converter_stats()
+    finally:
+        pdf_converter._pool.shutdown()
+
+    assert count == 3 * len(DOCUMENT_TEMPLATES) * 2
+    assert_pdf_zip(out.getvalue(), 3)
+    assert stats["converted"] == 3 * len(DOCUMENT_TEMPLATES)
+    assert stats["queue_depth"] == 0 and stats["busy_workers"] == 0
+    assert stats["docs_per_second"] > 0
+
+
+@pytest.mark.skipif(not REAL_SOFFICE, reason="LibreOffice (soffice) not on PATH")
+def test_converts_generated_anexos_with_libreoffice(templates, tmp_path, monkeypatch):
+    monkeypatch.setattr(pdf_converter, "SOFFICE_PATH", REAL_SOFFICE)
+    pool = PdfConverterPool(workers=2, batch_size=4)
+    monkeypatch.setattr(pdf_converter, "_pool", pool)
+    try:
+        out = io.BytesIO()
+        write_documents_zip(contexts(4), out, workers=1, templates_path=templates, include_pdf=True)
+        stats = pool.stats()
+        assert_pdf_zip(out.getvalue(), 4)
+        assert stats["converted"] == 4 * len(DOCUMENT_TEMPLATES) and stats["failed"] == 0
+        assert stats["queue_depth"] == 0
+        assert stats["docs_per_second"] > 0
+
+        # Throughput against one cold soffice per file, on the same documents
+        paths = docx_files(str(tmp_path), [f"anexo{i}.docx" for i in range(4)])
+        cold_dir = tmp_path / "cold"
+        cold_dir.mkdir()
+        start = time.perf_counter()
+        cold_conversion(paths, str(cold_dir))
+        cold_rate = len(paths) / (time.perf_counter() - start)
+        assert len(os.listdir(cold_dir)) == len(paths)
+
+        start = time.perf_counter()
+        assert all(pool.convert_many(paths).values())
+        warm_rate = len(paths) / (time.perf_counter() - start)
+        assert warm_rate > cold_rate
+    finally:
+        pool.shutdown()
@@ -0,0 +1,106 @@
+import os
+import json
+import uuid
+from datetime import date
+
+import pytest
+
+from src import instrumentation
+from src.utils import db_actions
+
+DATABASE_URL = os.environ.get("DATABASE_URL")
+
+STUDENT = {
+    "matricula": "TEST-0001", "curp": "AAAA000101HDFXXX01", "nombre": "Prueba", "ap_paterno": "Dual",
+    "ap_materno": "Atomica", "fecha_nacimiento": date(2004, 1, 1), "carrera_id": 1, "semestre": 6,
+    "email_institucional": "prueba@example.edu",
+}
+PROJECT = {
+    "ue_id": 1, "mentor_ue_id": 1, "nombre_proyecto": "Proyecto de prueba",
+    "fecha_inicio": date(2026, 8, 1), "fecha_fin": date(2027, 1, 31),
+}
+SUBJECTS = [
+    {"asignatura_id": 1, "maestro_id": 1, "grupo": "601"},
+    {"asignatura_id": 2, "maestro_id": 1, "grupo": "601"},
+]
+
+
+def test_create_student_transaction_is_one_round_trip(fake_supabase, monkeypatch):
+    fake_supabase.rpcs["registrar_alumno_dual"] = lambda params: {"alumno_id": 42, "periodo_id": 7}
+    client = instrumentation.InstrumentedClient(fake_supabase)
+    monkeypatch.setattr(db_actions, "get_supabase_client", lambda: client)
+    instrumentation.reset_query_stats()
+
+    success, record = db_actions.create_student_transaction(STUDENT, PROJECT, SUBJECTS)
+
+    assert success and record["id"] == 42
+    assert [call[:2] for call in fake_supabase.calls] == [("rpc", "registrar_alumno_dual")]
+    assert sum(s["calls"] for s in instrumentation.get_query_stats()) == 1
+    params = fake_supabase.calls[0][2]
+    assert len(params["p_asignaturas"]) == len(SUBJECTS)
+    json.dumps(params)  # the whole payload goes in the single request body
+
+
+@pytest.fixture
+def pg():
+    """Autocommit connection to a local database with the app schema (supabase start / DATABASE_URL)."""
+    if not DATABASE_URL:
+        pytest.skip("DATABASE_URL not set (local Postgres with the app schema and migrations)")
+    psycopg = pytest.importorskip("psycopg")
+    try:
+        conn = psycopg.connect(DATABASE_URL, autocommit=True)
+    except psycopg.OperationalError as e:
+        pytest.skip(f"local Postgres not available: {e}")
+    with conn:
+        yield conn
+
+
+def _first_id(cur, table, where="true"):
+    cur.execute(f"select id from public.{table} where {where} order by id limit 1")
+    row = cur.fetchone()
+    if row is None:
+        pytest.skip(f"no rows in {table} to reference")
+    return row[0]
+
+
+def _counts(cur, matricula):
+    cur.execute(
+        """
+        select (select count(*) from public.alumnos where matricula = %(m)s),
+               (select count(*) from public.proyectos_dual p join public.alumnos a on a.id = p.alumno_id where a.matricula = %(m)s),
+               (select count(*) from public.inscripciones_asignaturas i join public.alumnos a on a.id = i.alumno_id where a.matricula = %(m)s)
+        """,
+        {"m": matricula},
+    )
+    return cur.fetchone()
+
+
+def test_registrar_alumno_dual_rolls_back_on_invalid_subject(pg):
+    cur = pg.cursor()
+    _first_id(cur, "periodos", "activo")
+    matricula = f"T{uuid.uuid4().hex[:10]}"
+    alumno = {
+        "matricula": matricula, "curp": "AAAA000101HDFXXX01", "nombre": "Prueba", "ap_paterno": "Dual",
+        "ap_materno": "Atomica", "fecha_nacimiento": "2004-01-01", "carrera_id": _first_id(cur, "carreras"), "semestre": 6,
+    }
+    proyecto = {
+        "ue_id": _first_id(cur, "unidades_economicas"), "mentor_ue_id": _first_id(cur, "mentores_ue"),
+        "nombre_proyecto": "Proyecto de prueba", "fecha_inicio_convenio": "2026-08-01", "fecha_fin_convenio": "2027-01-31",
+    }
+    maestro_id = _first_id(cur, "maestros")
+    asignaturas = [
+        {"asignatura_id": _first_id(cur, "asignaturas"), "maestro_id": maestro_id, "grupo": "601"},
+        {"asignatura_id": -1, "maestro_id": maestro_id, "grupo": "601"},  # violates the FK after the first rows are written
+    ]
+
+    try:
+        with pytest.raises(Exception):
+            cur.execute(
+                "select public.registrar_alumno_dual(%s::jsonb, %s::jsonb, %s::jsonb)",
+                (json.dumps(alumno), json.dumps(proyecto), json.dumps(asignaturas)),
+            )
+        assert _counts(cur, matricula) == (0, 0, 0)
+    finally:
+        cur.execute("delete from public.inscripciones_asignaturas where alumno_id in (select id from public.alumnos where matricula = %s)", (matricula,))
+        cur.execute("delete from public.proyectos_dual where alumno_id in (select id from public.alumnos where matricula = %s)", (matricula,))
+        cur.execute("delete from public.alumnos where matricula = %s", (matricula,))
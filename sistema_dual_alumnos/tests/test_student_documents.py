@@ -0,0 +1,64 @@
+import io
+
+import pytest
+
+pytest.importorskip("docx")
+from docx import Document
+
+from src.utils import document_cache
+from src.utils.document_generator import DOCUMENT_TEMPLATES, project_document_context, render_student_documents
+
+STUDENT = {"nombre": "Ana", "ap_paterno": "López", "ap_materno": "Ruiz", "matricula": "20260001"}
+# proyectos_dual row as the student dashboard selects it
+PROJECT = {
+    "nombre_proyecto": "Sistema de inventarios",
+    "unidades_economicas": {"nombre_comercial": "Empresa SA"},
+    "mentores_ue": {"nombre_completo": "Mentor UE"},
+    "maestros": {"nombre_completo": "Mentor IE", "email_institucional": "mentor@ie.mx"},
+}
+
+
+@pytest.fixture
+def templates(tmp_path):
+    path = tmp_path / "templates"
+    path.mkdir()
+    for template, _ in DOCUMENT_TEMPLATES:
+        doc = Document()
+        doc.add_heading(template, 0)
+        for key in ("nombre_alumno", "nombre_empresa", "mentor_ue", "mentor_ie"):
+            doc.add_paragraph(f"{key}: {{{{{key}}}}}")
+        doc.save(path / template)
+    return str(path)
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = document_cache.DocumentCache(str(tmp_path / "cache"))
+    monkeypatch.setattr(document_cache, "_cache", cache)
+    return cache
+
+
+def test_student_documents_are_served_from_the_cache(templates, cache):
+    context = project_document_context(STUDENT, PROJECT)
+    first = render_student_documents(context, templates)
+    second = render_student_documents(project_document_context(STUDENT, PROJECT), templates)
+
+    assert [name for name, _ in first] == ["Anexo_5.1_20260001.docx", "Carta_Asignacion_20260001.docx"]
+    assert second == first
+    stats = cache.stats()
+    assert stats["writes"] == len(DOCUMENT_TEMPLATES)  # rendered once
+    assert stats["hits"] == len(DOCUMENT_TEMPLATES)    # the rerun only read the cache
+
+    text = "\n".join(p.text for p in Document(io.BytesIO(first[0][1])).paragraphs)
+    assert "nombre_alumno: Ana López Ruiz" in text
+    assert "nombre_empresa: Empresa SA" in text
+    assert "mentor_ie: Mentor IE" in text
+
+
+def test_changed_project_data_renders_a_new_document(templates, cache):
+    before = render_student_documents(project_document_context(STUDENT, PROJECT), templates)
+    changed = dict(PROJECT, maestros={"nombre_completo": "Otro Mentor"})
+    after = render_student_documents(project_document_context(STUDENT, changed), templates)
+
+    assert after[0][1] != before[0][1]
+    assert cache.stats()["writes"] == 2 * len(DOCUMENT_TEMPLATES)
@@ -0,0 +1,46 @@
+from src import repository
+
+CAREER = 4
+N_SUBJECTS = 300
+TEACHERS_PER_SUBJECT = 4  # 1,200 relations, more than one PostgREST page
+
+
+def build_career(fake):
+    fake.tables["asignaturas"] = [
+        {"id": s, "nombre": f"Asignatura {s}", "clave_asignatura": f"ASG{s}", "semestre": 1, "carrera_id": CAREER}
+        for s in range(1, N_SUBJECTS + 1)
+    ]
+    fake.tables["rel_maestros_asignaturas"] = [
+        {"asignatura_id": s, "maestro_id": m,
+         "maestros": {"id": m, "clave_maestro": f"M{m:03d}", "nombre_completo": f"Maestro {m} (Tiempo completo)"}}
+        for s in range(1, N_SUBJECTS + 1) for m in range(s, s + TEACHERS_PER_SUBJECT)
+    ]
+    fake.tables["periodos"] = [{"id": 1, "nombre": "2026-1", "activo": True}]
+
+
+def test_teacher_index_reads_every_relation(fake_supabase, monkeypatch):
+    build_career(fake_supabase)
+    monkeypatch.setattr(repository, "get_supabase_client", lambda: fake_supabase)
+    repository.invalidate_catalog()
+
+    index = repository.get_teacher_index(CAREER)
+
+    assert len(index) == N_SUBJECTS
+    assert all(len(teachers) == TEACHERS_PER_SUBJECT for teachers in index.values())
+    assert index[1][0] == ("M001", "M001 - Maestro 1", 1)
+
+
+def test_period_change_keeps_the_teacher_index(fake_supabase, monkeypatch):
+    build_career(fake_supabase)
+    monkeypatch.setattr(repository, "get_supabase_client", lambda: fake_supabase)
+    repository.invalidate_catalog()
+    repository.get_teacher_index(CAREER)
+
+    # A new active period: relations are not per period, so nothing is re-read
+    fake_supabase.tables["periodos"] = [{"id": 1, "nombre": "2026-1", "activo": False}, {"id": 2, "nombre": "2026-2", "activo": True}]
+    repository.invalidate_catalog("periodos")
+    calls_before = len(fake_supabase.calls)
+    assert repository.get_active_period()["id"] == 2
+    repository.get_teacher_index(CAREER)
+
+    assert [call[1] for call in fake_supabase.calls[calls_before:]] == ["periodos"]
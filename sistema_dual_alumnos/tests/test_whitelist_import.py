@@ -0,0 +1,50 @@
+import io
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from src.utils import whitelist_import
+
+CAREERS = [{"id": 1, "nombre": "Ingeniería en Sistemas"}, {"id": 2, "nombre": "Mecatrónica"}]
+N_STUDENTS = 800  # every matricula in both careers: 1,600 rows, two pages
+
+
+def curp(i):
+    return f"GOMA{i % 100:02d}0101HDFRRNA{i % 10}"
+
+
+def whitelist_csv(rows):
+    return io.BytesIO(pd.DataFrame(rows).to_csv(index=False).encode("utf-8"))
+
+
+def rows(students=N_STUDENTS):
+    return [
+        {"matricula": f"a{i:05d}" if i % 2 else f"A{i:05d}", "curp": curp(i), "carrera": career["nombre"], "nombre_completo": f"Alumno {i}"}
+        for i in range(students) for career in CAREERS
+    ]
+
+
+@pytest.fixture
+def importer(fake_supabase, monkeypatch):
+    monkeypatch.setattr(whitelist_import, "get_supabase_client", lambda: fake_supabase)
+    monkeypatch.setattr(whitelist_import, "get_carreras", lambda: CAREERS)
+    return fake_supabase
+
+
+def test_reimport_counts_every_existing_row_as_unchanged(importer):
+    success, first = whitelist_import.import_whitelist(whitelist_csv(rows()), "lista.csv")
+    assert success, first
+    assert first["inserted"] == 2 * N_STUDENTS and first["rejected"] == 0
+
+    success, second = whitelist_import.import_whitelist(whitelist_csv(rows()), "lista.csv")
+    assert success, second
+    assert (second["inserted"], second["updated"], second["unchanged"]) == (0, 0, 2 * N_STUDENTS)
+
+
+def test_matricula_is_stored_as_typed(importer):
+    success, summary = whitelist_import.import_whitelist(whitelist_csv(rows(2)), "lista.csv")
+
+    assert success, summary
+    # login_alumno matches the matricula exactly, so it must not be rewritten
+    assert sorted({r["matricula"] for r in importer.tables["lista_blanca"]}) == ["A00000", "a00001"]